@@ -0,0 +1,207 @@
+"""
+Admission Control
+-----------------
+Concurrency limiting, deadlines and load shedding for the decide
+endpoints, so that overload turns into fast rejections and cheaper
+decisions instead of an unbounded threadpool queue.
+
+Each request:
+  1. Gets a deadline: the client's `X-Request-Timeout-Ms` budget (a
+     relative time, so client and server clocks need not agree), else
+     `default_timeout_ms`, else none.
+  2. Runs immediately if fewer than `max_concurrency` requests are
+     running. Otherwise it joins a FIFO queue of at most `max_queue`
+     waiters.
+  3. Is shed before it queues (503 + Retry-After) when the queue is full,
+     or when the estimated queue wait plus the average service time
+     already exceeds its deadline. A queued request whose deadline passes
+     while waiting is shed as well, and never reaches a handler.
+  4. Is marked degraded when it was admitted with at least
+     `degrade_queue_depth` requests waiting, or with less than one average
+     service time left before its deadline. Degraded requests take the
+     cheaper decision path configured in the API (`is_degraded()`).
+
+Design Trade-offs:
+  - Limits apply before the request body is read and before the
+    threadpool, so a shed request costs microseconds and no thread.
+    `max_concurrency` should stay at or below the threadpool size (40 by
+    default), otherwise requests queue invisibly in the threadpool again.
+  - Wait estimates use an EWMA of handler service time and Little's law
+    (queue position / concurrency × service time). The estimate is crude
+    under bursty service times, but it is only used to reject requests
+    that are hopeless, not to schedule them.
+  - FIFO, not LIFO: under a sustained overload LIFO gives better p99 for
+    the requests it serves, but starves the oldest ones. Here the bounded
+    queue and deadline checks already cap how long anyone waits.
+  - The degraded flag is a ContextVar. Starlette copies the context into
+    the threadpool, so sync handlers see the value the middleware set
+    without any extra plumbing.
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from app.core.metrics import MetricsRegistry, default_registry
+
+TIMEOUT_HEADER = b"x-request-timeout-ms"
+DEGRADED_REASON = "Served degraded under load — scoring skipped"
+
+_degraded = contextvars.ContextVar("admission_degraded", default=False)
+_deadline = contextvars.ContextVar("admission_deadline", default=None)
+
+
+def is_degraded() -> bool:
+    """True if the current request was admitted in degraded mode."""
+    return _degraded.get()
+
+
+def remaining_ms() -> Optional[float]:
+    """Milliseconds left before the current request's deadline (None = no deadline)."""
+    deadline = _deadline.get()
+    return None if deadline is None else (deadline - time.monotonic()) * 1000
+
+
+class AdmissionController:
+    """
+    Concurrency slots with a bounded FIFO wait queue (one event loop).
+
+    Disabled until configure() is called, so it can be installed as
+    middleware before the config is loaded.
+
+    Usage:
+        controller.configure(max_concurrency=32, max_queue=64)
+        reason = await controller.acquire(deadline)
+        if reason is None:
+            try: ... finally: controller.release(elapsed_s)
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.max_concurrency = 0
+        self.max_queue = 0
+        self.default_timeout = None
+        self.degrade_queue_depth = None
+        self.paths = frozenset()
+        self.metrics: MetricsRegistry = default_registry
+        self.in_flight = 0
+        self.service_s = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.degraded = 0
+        self.shed = {"queue_full": 0, "deadline": 0}
+
+    def configure(
+        self,
+        max_concurrency: int = 32,
+        max_queue: int = 64,
+        default_timeout_ms: Optional[float] = None,
+        degrade_queue_depth: Optional[int] = None,
+        paths=("/api/v1/decide", "/api/v1/decide/batch", "/api/v1/decide/binary"),
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> "AdmissionController":
+        """
+        Args:
+            max_concurrency     : requests handled at once
+            max_queue           : requests allowed to wait for a slot
+            default_timeout_ms  : deadline for requests without a timeout header (None = none)
+            degrade_queue_depth : queue length at which admitted requests are degraded (None = never)
+            paths               : request paths under admission control
+            metrics             : registry for shed / degraded counters
+        """
+        if max_concurrency < 1 or max_queue < 0:
+            raise ValueError("max_concurrency must be >= 1 and max_queue >= 0")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.default_timeout = None if default_timeout_ms is None else default_timeout_ms / 1000
+        self.degrade_queue_depth = degrade_queue_depth
+        self.paths = frozenset(paths)
+        self.metrics = metrics or default_registry
+        self.enabled = True
+        return self
+
+    def applies(self, scope) -> bool:
+        return self.enabled and scope["type"] == "http" and scope["path"] in self.paths
+
+    def deadline(self, headers, now: float) -> Optional[float]:
+        """Absolute (monotonic) deadline from the timeout header or the default."""
+        for name, value in headers:
+            if name == TIMEOUT_HEADER:
+                try:
+                    return now + max(float(value), 0.0) / 1000
+                except ValueError:
+                    break
+        return None if self.default_timeout is None else now + self.default_timeout
+
+    # ------------------------------------------------------------------
+    # Slots
+    # ------------------------------------------------------------------
+
+    async def acquire(self, deadline: Optional[float]) -> Optional[str]:
+        """Wait for a slot; returns None once admitted, else the shed reason."""
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return self._shed("queue_full")
+
+        now = time.monotonic()
+        if deadline is not None:
+            expected_wait = (len(self._waiters) + 1) / self.max_concurrency * self.service_s
+            if now + expected_wait + self.service_s > deadline:
+                return self._shed("deadline")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        timeout = None if deadline is None else max(deadline - now, 0.0)
+        try:
+            # wait(), not wait_for(): a timeout must not cancel a slot release() already handed over
+            await asyncio.wait((waiter,), timeout=timeout)
+        except asyncio.CancelledError:  # client went away while queued
+            if waiter.done():
+                self.release(None)
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            return self._shed("deadline")
+        return None
+
+    def release(self, elapsed_s: Optional[float]) -> None:
+        """Free a slot (handing it to the oldest waiter) and update the service-time EWMA."""
+        if elapsed_s is not None:
+            self.service_s = elapsed_s if self.service_s == 0.0 else 0.9 * self.service_s + 0.1 * elapsed_s
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # slot transfers; in_flight unchanged
+                return
+        self.in_flight -= 1
+
+    def should_degrade(self, deadline: Optional[float]) -> bool:
+        if self.degrade_queue_depth is not None and len(self._waiters) >= self.degrade_queue_depth:
+            return True
+        return deadline is not None and deadline - time.monotonic() < self.service_s
+
+    def _shed(self, reason: str) -> str:
+        self.shed[reason] += 1
+        self.metrics.counter("admission_shed", reason=reason).inc()
+        return reason
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "service_ms_ewma": round(self.service_s * 1000, 3),
+            "admitted": self.admitted,
+            "degraded": self.degraded,
+            "shed": dict(self.shed),
+        }
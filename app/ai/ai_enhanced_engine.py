@@ -5,7 +5,11 @@ Wraps the core DecisionEngine with AI capabilities.
 
 from typing import Dict, Any, List, Optional
 from app.core.decision_engine import DecisionEngine
-from app.ai.ai_explainer import AIExplainer, AIInsightsGenerator
+from app.core.analytics import WindowedAggregator
+from app.core.decision_store import DecisionStore
+from app.core.history import DecisionHistory
+from app.ai.ai_explainer import MAX_BATCH_TIMEOUT, AIExplainer, AIInsightsGenerator
+from app.ai.llm_client import get_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,22 +24,50 @@ class AIEnhancedDecisionEngine:
         self,
         config: Dict[str, Any],
         enable_ai: bool = True,
-        model: str = "llama3.2"
+        model: str = "llama3.2",
+        history_size: Optional[int] = None
     ):
-        """Initialize the AI-enhanced decision engine."""
+        """
+        Initialize the AI-enhanced decision engine.
+
+        `history_size` caps how many recent decisions are retained for
+        summaries (defaults to `history_retention` in the config, or 10,000).
+        """
         self.base_engine = DecisionEngine(config)
         self.enable_ai = enable_ai
         
         if enable_ai:
             try:
-                self.explainer = AIExplainer(model=model)
-                self.insights_generator = AIInsightsGenerator(model=model)
+                # One shared pool/circuit for every LLM caller; optional
+                # `llm:` section in the YAML config (host, timeouts, pool size)
+                llm_config = dict(config.get('llm') or {})
+                timeout = llm_config.pop('call_timeout', None)
+                batch_timeout = llm_config.pop('batch_timeout', MAX_BATCH_TIMEOUT)
+                self.llm_client = get_client(**llm_config)
+                self.explainer = AIExplainer(
+                    model=model, client=self.llm_client, timeout=timeout,
+                    max_batch_timeout=batch_timeout
+                )
+                self.insights_generator = AIInsightsGenerator(
+                    model=model, client=self.llm_client, timeout=timeout
+                )
                 logger.info(f"AI features enabled with model: {model}")
             except Exception as e:
                 logger.warning(f"Failed to initialize AI: {e}. Falling back to base engine.")
                 self.enable_ai = False
         
-        self.decision_history = []
+        self.decision_history = DecisionHistory(
+            history_size or config.get('history_retention', 10_000)
+        )
+        self.analytics = WindowedAggregator()
+        # Indexed store behind NLQueryInterface (":memory:" unless configured),
+        # capped at `decision_store_max_rows` rows (default: the history capacity)
+        # and `decision_store_max_age` seconds
+        self.decision_store = DecisionStore(
+            config.get('decision_store_path', ':memory:'),
+            max_rows=config.get('decision_store_max_rows', self.decision_history.capacity),
+            max_age=config.get('decision_store_max_age')
+        )
     
     def decide_with_explanation(
         self,
@@ -53,8 +85,15 @@ class AIEnhancedDecisionEngine:
             'inputs': inputs
         }
         
-        # Add to history
-        self.decision_history.append(result.copy())
+        # Add to history, time-windowed analytics and the query store
+        self.decision_history.append_result(decision, inputs)
+        self.decision_store.insert_result(decision, inputs)
+        self.analytics.record(
+            decision['decision'],
+            expected_value=decision.get('expected_value', 0.0),
+            churn_probability=inputs.get('churn_probability', inputs.get('churn', 0.0)),
+            anomaly_score=inputs.get('anomaly_score', 0.0)
+        )
         
         # Generate AI enhancements if enabled
         if self.enable_ai:
@@ -121,35 +160,61 @@ class AIEnhancedDecisionEngine:
         user_inputs: List[Dict[str, Any]],
         include_explanations: bool = True
     ) -> List[Dict[str, Any]]:
-        """Process multiple users and generate decisions with explanations."""
-        results = []
+        """
+        Process multiple users and generate decisions with explanations.
+
+        Explanations are generated in packed batches (one LLM call per
+        batch, see AIExplainer.explain_decisions_batch) after all decisions
+        are made.
+        """
+        results = [
+            self.decide_with_explanation(inputs, return_explanation=False)
+            for inputs in user_inputs
+        ]
         
-        for inputs in user_inputs:
-            result = self.decide_with_explanation(
-                inputs,
-                return_explanation=include_explanations
-            )
-            results.append(result)
+        if self.enable_ai and include_explanations and results:
+            try:
+                explanations = self.explainer.explain_decisions_batch(
+                    [result['decision'] for result in results],
+                    [result['inputs'] for result in results]
+                )
+                for result, explanation in zip(results, explanations):
+                    result['explanation'] = explanation
+            except Exception as e:
+                logger.error(f"AI enhancement failed: {e}")
+                for result in results:
+                    result['ai_error'] = str(e)
         
         return results
     
     def get_strategic_insights(
         self,
         time_period: str = "recent activity",
-        min_decisions: int = 10
+        min_decisions: int = 10,
+        window_seconds: Optional[float] = None
     ) -> Optional[Dict[str, Any]]:
-        """Generate strategic insights from decision history."""
+        """
+        Generate strategic insights from decision history.
+
+        With `window_seconds`, statistics cover only that trailing window
+        (merged from time buckets); otherwise the whole retained history.
+        """
         if not self.enable_ai:
             logger.warning("AI features not enabled")
             return None
         
-        if len(self.decision_history) < min_decisions:
-            logger.warning(f"Insufficient history: {len(self.decision_history)} < {min_decisions}")
+        if window_seconds is not None:
+            stats = self.analytics.query(window_seconds=window_seconds)
+        else:
+            stats = self.decision_history.summary()
+        
+        if stats['total_decisions'] < min_decisions:
+            logger.warning(f"Insufficient history: {stats['total_decisions']} < {min_decisions}")
             return None
         
         try:
             insights = self.insights_generator.analyze_decision_patterns(
-                self.decision_history,
+                stats,
                 time_period=time_period
             )
             return insights
@@ -173,26 +238,23 @@ class AIEnhancedDecisionEngine:
         else:
             return {"discount": "15%", "duration": "2 months"}
     
+    def get_windowed_analytics(self, window_seconds: float = 3600) -> Dict[str, Any]:
+        """Decision statistics for the trailing `window_seconds`."""
+        return self.analytics.query(window_seconds=window_seconds)
+    
     def get_decision_history_summary(self) -> Dict[str, Any]:
-        """Get summary statistics."""
-        if not self.decision_history:
+        """Get summary statistics (O(1), over the retained history)."""
+        if not len(self.decision_history):
             return {"message": "No decision history available"}
         
-        decision_counts = {}
-        total_value = 0
-        
-        for record in self.decision_history:
-            decision = record['decision']['decision']
-            decision_counts[decision] = decision_counts.get(decision, 0) + 1
-            total_value += record['decision'].get('expected_value', 0)
-        
-        return {
-            "total_decisions": len(self.decision_history),
-            "decision_breakdown": decision_counts,
-            "total_expected_value": total_value,
-            "average_value": total_value / len(self.decision_history)
-        }
+        return self.decision_history.summary()
     
     def clear_history(self):
-        """Clear decision history."""
-        self.decision_history = []
\ No newline at end of file
+        """Clear decision history, windowed analytics and the query store."""
+        self.decision_history.clear()
+        self.analytics = WindowedAggregator()
+        self.decision_store.clear()
+    
+    def close(self):
+        """Commit and close the decision store (call on shutdown)."""
+        self.decision_store.close()
\ No newline at end of file
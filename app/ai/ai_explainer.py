@@ -2,8 +2,38 @@
 AI-powered decision explainer using Ollama (FREE local AI).
 """
 
-from typing import Dict, Any, List
-import ollama
+import logging
+import re
+from typing import Dict, Any, List, Optional
+from app.ai.llm_client import OllamaClient, get_client
+
+logger = logging.getLogger(__name__)
+
+# Ollama's context window when the model does not set num_ctx
+DEFAULT_CONTEXT_LENGTH = 2048
+# Rough prompt-size estimate; good enough for packing, not for billing
+CHARS_PER_TOKEN = 4
+# Reserved output per item (2-3 sentences plus its label)
+OUTPUT_TOKENS_PER_ITEM = 120
+# Past this, small local models start skipping or merging items
+MAX_BATCH_SIZE = 16
+# Extra seconds per batched item on top of the single-call timeout (~120 tokens)
+BATCH_SECONDS_PER_ITEM = 10.0
+# Hard ceiling for one batched call, so a stuck generation cannot hold a pooled connection for long
+MAX_BATCH_TIMEOUT = 180.0
+
+BATCH_INSTRUCTIONS = """Explain each of the following business decisions in clear, simple language.
+
+For every decision, write a 2-3 sentence explanation that states what action to take, explains why this maximizes business value, and mentions key risk factors.
+
+Answer with one section per decision, in the same order. Start each section on a new line with its label, exactly like this:
+EXPLANATION 1: <explanation of decision 1>
+EXPLANATION 2: <explanation of decision 2>
+
+Do not add any other text."""
+
+# "EXPLANATION 3:", "**Explanation 3:**", "### EXPLANATION 3 -", ...
+_SECTION_LABEL = re.compile(r"^[#*\s]*EXPLANATION\s*#?\s*(\d+)\s*[*]*\s*[:.)\-]?[*]*\s*(.*)$", re.IGNORECASE)
 
 
 class AIExplainer:
@@ -11,15 +41,25 @@ class AIExplainer:
     Uses Ollama local AI to generate explanations for decisions.
     """
     
-    def __init__(self, model: str = "llama3.2"):
+    def __init__(
+        self,
+        model: str = "llama3.2",
+        client: Optional[OllamaClient] = None,
+        timeout: Optional[float] = None,
+        max_batch_timeout: float = MAX_BATCH_TIMEOUT
+    ):
         """Initialize the AI explainer with Ollama model."""
         self.model = model
-        # Test connection
-        try:
-            ollama.list()
+        self.client = client or get_client()
+        self.timeout = timeout
+        self.max_batch_timeout = max_batch_timeout
+        self._context_length: Optional[int] = None
+        self.batch_stats = {'batches': 0, 'items': 0, 'fallbacks': 0, 'failed_batches': 0}
+        # Cached health state (refreshed in the background by the client)
+        if self.client.is_healthy():
             print(f"✓ Connected to Ollama with model: {model}")
-        except Exception as e:
-            print(f"⚠️  Ollama not running: {e}")
+        else:
+            print(f"⚠️  Ollama not running at {self.client.host}:{self.client.port}")
             print("Run: ollama serve")
     
     def explain_decision(
@@ -32,14 +72,134 @@ class AIExplainer:
         prompt = self._build_explanation_prompt(decision, inputs, user_context)
         
         try:
-            response = ollama.chat(
+            response = self.client.chat(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                timeout=self.timeout
             )
             return response['message']['content']
         except Exception as e:
             return f"Error generating explanation: {e}"
     
+    def explain_decisions_batch(
+        self,
+        decisions: List[Dict[str, Any]],
+        inputs: List[Dict[str, Any]],
+        user_contexts: Optional[List[Dict[str, Any]]] = None,
+        batch_size: Optional[int] = None
+    ) -> List[str]:
+        """
+        Explain many decisions with one LLM call per batch.
+
+        The instructions are sent once per batch instead of once per
+        decision, followed by numbered decision sections. Batches are sized
+        to fit the model's context window (prompt plus expected answer),
+        capped at `batch_size` / MAX_BATCH_SIZE. Each call gets the
+        single-item timeout per item and at most OUTPUT_TOKENS_PER_ITEM
+        output tokens per item. Items missing from an answer fall back to
+        explain_decision() one at a time. If the call itself fails (timeout,
+        server down), its items get an error message instead: N more calls
+        to the same struggling server would only multiply the wait.
+
+        Returns explanations in input order.
+        """
+        if len(decisions) != len(inputs):
+            raise ValueError("decisions and inputs must have the same length")
+        contexts = user_contexts or [None] * len(decisions)
+        blocks = [
+            self._format_decision(decision, item_inputs, context)
+            for decision, item_inputs, context in zip(decisions, inputs, contexts)
+        ]
+        
+        explanations: List[Optional[str]] = [None] * len(decisions)
+        for batch in self._plan_batches(blocks, batch_size):
+            if len(batch) > 1:
+                self.batch_stats['batches'] += 1
+                self.batch_stats['items'] += len(batch)
+                try:
+                    parsed = self._explain_batch([blocks[i] for i in batch])
+                except Exception as e:
+                    logger.warning(f"Batch explanation of {len(batch)} decisions failed: {e}")
+                    self.batch_stats['failed_batches'] += 1
+                    for i in batch:
+                        explanations[i] = f"Error generating explanation: {e}"
+                    continue
+                for position, i in enumerate(batch, start=1):
+                    explanations[i] = parsed.get(position)
+            
+            for i in batch:
+                if not explanations[i]:
+                    if len(batch) > 1:
+                        self.batch_stats['fallbacks'] += 1
+                    explanations[i] = self.explain_decision(decisions[i], inputs[i], contexts[i])
+        return explanations
+    
+    def _explain_batch(self, blocks: List[str]) -> Dict[int, str]:
+        """One call for a packed batch → {item number: explanation} (raises on failure)."""
+        sections = "\n\n".join(
+            f"DECISION {number}:\n{block}" for number, block in enumerate(blocks, start=1)
+        )
+        prompt = f"{BATCH_INSTRUCTIONS}\n\n{sections}"
+        # Generation time grows with the answer: a per-item allowance on top of the
+        # single-call timeout, capped (but never below the single-call timeout)
+        base = self.timeout or self.client.request_timeout
+        timeout = min(base + BATCH_SECONDS_PER_ITEM * len(blocks), max(base, self.max_batch_timeout))
+        response = self.client.chat(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=timeout,
+            options={"num_predict": OUTPUT_TOKENS_PER_ITEM * len(blocks)}
+        )
+        return self._parse_numbered_response(response['message']['content'], len(blocks))
+    
+    def _plan_batches(self, blocks: List[str], batch_size: Optional[int] = None) -> List[List[int]]:
+        """Greedily pack item indices into batches that fit the context window."""
+        limit = min(batch_size or MAX_BATCH_SIZE, MAX_BATCH_SIZE)
+        budget = self.context_length() - self._estimate_tokens(BATCH_INSTRUCTIONS)
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = 0
+        for i, block in enumerate(blocks):
+            cost = self._estimate_tokens(block) + OUTPUT_TOKENS_PER_ITEM
+            if current and (len(current) >= limit or used + cost > budget):
+                batches.append(current)
+                current, used = [], 0
+            current.append(i)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+    
+    def context_length(self) -> int:
+        """
+        Tokens the served model can take per call (looked up once).
+
+        Ollama runs a model with its `num_ctx` parameter if it has one,
+        else with DEFAULT_CONTEXT_LENGTH, never more than the model's
+        trained context length.
+        """
+        if self._context_length is None:
+            length = DEFAULT_CONTEXT_LENGTH
+            try:
+                info = self.client.show(self.model, timeout=self.timeout)
+                match = re.search(r"^\s*num_ctx\s+(\d+)", info.get('parameters') or '', re.MULTILINE)
+                if match:
+                    length = int(match.group(1))
+                trained = [
+                    value for key, value in (info.get('model_info') or {}).items()
+                    if key.endswith('.context_length')
+                ]
+                if trained:
+                    length = min(length, int(trained[0]))
+            except Exception:
+                return length  # server unavailable: use the default, look again next time
+            self._context_length = length
+        return self._context_length
+    
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        return len(text) // CHARS_PER_TOKEN + 1
+    
     def explain_intervention_recommendation(
         self,
         decision: Dict[str, Any],
@@ -64,9 +224,10 @@ RATIONALE: [Why this decision maximizes value]
 SUGGESTED_ACTIONS: [3-4 specific actions to take]"""
 
         try:
-            response = ollama.chat(
+            response = self.client.chat(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                timeout=self.timeout
             )
             response_text = response['message']['content']
             return self._parse_structured_response(response_text)
@@ -101,9 +262,10 @@ Write a warm, concise message (2-3 sentences) that:
 Write a complete, ready-to-send message."""
 
         try:
-            response = ollama.chat(
+            response = self.client.chat(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                timeout=self.timeout
             )
             return response['message']['content'].strip()
         except Exception as e:
@@ -116,18 +278,9 @@ Write a complete, ready-to-send message."""
         user_context: Dict[str, Any] = None
     ) -> str:
         """Build a prompt for decision explanation."""
-        context_str = ""
-        if user_context:
-            context_str = f"\n\nAdditional Context:\n{self._format_dict(user_context)}"
-        
         prompt = f"""Explain the following business decision in clear, simple language:
 
-Decision Made: {decision['decision']}
-Reason: {decision['reason']}
-Expected Value: ${decision.get('expected_value', 0):.2f}
-
-Input Metrics:
-{self._format_dict(inputs)}{context_str}
+{self._format_decision(decision, inputs, user_context)}
 
 Provide a 2-3 sentence explanation that:
 1. States what action to take
@@ -137,6 +290,24 @@ Provide a 2-3 sentence explanation that:
 Keep it concise and actionable."""
         return prompt
     
+    def _format_decision(
+        self,
+        decision: Dict[str, Any],
+        inputs: Dict[str, Any],
+        user_context: Dict[str, Any] = None
+    ) -> str:
+        """Decision, metrics and optional context block shared by single and batched prompts."""
+        context_str = ""
+        if user_context:
+            context_str = f"\n\nAdditional Context:\n{self._format_dict(user_context)}"
+        
+        return f"""Decision Made: {decision['decision']}
+Reason: {decision['reason']}
+Expected Value: ${decision.get('expected_value', 0):.2f}
+
+Input Metrics:
+{self._format_dict(inputs)}{context_str}"""
+    
     def _format_dict(self, data: Dict[str, Any]) -> str:
         """Format a dictionary for display in prompts."""
         lines = []
@@ -169,34 +340,73 @@ Keep it concise and actionable."""
                 parts[current_section] += ' ' + line
         
         return parts
+    
+    def _parse_numbered_response(self, response: str, count: int) -> Dict[int, str]:
+        """
+        Parse "EXPLANATION n:" sections into {n: text}.
+
+        Tolerates markdown decoration around labels and text on the lines
+        after a label. Numbers outside 1..count and repeated labels are
+        ignored, and empty sections are dropped, so the caller can retry
+        exactly the items that are missing.
+        """
+        parts: Dict[int, str] = {}
+        current_section = None
+        lines = response.split('\n')
+        
+        for line in lines:
+            line = line.strip()
+            match = _SECTION_LABEL.match(line)
+            if match:
+                number = int(match.group(1))
+                current_section = number if 1 <= number <= count and number not in parts else None
+                if current_section is not None:
+                    parts[current_section] = match.group(2).strip()
+            elif current_section is not None and line:
+                parts[current_section] = (parts[current_section] + ' ' + line).strip()
+        
+        return {number: text for number, text in parts.items() if text}
 
 
 class AIInsightsGenerator:
     """Generates strategic insights from decision patterns using AI."""
     
-    def __init__(self, model: str = "llama3.2"):
+    def __init__(
+        self,
+        model: str = "llama3.2",
+        client: Optional[OllamaClient] = None,
+        timeout: Optional[float] = None
+    ):
         self.model = model
+        self.client = client or get_client()
+        self.timeout = timeout
     
     def analyze_decision_patterns(
         self,
-        decision_history: List[Dict[str, Any]],
+        stats: Dict[str, Any],
         time_period: str = "recent activity"
     ) -> Dict[str, Any]:
-        """Analyze patterns in decision-making and provide strategic insights."""
-        total_decisions = len(decision_history)
-        decision_counts = {}
-        total_expected_value = 0
-        
-        for record in decision_history:
-            decision = record['decision']['decision']
-            decision_counts[decision] = decision_counts.get(decision, 0) + 1
-            total_expected_value += record['decision'].get('expected_value', 0)
+        """
+        Analyze patterns in decision-making and provide strategic insights.
+
+        `stats` is a DecisionHistory.summary() or WindowedAggregator.query()
+        result; score histograms are included in the prompt when present.
+        """
+        total_decisions = stats['total_decisions']
+        decision_counts = stats['decision_breakdown']
+        total_expected_value = stats['total_expected_value']
         
         stats_summary = f"""Decision Statistics for {time_period}:
 - Total Decisions: {total_decisions}
 - Decision Breakdown: {decision_counts}
 - Total Expected Value: ${total_expected_value:.2f}
 - Average Value per Decision: ${total_expected_value / max(total_decisions, 1):.2f}"""
+        if 'anomaly_histogram' in stats:
+            stats_summary += f"""
+- Intervention Rate: {stats['intervention_rate'] * 100:.1f}%
+- Flag Rate: {stats['flag_rate'] * 100:.1f}%
+- Churn Probability Histogram (10 bins, 0→1): {stats['churn_histogram']}
+- Anomaly Score Histogram (10 bins, 0→1): {stats['anomaly_histogram']}"""
 
         prompt = f"""Analyze these decision-making patterns and provide strategic insights:
 
@@ -211,9 +421,10 @@ Provide:
 Be specific and actionable."""
 
         try:
-            response = ollama.chat(
+            response = self.client.chat(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                timeout=self.timeout
             )
             
             return {
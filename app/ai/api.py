@@ -6,8 +6,28 @@ FastAPI application exposing decision engine as a real-time REST service.
 Endpoints:
   GET  /health             — service health check
   POST /api/v1/decide      — make a single decision
-  POST /api/v1/decide/batch — make decisions for multiple users
-  GET  /api/v1/metrics     — model evaluation metrics + latency profile
+  POST /api/v1/decide/batch — make decisions for multiple users (optional campaign budget)
+  POST /api/v1/decide/binary — batch decisions in the fixed-width binary protocol
+  WS   /api/v1/decide/stream — persistent pipelined decisions (JSON or binary frames)
+  GET  /api/v1/metrics     — model evaluation metrics + measured latency profile
+  GET  /api/v1/analytics   — decision statistics over a trailing time window
+  GET  /api/v1/experiments — per-variant A/B and shadow model statistics
+  GET  /api/v1/rules       — configured decision rules with hit counts and timings
+  GET  /metrics            — Prometheus text exposition (latency histograms, counters)
+  GET  /api/v1/admin/profile — collapsed stacks from the sampling profiler (opt-in)
+  DELETE /api/v1/admin/profile — reset profiler samples
+  GET  /api/v1/anomaly/drift — streaming anomaly refresh history and score drift (opt-in)
+  POST /api/v1/admin/anomaly/refresh — run a rolling tree refresh now
+  GET  /api/v1/admin/models — registered model versions and the active one
+  POST /api/v1/admin/models/activate — prewarm a registered version and switch to it
+  GET  /api/v1/drift       — live feature drift (PSI / KS) vs the training snapshot
+
+Profiling: set `profiling.enabled: true` in config, then send
+`X-Profile: 1` on a decide request (or set `profiling.sample_rate`).
+
+Admission control: set `admission_control.enabled: true` to cap concurrent
+decide requests, shed overload with 503 + Retry-After, honour a per-request
+`X-Request-Timeout-Ms` deadline and degrade scoring when the queue is long.
 
 Run locally:
     uvicorn app.ai.api:app --reload --port 8000
@@ -16,16 +36,41 @@ Interactive docs:
     http://localhost:8000/docs
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from typing import Optional
-import pandas as pd
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, Optional, Union
+import asyncio
+import functools
+import json
+import struct
+import threading
 import time
 
+import numpy as np
+
+from app.ai.admission import DEGRADED_REASON, AdmissionController, is_degraded, remaining_ms
+from app.ai.binary_protocol import (
+    MEDIA_TYPE, REQUEST_DTYPE, RESPONSE_DTYPE, decode_requests, encode_error, encode_responses, request_dtype,
+)
+from app.ai.experiments import ExperimentRouter, ModelVariant
+from app.ai.stream import MicroBatcher
+from app.ai.middleware import AdmissionControlMiddleware, MetricsMiddleware
 from app.config_loader import load_config
+from app.core.analytics import WindowedAggregator
+from app.core.budget import BUDGET_REASON, allocate_budget, summarize
 from app.core.decision_engine import DecisionEngine
+from app.core.decision_log import DecisionLogWriter, config_version
+from app.core.metrics import MetricsRegistry, default_registry
+from app.core.profiling import SamplingProfiler
+from app.core.rate_tracker import RequestRateTracker
+from app.core.records import DecisionCode, DecisionRecord
 from app.ml.churn_model import ChurnModel
 from app.ml.anomaly_model import AnomalyModel
+from app.ml.drift import DriftMonitor
+from app.ml.registry import ModelRegistry
+from app.ml.streaming_anomaly import StreamingAnomalyRefresher
 
 # ---------------------------------------------------------------------------
 # App setup
@@ -39,6 +84,10 @@ app = FastAPI(
     ),
     version="2.0.0",
 )
+# Disabled until configured at startup; added first so metrics wrap it
+_admission = AdmissionController()
+app.add_middleware(AdmissionControlMiddleware, controller=_admission)
+app.add_middleware(MetricsMiddleware, metrics=default_registry)
 
 # ---------------------------------------------------------------------------
 # Global model state (initialized at startup)
@@ -47,19 +96,32 @@ app = FastAPI(
 _engine: Optional[DecisionEngine] = None
 _churn_model: Optional[ChurnModel] = None
 _anomaly_model: Optional[AnomalyModel] = None
+_analytics = WindowedAggregator()
+_decision_log: Optional[DecisionLogWriter] = None
+_router: Optional[ExperimentRouter] = None
+_profiler: Optional[SamplingProfiler] = None
+_rate_tracker: Optional[RequestRateTracker] = None
+_track_anonymous = False  # count requests without a user_id per client address (opt-in)
+_anomaly_refresher: Optional[StreamingAnomalyRefresher] = None
+_drift_monitor: Optional[DriftMonitor] = None
+_stream_settings: dict = {}
+_registry: Optional[ModelRegistry] = None
+_degraded_mode: Optional[str] = None
+_request_dtype = REQUEST_DTYPE
+_activation_lock = threading.Lock()
+_started_at = time.time()
 
+# Request-path stage timers (the engine records security_gate / roi / audit)
+_stage = {
+    name: default_registry.histogram(DecisionEngine.STAGE_METRIC, stage=name)
+    for name in ("rate_tracking", "feature_engineering", "churn_scoring", "anomaly_scoring", "recording", "serialization")
+}
 
-@app.on_event("startup")
-def startup_event():
-    """Train models on startup using default simulation data."""
-    global _engine, _churn_model, _anomaly_model
 
-    config = load_config("configs/ecommerce.yaml")
-
-    _churn_model = ChurnModel()
-    _anomaly_model = AnomalyModel()
+def _training_data():
+    """Default simulation training data (churn, anomaly)."""
+    import pandas as pd
 
-    # Simulation training data
     churn_data = pd.DataFrame({
         "tenure": [1, 5, 10, 2, 7, 3, 8, 1, 6, 4],
         "monthly_charges": [200, 150, 100, 220, 130, 210, 120, 195, 145, 175],
@@ -69,14 +131,194 @@ def startup_event():
         "request_count_today": [1, 2, 1, 10, 2, 1, 15, 1, 3, 1],
         "login_attempts": [1, 1, 1, 7, 1, 1, 10, 1, 2, 1],
     })
+    return churn_data, anomaly_data
+
+
+def _train_models(churn_params: Optional[dict] = None, anomaly_params: Optional[dict] = None):
+    """Train a churn/anomaly model pair on the default simulation data."""
+    churn_model = ChurnModel(**(churn_params or {}))
+    anomaly_model = AnomalyModel(**(anomaly_params or {}))
+
+    churn_data, anomaly_data = _training_data()
+    churn_model.train(churn_data, target="churn")
+    anomaly_model.train(anomaly_data)
+    return churn_model, anomaly_model
+
+
+def _load_primary(config: dict):
+    """
+    Primary (churn_model, anomaly_model, version).
+
+    With `model_registry.path` the models come from the registry: the
+    configured version, else the pinned one, else the latest. An empty
+    registry is seeded with the default models, pinned as its first
+    version. Without a registry the models are trained here and versioned
+    "startup".
+    """
+    global _registry
+
+    settings = config.get("model_registry") or {}
+    if not settings.get("path"):
+        return (*_train_models(), "startup")
+
+    _registry = ModelRegistry(settings["path"])
+    version = _registry.resolve(settings.get("version"))
+    if version is None:
+        churn_model, anomaly_model = _train_models()
+        churn_data, anomaly_data = _training_data()
+        version = _registry.register(
+            churn_model, anomaly_model, churn_data=churn_data, anomaly_data=anomaly_data,
+            note="default simulation data",
+        )
+        _registry.pin(version)
+    churn_model, anomaly_model, _ = _registry.load(version)
+    return churn_model, anomaly_model, version
+
+
+def _build_refresher(config: dict, anomaly_model: AnomalyModel) -> Optional[StreamingAnomalyRefresher]:
+    """Opt-in rolling tree replacement for the primary anomaly model."""
+    streaming = config.get("anomaly_streaming") or {}
+    if not streaming.get("enabled"):
+        return None
+    return StreamingAnomalyRefresher(
+        anomaly_model,
+        reservoir_size=streaming.get("reservoir_size", 10_000),
+        refresh_every=streaming.get("refresh_every", 5_000),
+        refresh_interval=streaming.get("refresh_interval_s", 300.0),
+        trees_per_refresh=streaming.get("trees_per_refresh", 10),
+        flag_threshold=config.get("anomaly_threshold", 0.95),
+    )
+
+
+def _build_drift_monitor(config: dict, churn_model: ChurnModel, anomaly_model: AnomalyModel) -> Optional[DriftMonitor]:
+    """Live feature distributions vs the primary models' training snapshot (on by default)."""
+    drift = config.get("drift_monitoring") or {}
+    if not drift.get("enabled", True):
+        return None
+    profiles = {}
+    for model in (churn_model, anomaly_model):
+        # Raw request features only; engineered ones follow from them
+        profiles.update({
+            name: profile for name, profile in model.preprocessor.training_profile.items()
+            if name in UserFeatures.model_fields
+        })
+    return DriftMonitor(
+        profiles,
+        window=drift.get("window", 100_000),
+        flush_every=drift.get("flush_every", 256),
+        min_rows=drift.get("min_rows", 500),
+        metrics=default_registry,
+    )
+
 
-    _churn_model.train(churn_data, target="churn")
-    _anomaly_model.train(anomaly_data)
+@app.on_event("startup")
+def startup_event():
+    """Train models on startup using default simulation data."""
+    global _engine, _churn_model, _anomaly_model, _decision_log, _router, _profiler, _rate_tracker, _track_anonymous, _anomaly_refresher, _drift_monitor, _stream_settings, _degraded_mode, _request_dtype, _started_at
+
+    config = load_config("configs/ecommerce.yaml")
+    if config.get("decision_log_path"):
+        _decision_log = DecisionLogWriter(
+            config["decision_log_path"], config_version=config_version(config)
+        )
+
+    # Opt-in request profiler; None (zero cost) unless enabled in config
+    profiling = config.get("profiling") or {}
+    if profiling.get("enabled"):
+        _profiler = SamplingProfiler(
+            sample_rate=profiling.get("sample_rate", 0.0),
+            interval=profiling.get("interval_ms", 1.0) / 1000,
+            max_stacks=profiling.get("max_stacks", 5000),
+            allow_header=profiling.get("allow_header", False),
+        )
+
+    # Per-user request counts; anonymous requests only with `anonymous: client`
+    rate_tracking = config.get("rate_tracking") or {}
+    if rate_tracking.get("enabled", True):
+        _rate_tracker = RequestRateTracker(
+            shards=rate_tracking.get("shards", 16),
+            max_users=rate_tracking.get("max_users", 100_000),
+            idle_seconds=rate_tracking.get("idle_seconds", 86_400),
+        )
+    _track_anonymous = rate_tracking.get("anonymous", "off") == "client"
+
+    _churn_model, _anomaly_model, version = _load_primary(config)
     _engine = DecisionEngine(config)
+    _anomaly_refresher = _build_refresher(config, _anomaly_model)
+    if _anomaly_refresher is not None:
+        _anomaly_refresher.start()
+    _drift_monitor = _build_drift_monitor(config, _churn_model, _anomaly_model)
+    default_registry.gauge("model_info", version=version).set(1)
+
+    # Tenant attribute columns appended to binary request records (for decision rules)
+    _request_dtype = request_dtype((config.get("binary_protocol") or {}).get("attributes"))
+
+    # Per-connection batching for /api/v1/decide/stream
+    stream = config.get("decision_stream") or {}
+    _stream_settings = {
+        "max_batch": stream.get("max_batch", 256),
+        "max_wait_ms": stream.get("max_wait_ms", 0.0),
+        "max_inflight": stream.get("max_inflight", 4),
+        "max_pending": stream.get("max_pending", 4096),
+    }
+
+    # Opt-in concurrency limit, deadlines and load shedding for the decide endpoints
+    admission = config.get("admission_control") or {}
+    if admission.get("enabled"):
+        _degraded_mode = admission.get("degraded_mode")
+        if _degraded_mode not in (None, "skip_anomaly", "default"):
+            raise ValueError(f"admission_control.degraded_mode must be skip_anomaly or default, got {_degraded_mode!r}")
+        _admission.configure(
+            max_concurrency=admission.get("max_concurrency", 32),
+            max_queue=admission.get("max_queue", 64),
+            default_timeout_ms=admission.get("default_timeout_ms"),
+            degrade_queue_depth=admission.get("degrade_queue_depth") if _degraded_mode else None,
+            metrics=default_registry,
+        )
 
+    # Challenger / shadow model sets from the `experiments:` config section
+    experiments = config.get("experiments") or {}
+    variants = []
+    for spec in experiments.get("variants") or []:
+        if spec.get("version") and _registry is not None:
+            # Challenger pinned to a registered version instead of startup training
+            churn_model, anomaly_model, _ = _registry.load(spec["version"])
+        else:
+            churn_model, anomaly_model = _train_models(spec.get("churn"), spec.get("anomaly"))
+        variants.append(ModelVariant(
+            name=spec["name"],
+            churn_model=churn_model,
+            anomaly_model=anomaly_model,
+            mode=spec.get("mode", "shadow"),
+            traffic=spec.get("traffic", 0.0),
+            version=spec.get("version") or spec["name"],
+        ))
+    _router = ExperimentRouter(
+        ModelVariant("primary", _churn_model, _anomaly_model, version=version),
+        variants,
+        # Private registry so shadow scoring does not count as served traffic
+        engine=DecisionEngine(config, metrics=MetricsRegistry()),
+        salt=str(experiments.get("salt", "")),
+        shadow_workers=experiments.get("shadow_workers", 2),
+    )
+
+    _started_at = time.time()
     print("[DecisionForge] Models trained and engine ready.")
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """Flush buffered decision log records and stop background threads."""
+    if _decision_log is not None:
+        _decision_log.close()
+    if _router is not None:
+        _router.shutdown()
+    if _profiler is not None:
+        _profiler.stop()
+    if _anomaly_refresher is not None:
+        _anomaly_refresher.stop()
+
+
 # ---------------------------------------------------------------------------
 # Request / Response schemas
 # ---------------------------------------------------------------------------
@@ -91,6 +333,15 @@ class UserFeatures(BaseModel):
 class DecisionRequest(BaseModel):
     user_id: Optional[str] = Field(None, description="Optional user identifier for audit logging")
     features: UserFeatures
+    attributes: Dict[str, Union[bool, int, float, str]] = Field(
+        default_factory=dict,
+        description="Tenant fields for decision rules (e.g. segment, days_since_last_incentive)",
+        example={"segment": "smb"},
+    )
+
+
+class StreamDecisionRequest(DecisionRequest):
+    id: Union[int, str] = Field(..., description="Client correlation id, echoed on the response")
 
 
 class DecisionResponse(BaseModel):
@@ -101,16 +352,32 @@ class DecisionResponse(BaseModel):
     churn_probability: float
     anomaly_score: float
     latency_ms: float
+    variant: str = Field("primary", description="Model set that served this decision")
+    model_version: str = Field("", description="Model version that produced the scores")
+    degraded: bool = Field(False, description="Served on the cheaper degraded path under load")
 
 
 class BatchDecisionRequest(BaseModel):
     users: list[DecisionRequest]
+    budget: Optional[float] = Field(
+        None, ge=0, description="Campaign incentive budget; fund the highest-value interventions that fit"
+    )
+
+
+class BatchDecisionResponse(BaseModel):
+    decisions: list[DecisionResponse]
+    count: int
+    budget: Optional[dict] = Field(None, description="Spend / value summary when a budget was given")
 
 
 class MetricsResponse(BaseModel):
     churn_model_metrics: dict
     anomaly_model_metrics: dict
     latency_profile: dict
+    throughput: dict
+    rate_tracking: Optional[dict] = Field(None, description="Per-user request tracker occupancy and evictions")
+    model_version: Optional[str] = Field(None, description="Active primary model version")
+    admission: Optional[dict] = Field(None, description="Admission control occupancy, shed and degraded counts")
 
 
 # ---------------------------------------------------------------------------
@@ -128,11 +395,16 @@ def health_check():
         "status": "healthy",
         "models_loaded": _engine is not None,
         "version": "2.0.0",
+        "model_version": _router.primary.served_version if _router is not None else None,
     }
 
 
 @app.post("/api/v1/decide", response_model=DecisionResponse, tags=["Decision"])
-def make_decision(request: DecisionRequest):
+def make_decision(
+    request: DecisionRequest,
+    http_request: Request,
+    x_profile: Optional[str] = Header(None, description="Set to 1 to profile this request (if enabled)"),
+):
     """
     Make a single real-time decision for one user.
 
@@ -144,54 +416,553 @@ def make_decision(request: DecisionRequest):
     if _engine is None:
         raise HTTPException(status_code=503, detail="Models not yet initialized.")
 
+    client = _client_host(http_request)
+    if _profiler is not None and _profiler.should_sample(x_profile):
+        with _profiler.profile():
+            return _respond(_decide_one(request, client))
+    return _respond(_decide_one(request, client))
+
+
+def _respond(model: BaseModel) -> Response:
+    """Serialize a response model to JSON, timing the serialization stage."""
+    with _stage["serialization"].time():
+        body = model.model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
+def _decide_one(request: DecisionRequest, client: Optional[str] = None) -> DecisionResponse:
+    """Score, decide and record one request, timing each pipeline stage."""
+    return _record_one(request, *_score_one(request, client))
+
+
+def _degrade() -> Optional[str]:
+    """
+    Degraded mode for the current request, or None for full scoring.
+
+    A request is degraded when admission control flagged it, or when its
+    deadline has already passed (e.g. late users in a large batch).
+    """
+    if _degraded_mode is None:
+        return None
+    remaining = remaining_ms()
+    if is_degraded() or (remaining is not None and remaining <= 0):
+        return _degraded_mode
+    return None
+
+
+# Engine inputs a shadow variant recomputes itself; the rest are passed through from the served decision
+_SHADOW_RESCORED = frozenset(
+    ("churn_probability", "expected_lift", "anomaly_score", "request_count_today", "model_version")
+)
+
+
+def _client_host(connection) -> Optional[str]:
+    """Client address of an HTTP request or WebSocket (None if unknown)."""
+    client = connection.client
+    return client.host if client is not None else None
+
+
+def _rate_key(user_id: Optional[str], client: Optional[str]):
+    """
+    Rate tracker key: the user_id, else the client address (None = not tracked).
+
+    Client keys are opt-in (`rate_tracking.anonymous: client`): one address
+    can front many users (gateways, NAT, batch pipelines).
+    """
+    if user_id is not None:
+        return user_id
+    if client is not None and _track_anonymous:
+        return ("client", client)  # a tuple never collides with a user_id string
+    return None
+
+
+def _score_one(request: DecisionRequest, client: Optional[str] = None) -> tuple:
+    """Featurize, score and decide one request (nothing recorded yet)."""
     f = request.features
+    variant = _router.assign(request.user_id)
+    # Read once, so the response, audit and log agree even if a refresh lands mid-request
+    version = variant.served_version
+    start = time.perf_counter()
+    degrade = _degrade()
 
-    # Run ML models
-    churn_prob = _churn_model.predict_proba({
-        "tenure": f.tenure,
-        "monthly_charges": f.monthly_charges,
-    })
+    # Server-side request accounting; a client can over- but not under-report
+    features = f.model_dump()
+    key = _rate_key(request.user_id, client)
+    if _rate_tracker is not None and key is not None:
+        counts = _rate_tracker.record(key)
+        if request.user_id is not None:
+            # A shared address's daily total is not one user's; it only feeds the burst limits
+            features["request_count_today"] = max(f.request_count_today, counts.per_day)
+        features["requests_last_minute"] = counts.per_minute
+        features["requests_last_hour"] = counts.per_hour
+    if _drift_monitor is not None:
+        _drift_monitor.observe(features)
+    t_rates = time.perf_counter()
+    _stage["rate_tracking"].observe((t_rates - start) * 1000)
+
+    if degrade == "default":
+        # Neutral scores; the request-count limits of the security gate still apply
+        churn_prob = anomaly_score = 0.0
+    else:
+        # Feature engineering + scaling (numpy-only single-row path)
+        churn_X = variant.churn_model.featurize_row({
+            "tenure": f.tenure,
+            "monthly_charges": f.monthly_charges,
+        })
+        t_features = time.perf_counter()
+        _stage["feature_engineering"].observe((t_features - t_rates) * 1000)
+
+        # Run ML models
+        churn_prob = float(variant.churn_model.predict_proba_features(churn_X)[0])
+        t_churn = time.perf_counter()
+        _stage["churn_scoring"].observe((t_churn - t_features) * 1000)
+        anomaly_score = 0.0
+        if degrade is None:
+            anomaly_X = variant.anomaly_model.featurize_row({
+                "request_count_today": features["request_count_today"],
+                "login_attempts": f.login_attempts,
+            })
+            anomaly_score = round(float(variant.anomaly_model.score_features(anomaly_X)[0]), 4)
+            refresher = _anomaly_refresher
+            if refresher is not None and refresher.model is variant.anomaly_model:
+                refresher.observe(anomaly_X)
+            _stage["anomaly_scoring"].observe((time.perf_counter() - t_churn) * 1000)
     expected_lift = churn_prob * 0.3
-    anomaly_score = _anomaly_model.score({
-        "request_count_today": f.request_count_today,
-        "login_attempts": f.login_attempts,
-    })
 
-    # Run decision engine
-    result = _engine.decide({
+    # Run decision engine (records security_gate / roi / audit stages)
+    inputs = {
         "churn_probability": churn_prob,
         "expected_lift": expected_lift,
         "anomaly_score": anomaly_score,
-        "request_count_today": f.request_count_today,
-    })
+        "request_count_today": features["request_count_today"],
+    }
+    if "requests_last_minute" in features:
+        inputs["requests_last_minute"] = features["requests_last_minute"]
+        inputs["requests_last_hour"] = features["requests_last_hour"]
+    if _engine.rule_plan is not None:
+        # Rules may reference tenant attributes and any raw feature (tenure, monthly_charges, ...)
+        inputs = {**request.attributes, **features, **inputs}
+    # Carried into the audit record with the rest of the inputs
+    inputs["model_version"] = version
+    # Audited by _record_one, once the served decision is final (budget, degraded reason)
+    result = _engine.decide(inputs, audit=False)
+    if degrade == "default" and result.code == DecisionCode.DO_NOTHING:
+        result = DecisionRecord(DecisionCode.DO_NOTHING, result.expected_value, result.latency_ms, DEGRADED_REASON)
+    return variant, start, features, churn_prob, expected_lift, anomaly_score, result, degrade is not None, inputs
+
+
+def _record_one(request, variant, start, features, churn_prob, expected_lift, anomaly_score, result, degraded, inputs) -> DecisionResponse:
+    """Audit and record a scored decision (experiments, analytics, decision log) and build its response."""
+    _engine.audit(inputs, result)
+    t_recording = time.perf_counter()
+    _router.record(
+        variant,
+        result.decision,
+        result.expected_value,
+        (t_recording - start) * 1000,
+    )
+    if not degraded:  # no background shadow work while shedding load
+        _router.submit_shadow(features, result.decision, {
+            name: value for name, value in inputs.items() if name not in _SHADOW_RESCORED
+        })
+    _analytics.record(
+        result.decision,
+        expected_value=result.expected_value,
+        churn_probability=churn_prob,
+        anomaly_score=anomaly_score,
+    )
+    if _decision_log is not None:
+        _decision_log.append(
+            features,
+            churn_probability=churn_prob,
+            expected_lift=expected_lift,
+            anomaly_score=anomaly_score,
+            decision=result.code,
+            expected_value=result.expected_value,
+            user_id=request.user_id,
+            model_version=inputs["model_version"],
+        )
+    _stage["recording"].observe((time.perf_counter() - t_recording) * 1000)
 
     return DecisionResponse(
         user_id=request.user_id,
-        decision=result["decision"],
-        reason=result["reason"],
-        expected_value=result.get("expected_value", 0.0),
+        decision=result.decision,
+        reason=result.reason,
+        expected_value=result.expected_value,
         churn_probability=round(churn_prob, 4),
         anomaly_score=round(anomaly_score, 4),
-        latency_ms=result.get("latency_ms", 0.0),
+        latency_ms=result.latency_ms,
+        variant=variant.name,
+        model_version=inputs["model_version"],
+        degraded=degraded,
     )
 
 
-@app.post("/api/v1/decide/batch", tags=["Decision"])
-def make_batch_decisions(request: BatchDecisionRequest):
+@app.post("/api/v1/decide/batch", response_model=BatchDecisionResponse, tags=["Decision"])
+def make_batch_decisions(
+    request: BatchDecisionRequest,
+    http_request: Request,
+    x_profile: Optional[str] = Header(None, description="Set to 1 to profile this request (if enabled)"),
+):
     """
     Process multiple users in one request.
 
     Useful for batch scoring pipelines or A/B test evaluation.
     Returns a list of decisions in the same order as the input users.
+
+    With `budget`, INTERVENE decisions are funded highest expected value
+    first until the budget is spent; the rest are returned (and recorded)
+    as DO_NOTHING with a budget reason.
     """
     if _engine is None:
         raise HTTPException(status_code=503, detail="Models not yet initialized.")
 
-    results = []
-    for user_req in request.users:
-        result = make_decision(user_req)
-        results.append(result)
-    return {"decisions": results, "count": len(results)}
+    client = _client_host(http_request)
+    if _profiler is not None and _profiler.should_sample(x_profile):
+        with _profiler.profile():
+            return _respond(_decide_batch(request, client))
+    return _respond(_decide_batch(request, client))
+
+
+def _decide_batch(request: BatchDecisionRequest, client: Optional[str] = None) -> BatchDecisionResponse:
+    if request.budget is None:
+        results = [_decide_one(user_req, client) for user_req in request.users]
+        return BatchDecisionResponse(decisions=results, count=len(results))
+
+    # Decide everyone first, then fund interventions under the budget before recording
+    scored = [_score_one(user_req, client) for user_req in request.users]
+    records = [s[6] for s in scored]
+    intervene = np.array([r.code == DecisionCode.INTERVENE for r in records], dtype=bool)
+    value = np.array([r.expected_value for r in records], dtype=np.float64)
+    cost = _engine.roi_calculator.cost
+    funded = allocate_budget(np.where(intervene, value, 0.0), request.budget, cost)
+    for i in np.flatnonzero(intervene & ~funded):
+        r = records[i]
+        scored[i] = (*scored[i][:6], DecisionRecord(
+            DecisionCode.DO_NOTHING, r.expected_value, r.latency_ms, BUDGET_REASON, (r.expected_value, request.budget),
+        ), *scored[i][7:])
+
+    results = [_record_one(user_req, *s) for user_req, s in zip(request.users, scored)]
+    summary = summarize(funded, value, cost, request.budget)
+    summary["deferred"] = int((intervene & ~funded).sum())
+    return BatchDecisionResponse(decisions=results, count=len(results), budget=summary)
+
+
+@app.post("/api/v1/decide/binary", response_class=Response, tags=["Decision"])
+async def make_binary_decisions(
+    request: Request,
+    x_profile: Optional[str] = Header(None, description="Set to 1 to profile this request (if enabled)"),
+):
+    """
+    Batch decisions in the binary protocol (app.ai.binary_protocol).
+
+    Same models, rate tracking, budget handling and recording as
+    /api/v1/decide/batch. The body is decoded straight into numpy columns
+    and every stage runs vectorized per model variant. Responses carry
+    decision codes and scores but no reason text.
+    """
+    if _engine is None:
+        raise HTTPException(status_code=503, detail="Models not yet initialized.")
+
+    try:
+        records, budget = decode_requests(await request.body(), _request_dtype)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if budget is not None and budget < 0:
+        raise HTTPException(status_code=400, detail="budget must be non-negative")
+
+    profile = _profiler is not None and _profiler.should_sample(x_profile)
+    content = await run_in_threadpool(_decide_binary, records, budget, profile, _client_host(request))
+    return Response(content=content, media_type=MEDIA_TYPE)
+
+
+def _decide_binary(
+    records: np.ndarray, budget: Optional[float], profile: bool = False, client: Optional[str] = None
+) -> bytes:
+    if profile:
+        with _profiler.profile():
+            return _decide_binary(records, budget, client=client)
+
+    decided = _decide_records(records, budget, client=client)
+    t_encode = time.perf_counter()
+    out = np.zeros(len(records), dtype=RESPONSE_DTYPE)
+    out["decision"] = decided["decision_code"]
+    out["expected_value"] = decided["expected_value"]
+    out["churn_probability"] = decided["churn_probability"]
+    out["anomaly_score"] = decided["anomaly_score"]
+    remaining = None
+    if budget is not None:
+        out["budget_deferred"] = decided["budget_deferred"]
+        remaining = decided["budget"]["remaining_budget"]
+    content = encode_responses(out, remaining)
+    if len(records):
+        _stage["serialization"].observe((time.perf_counter() - t_encode) * 1000 / len(records), count=len(records))
+    return content
+
+
+def _decide_records(
+    records: np.ndarray,
+    budget: Optional[float] = None,
+    attributes: Optional[dict] = None,
+    client: Optional[str] = None,
+) -> dict:
+    """
+    Vectorized score → decide → record for request rows.
+
+    `records` are REQUEST_DTYPE rows, optionally followed by the configured
+    attribute columns. `attributes` adds more rule columns (object arrays,
+    None = missing), e.g. from JSON stream requests. Rows without a user_id
+    are rate-tracked under `client`.
+
+    Returns decide_batch()'s arrays plus churn_probability, anomaly_score
+    and the serving variant per row.
+    """
+    n = len(records)
+    start = time.perf_counter()
+    user_ids = [u.decode("utf-8", "replace") if u else None for u in records["user_id"].tolist()]
+    features = {name: records[name].astype(np.float64) for name in UserFeatures.model_fields}
+    columns = {}
+    if _rate_tracker is not None:
+        # Same server-side accounting as _score_one, one user at a time. Untracked
+        # rows stay NaN (missing to rules, -1 in the decision log), as replay reads them
+        minute, hour = np.full(n, np.nan), np.full(n, np.nan)
+        requests = features["request_count_today"]
+        for i, user_id in enumerate(user_ids):
+            key = _rate_key(user_id, client)
+            if key is not None:
+                counts = _rate_tracker.record(key)
+                if user_id is not None:  # client keys feed the burst limits only, as in _score_one
+                    requests[i] = max(requests[i], counts.per_day)
+                minute[i], hour[i] = counts.per_minute, counts.per_hour
+        columns = {"requests_last_minute": minute, "requests_last_hour": hour}
+    if _drift_monitor is not None:
+        _drift_monitor.observe_batch(features)
+    t_rates = time.perf_counter()
+
+    # Score each variant's rows with its own models
+    if _router.ab_variants:
+        groups = {}
+        for i, user_id in enumerate(user_ids):
+            variant = _router.assign(user_id)
+            groups.setdefault(id(variant), (variant, []))[1].append(i)
+        groups = [(variant, np.asarray(rows)) for variant, rows in groups.values()]
+    else:
+        groups = [(_router.primary, np.arange(n))]
+
+    degrade = _degrade()
+    churn_prob, anomaly_score = np.zeros(n), np.zeros(n)
+    variant_names = np.empty(n, dtype=object)
+    model_versions = np.empty(n, dtype=object)
+    feature_ms = churn_ms = anomaly_ms = 0.0
+    for variant, rows in groups:
+        t0 = time.perf_counter()
+        variant_names[rows] = variant.name
+        model_versions[rows] = variant.served_version
+        if degrade == "default":
+            continue  # neutral scores, as in _score_one
+        churn_X = variant.churn_model.featurize_arrays(features["tenure"][rows], features["monthly_charges"][rows])
+        t1 = time.perf_counter()
+        churn_prob[rows] = variant.churn_model.predict_proba_features(churn_X)
+        t2 = time.perf_counter()
+        if degrade is None:
+            anomaly_X = variant.anomaly_model.featurize_arrays(
+                features["request_count_today"][rows], features["login_attempts"][rows]
+            )
+            anomaly_score[rows] = np.round(variant.anomaly_model.score_features(anomaly_X), 4)
+            refresher = _anomaly_refresher
+            if refresher is not None and refresher.model is variant.anomaly_model:
+                refresher.observe(anomaly_X)
+        t3 = time.perf_counter()
+        feature_ms, churn_ms, anomaly_ms = feature_ms + t1 - t0, churn_ms + t2 - t1, anomaly_ms + t3 - t2
+    expected_lift = churn_prob * 0.3
+
+    logged = {**features, **columns}
+    if _engine.rule_plan is not None:
+        # Rules may reference any raw feature (tenure, monthly_charges, ...) and tenant attributes
+        columns.update({k: v for k, v in features.items() if k != "request_count_today"})
+        for name in records.dtype.names[len(REQUEST_DTYPE.names):]:
+            column = records[name]
+            columns[name] = np.char.decode(column, "utf-8") if column.dtype.kind == "S" else column.astype(np.float64)
+        columns.update(attributes or {})
+    decided = _engine.decide_batch(
+        churn_prob, expected_lift, anomaly_score, features["request_count_today"], budget=budget, **columns
+    )
+    codes, expected_value = decided["decision_code"], decided["expected_value"]
+
+    t_recording = time.perf_counter()
+    _engine.audit_batch({
+        "user_id": user_ids,
+        "churn_probability": churn_prob,
+        "expected_lift": expected_lift,
+        "anomaly_score": anomaly_score,
+        "request_count_today": features["request_count_today"],
+        **columns,
+        "model_version": model_versions,
+    }, decided)
+    per_row_ms = (t_recording - start) * 1000 / max(n, 1)
+    for variant, rows in groups:
+        _router.record_batch(variant, codes[rows], float(expected_value[rows].sum()), per_row_ms)
+    if _router.shadow_variants and degrade is None:
+        for i in range(n):
+            row = {name: features[name][i] for name in features}
+            served = {name: column[i] for name, column in columns.items()}
+            _router.submit_shadow(row, DecisionCode(codes[i]).name, served)
+    _analytics.record_batch(codes, expected_value, churn_prob, anomaly_score, np.full(n, time.time()))
+    if _decision_log is not None:
+        for variant, rows in groups:
+            _decision_log.append_batch(
+                {name: column[rows] for name, column in logged.items()},
+                churn_probability=churn_prob[rows],
+                expected_lift=expected_lift[rows],
+                anomaly_score=anomaly_score[rows],
+                decision=codes[rows],
+                expected_value=expected_value[rows],
+                user_id=records["user_id"][rows],
+                model_version=model_versions[rows[0]] if len(rows) else variant.version,
+            )
+    t_done = time.perf_counter()
+
+    # Stage histograms are per decision, so each row gets its share of the batch time
+    if n:
+        for stage, ms in (
+            ("rate_tracking", (t_rates - start) * 1000),
+            ("feature_engineering", feature_ms * 1000),
+            ("churn_scoring", churn_ms * 1000),
+            ("anomaly_scoring", anomaly_ms * 1000),
+            ("recording", (t_done - t_recording) * 1000),
+        ):
+            _stage[stage].observe(ms / n, count=n)
+
+    decided["churn_probability"] = np.round(churn_prob, 4)
+    decided["anomaly_score"] = anomaly_score
+    decided["variant"] = variant_names
+    decided["model_version"] = model_versions
+    return decided
+
+
+# Binary stream frames: uint64 correlation id, then a binary protocol payload
+_STREAM_FRAME_ID = struct.Struct("<Q")
+
+
+@app.websocket("/api/v1/decide/stream")
+async def decision_stream(websocket: WebSocket):
+    """
+    Persistent decision channel: pipeline many requests over one connection.
+
+    Text frames carry one StreamDecisionRequest (`{"id": ..., "user_id": ...,
+    "features": {...}}`) or a list of them. Responses are JSON arrays of
+    `{"id", "user_id", "decision", "expected_value", "churn_probability",
+    "anomaly_score", "variant"}`, or `{"id", "error"}` for invalid requests.
+    They are sent per internal batch, so they can arrive out of order.
+
+    Binary frames are an 8-byte little-endian id followed by a
+    /api/v1/decide/binary body. The reply is the same id followed by the
+    binary response, or by a binary error body (DFERR) if scoring failed.
+    Items of a failed JSON batch are each answered with `{"id", "error"}`.
+    """
+    await websocket.accept()
+    if _engine is None:
+        await websocket.close(code=1013, reason="Models not yet initialized.")
+        return
+
+    send_lock = asyncio.Lock()
+
+    async def send_text(payload) -> None:
+        async with send_lock:
+            await websocket.send_text(json.dumps(payload))
+
+    async def send_bytes(payload: bytes) -> None:
+        async with send_lock:
+            await websocket.send_bytes(payload)
+
+    # Anonymous requests on this connection are rate-tracked under its client address (if enabled)
+    client = _client_host(websocket)
+    batcher = MicroBatcher(
+        functools.partial(_decide_stream, client=client), send_text, on_error=_stream_error, **_stream_settings
+    )
+    runner = asyncio.create_task(batcher.run())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("text") is not None:
+                errors = []
+                try:
+                    payload = json.loads(message["text"])
+                except ValueError as exc:
+                    payload, errors = [], [{"id": None, "error": f"Invalid JSON: {exc}"}]
+                for item in payload if isinstance(payload, list) else [payload]:
+                    try:
+                        await batcher.put(StreamDecisionRequest.model_validate(item))
+                    except ValidationError as exc:
+                        item_id = item.get("id") if isinstance(item, dict) else None
+                        errors.append({"id": item_id, "error": exc.errors(include_url=False, include_context=False)})
+                if errors:
+                    await send_text(errors)
+            elif message.get("bytes") is not None:
+                frame = memoryview(message["bytes"])
+                try:
+                    (frame_id,) = _STREAM_FRAME_ID.unpack_from(frame)
+                    records, budget = decode_requests(frame[_STREAM_FRAME_ID.size:], _request_dtype)
+                    if budget is not None and budget < 0:
+                        raise ValueError("budget must be non-negative")
+                except (ValueError, struct.error) as exc:
+                    await send_text([{"id": None, "error": str(exc)}])
+                    continue
+                await batcher.submit(
+                    functools.partial(_decide_stream_binary, client=client), frame_id, records, budget,
+                    emit=send_bytes, on_error=_stream_binary_error,
+                )
+    finally:
+        await batcher.close()
+        await runner
+
+
+def _decide_stream(batch: list, client: Optional[str] = None) -> list:
+    """Score one micro-batch of StreamDecisionRequests through the vectorized path."""
+    records = np.zeros(len(batch), dtype=REQUEST_DTYPE)
+    records["user_id"] = [(r.user_id or "").encode("utf-8")[:32] for r in batch]
+    for name in UserFeatures.model_fields:
+        records[name] = [getattr(r.features, name) for r in batch]
+    keys = {key for r in batch for key in r.attributes}
+    attributes = {key: np.array([r.attributes.get(key) for r in batch], dtype=object) for key in keys}
+    decided = _decide_records(records, attributes=attributes, client=client)
+    return [
+        {
+            "id": r.id,
+            "user_id": r.user_id,
+            "decision": DecisionCode(code).name,
+            "expected_value": ev,
+            "churn_probability": churn,
+            "anomaly_score": anomaly,
+            "variant": variant,
+            "model_version": version,
+        }
+        for r, code, ev, churn, anomaly, variant, version in zip(
+            batch,
+            decided["decision_code"].tolist(),
+            decided["expected_value"].tolist(),
+            decided["churn_probability"].tolist(),
+            decided["anomaly_score"].tolist(),
+            decided["variant"].tolist(),
+            decided["model_version"].tolist(),
+        )
+    ]
+
+
+def _decide_stream_binary(frame_id: int, records: np.ndarray, budget: Optional[float], client: Optional[str] = None) -> bytes:
+    return _STREAM_FRAME_ID.pack(frame_id) + _decide_binary(records, budget, client=client)
+
+
+def _stream_error(batch: list, exc: Exception) -> list:
+    """Error replies for every request of a batch that failed to score."""
+    error = f"Decision failed: {type(exc).__name__}: {exc}"
+    return [{"id": r.id, "error": error} for r in batch]
+
+
+def _stream_binary_error(frame_id: int, records: np.ndarray, budget: Optional[float], exc: Exception) -> bytes:
+    return _STREAM_FRAME_ID.pack(frame_id) + encode_error(f"Decision failed: {type(exc).__name__}: {exc}")
 
 
 @app.get("/api/v1/metrics", response_model=MetricsResponse, tags=["Evaluation"])
@@ -201,13 +972,250 @@ def get_metrics():
 
     Churn model metrics come from offline validation at startup.
     Anomaly model metrics include contamination and score distribution.
-    Latency profile documents system design trade-offs.
+    Latency profile reports measured per-stage p50/p95/p99/p999 (ms);
+    throughput reports per-endpoint request counts and rates since startup.
     """
     if _churn_model is None:
         raise HTTPException(status_code=503, detail="Models not yet initialized.")
 
+    uptime = max(time.time() - _started_at, 1e-9)
+    requests = default_registry.counter_totals("http_requests", "endpoint")
+    primary = _router.primary
     return MetricsResponse(
-        churn_model_metrics=_churn_model.get_metrics(),
-        anomaly_model_metrics=_anomaly_model.get_metrics(),
-        latency_profile=_engine.get_latency_profile(),
-    )
\ No newline at end of file
+        churn_model_metrics=primary.churn_model.get_metrics(),
+        anomaly_model_metrics=primary.anomaly_model.get_metrics(),
+        model_version=primary.served_version,
+        latency_profile={
+            **_engine.get_latency_profile(),
+            "endpoints": default_registry.snapshot("http_request_latency_ms", "endpoint"),
+        },
+        throughput={
+            "uptime_s": round(uptime, 1),
+            "endpoints": {
+                endpoint: {"requests": count, "requests_per_s": round(count / uptime, 3)}
+                for endpoint, count in requests.items()
+            },
+        },
+        rate_tracking=_rate_tracker.get_stats() if _rate_tracker is not None else None,
+        admission=_admission.get_stats() if _admission.enabled else None,
+    )
+
+
+@app.get("/api/v1/analytics", tags=["Evaluation"])
+def get_analytics(
+    window_seconds: int = Query(3600, ge=60, le=90 * 86400, description="Trailing window length in seconds"),
+):
+    """
+    Return decision statistics over a trailing time window.
+
+    Counts per decision, expected value totals, intervention/flag rates and
+    churn/anomaly score histograms. Answered by merging per-minute, per-hour
+    and per-day buckets, so polling is cheap regardless of traffic volume.
+    """
+    return _analytics.query(window_seconds=window_seconds)
+
+
+@app.get("/api/v1/experiments", tags=["Evaluation"])
+def get_experiments():
+    """
+    Return per-variant statistics for A/B challengers and shadow models.
+
+    Served variants report decision counts, average expected value and
+    latency percentiles. Shadow variants also report agreement with the
+    decision actually served and how many shadow jobs were dropped under load.
+    """
+    if _router is None:
+        raise HTTPException(status_code=503, detail="Models not yet initialized.")
+
+    return _router.get_stats()
+
+
+@app.get("/api/v1/rules", tags=["Evaluation"])
+def get_rules():
+    """
+    Return the compiled decision rule plan with per-rule statistics.
+
+    Rules come from the `rules:` config section and run in order around the
+    built-in security gate and ROI check; the first match decides. Each rule
+    reports hits, share of decisions, and sampled evaluation latency.
+    """
+    if _engine is None:
+        raise HTTPException(status_code=503, detail="Models not yet initialized.")
+
+    return _engine.get_rule_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["System"])
+def prometheus_metrics():
+    """
+    Prometheus text exposition of latency histograms and request counters.
+
+    Stage latencies are exported as `decisionforge_decision_stage_latency_seconds`
+    histograms, end-to-end latency per endpoint as
+    `decisionforge_http_request_latency_seconds`, plus precomputed quantiles.
+    """
+    return PlainTextResponse(
+        default_registry.render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get("/api/v1/admin/profile", response_class=PlainTextResponse, tags=["Admin"])
+def get_profile(
+    limit: Optional[int] = Query(None, ge=1, description="Return only the heaviest N stacks"),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+):
+    """
+    Return aggregated stack samples from profiled requests.
+
+    `collapsed` (default) is one "frame;frame;frame count" line per stack,
+    heaviest first — pipe it into flamegraph.pl or load it in speedscope.
+    Each sample represents roughly `interval_ms` of wall-clock time.
+    `json` returns profiler status counters instead.
+    """
+    if _profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set profiling.enabled in config).")
+
+    if format == "json":
+        return JSONResponse(_profiler.get_status())
+    return PlainTextResponse(_profiler.collapsed(limit=limit))
+
+
+@app.delete("/api/v1/admin/profile", tags=["Admin"])
+def reset_profile():
+    """Discard collected stack samples and counters."""
+    if _profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set profiling.enabled in config).")
+
+    _profiler.reset()
+    return {"reset": True}
+
+
+@app.get("/api/v1/anomaly/drift", tags=["Evaluation"])
+def get_anomaly_drift():
+    """
+    Return streaming anomaly refresh history and score-distribution drift.
+
+    Compares the current anomaly score distribution on recent traffic with
+    the baseline window (KS statistic, quantiles, flagged fraction) and lists
+    recent rolling tree refreshes.
+    """
+    if _anomaly_refresher is None:
+        raise HTTPException(status_code=404, detail="Streaming anomaly refresh is disabled (set anomaly_streaming.enabled in config).")
+
+    return _anomaly_refresher.get_drift_report()
+
+
+@app.get("/api/v1/drift", tags=["Evaluation"])
+def get_feature_drift():
+    """
+    Return live feature drift against the training snapshot.
+
+    Per raw feature: PSI over the training decile bins, KS statistic from
+    the streaming quantile sketch, and live vs training median / p95. The
+    same PSI and KS values are exported as Prometheus gauges.
+    """
+    if _drift_monitor is None:
+        raise HTTPException(status_code=404, detail="Drift monitoring is disabled (set drift_monitoring.enabled in config).")
+
+    return _drift_monitor.report()
+
+
+@app.post("/api/v1/admin/anomaly/refresh", tags=["Admin"])
+def refresh_anomaly_model(
+    frozen: Optional[bool] = Query(None, description="Freeze (true) or resume (false) adaptation instead of refreshing"),
+):
+    """Run one rolling tree refresh now, or freeze/resume background refreshes."""
+    if _anomaly_refresher is None:
+        raise HTTPException(status_code=404, detail="Streaming anomaly refresh is disabled (set anomaly_streaming.enabled in config).")
+
+    if frozen is not None:
+        _anomaly_refresher.freeze(frozen)
+        return {"frozen": _anomaly_refresher.frozen}
+    report = _anomaly_refresher.refresh()
+    if report is None:
+        raise HTTPException(status_code=409, detail="Not enough recent traffic to refresh (or refresh is frozen).")
+    return report
+
+
+@app.get("/api/v1/admin/models", tags=["Admin"])
+def list_model_versions():
+    """Registered model versions (metadata and headline metrics) and the active one."""
+    if _registry is None:
+        raise HTTPException(status_code=404, detail="Model registry is disabled (set model_registry.path in config).")
+
+    return {"active": _router.primary.version, **_registry.describe()}
+
+
+@app.post("/api/v1/admin/models/activate", tags=["Admin"])
+def activate_model_version(
+    version: str = Query(..., description="Version id, or 'latest' / 'pinned'"),
+    pin: bool = Query(False, description="Also pin it, so restarts load this version"),
+):
+    """
+    Switch the primary models to a registered version without dropping requests.
+
+    The version is loaded and prewarmed off the request path, then swapped in
+    with one assignment. Requests already in flight finish on the models they
+    started with. Rolling back is activating the previous version.
+    """
+    if _registry is None:
+        raise HTTPException(status_code=404, detail="Model registry is disabled (set model_registry.path in config).")
+
+    resolved = _registry.resolve(version)
+    if resolved not in _registry.versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version!r}.")
+    try:
+        churn_model, anomaly_model, _ = _registry.load(resolved)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+    try:
+        prewarm_ms = _prewarm(churn_model, anomaly_model)
+    except Exception as exc:
+        raise HTTPException(status_code=409, detail=f"Prewarm failed, still serving {_router.primary.version}: {exc}")
+    previous = _activate(churn_model, anomaly_model, resolved)
+    if pin:
+        _registry.pin(resolved)
+    return {"version": resolved, "previous_version": previous, "prewarm_ms": prewarm_ms, "pinned": _registry.pinned()}
+
+
+def _prewarm(churn_model: ChurnModel, anomaly_model: AnomalyModel) -> float:
+    """Run both request paths once so caches are built before real traffic arrives."""
+    start = time.perf_counter()
+    row = {"tenure": 3, "monthly_charges": 150.0, "request_count_today": 2, "login_attempts": 1}
+    churn = churn_model.predict_proba_features(churn_model.featurize_row(row))
+    anomaly = anomaly_model.score_features(anomaly_model.featurize_row(row))
+    churn_batch = churn_model.predict_proba_features(churn_model.featurize_arrays(np.arange(1, 65), np.full(64, 150.0)))
+    anomaly_batch = anomaly_model.score_features(anomaly_model.featurize_arrays(np.arange(1, 65), np.ones(64)))
+    if not all(np.isfinite(x).all() for x in (churn, anomaly, churn_batch, anomaly_batch)):
+        raise ValueError("non-finite scores")
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def _activate(churn_model: ChurnModel, anomaly_model: AnomalyModel, version: str) -> str:
+    """Swap the primary variant (and its refresher / drift monitor); returns the previous version."""
+    global _churn_model, _anomaly_model, _anomaly_refresher, _drift_monitor
+
+    config = _engine.config
+    with _activation_lock:
+        old_refresher = _anomaly_refresher
+        refresher = _build_refresher(config, anomaly_model)
+        monitor = _build_drift_monitor(config, churn_model, anomaly_model)
+        previous = _router.primary.version
+
+        # One assignment switches the serving pair; assign() hands out either the old or the new one
+        _router.primary = ModelVariant(
+            "primary", churn_model, anomaly_model, traffic=_router.primary.traffic, version=version
+        )
+        _churn_model, _anomaly_model = churn_model, anomaly_model
+        _anomaly_refresher, _drift_monitor = refresher, monitor
+
+        default_registry.gauge("model_info", version=previous).set(0)
+        default_registry.gauge("model_info", version=version).set(1)
+
+    if old_refresher is not None:
+        old_refresher.stop()
+    if refresher is not None:
+        refresher.start()
+    return previous
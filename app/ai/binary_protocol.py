@@ -0,0 +1,139 @@
+"""
+Binary Decision Protocol
+------------------------
+Compact wire format for `POST /api/v1/decide/binary`, for machine clients
+at high request rates.
+
+Request layout:
+    b"DFREQ" | uint8 version | uint32 count | float64 budget (NaN = none) | records...
+Response layout:
+    b"DFRES" | uint8 version | uint32 count | float64 remaining budget (NaN = none) | records...
+Error layout (a request that could not be decided):
+    b"DFERR" | uint8 version | uint32 message length | float64 NaN | UTF-8 message
+
+Records are fixed-width little-endian structs (REQUEST_DTYPE /
+RESPONSE_DTYPE), the same approach as the decision log. A deployment can
+append tenant attribute columns for its decision rules (`request_dtype()`,
+configured under `binary_protocol.attributes`); clients and server must
+agree on them, and a width mismatch is rejected by the length check. A request body
+is decoded with one np.frombuffer call into a structured array view, with
+no per-field parsing or validation objects. Responses are one tobytes()
+of a structured array.
+
+Design Trade-offs:
+  - Fixed width over self-describing formats: no schema negotiation, and
+    a decode is O(1) Python work. The price is a versioned format: any
+    field change needs a new FORMAT_VERSION, and user_id is cut to 32 bytes.
+  - Responses carry decision codes (DecisionCode values) and numbers, not
+    reason strings. Clients that need the reasoning use the JSON API.
+  - Multi-byte fields are not aligned (packed structs). numpy reads them
+    unaligned, and the scoring path copies columns into float64 arrays
+    anyway.
+"""
+
+import math
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+REQUEST_MAGIC = b"DFREQ"
+RESPONSE_MAGIC = b"DFRES"
+ERROR_MAGIC = b"DFERR"
+FORMAT_VERSION = 1
+MEDIA_TYPE = "application/x-decisionforge"
+
+_HEADER = struct.Struct("<5sBId")
+
+REQUEST_DTYPE = np.dtype([
+    ("user_id", "S32"),            # empty = anonymous
+    ("tenure", "<f4"),
+    ("monthly_charges", "<f4"),
+    ("request_count_today", "<i4"),
+    ("login_attempts", "<i4"),
+])
+
+RESPONSE_DTYPE = np.dtype([
+    ("decision", "u1"),            # DecisionCode value
+    ("budget_deferred", "u1"),     # 1 = INTERVENE not funded by the budget (sent as DO_NOTHING)
+    ("expected_value", "<f4"),
+    ("churn_probability", "<f4"),
+    ("anomaly_score", "<f4"),
+])
+
+
+# Attribute column kinds: fixed-width bytes (b"" = missing) or numbers (NaN = missing)
+ATTRIBUTE_KINDS = ("S", "f")
+
+
+def request_dtype(attributes: Optional[Dict[str, str]] = None) -> np.dtype:
+    """
+    REQUEST_DTYPE followed by tenant attribute columns.
+
+    Args:
+        attributes : column name → numpy type, e.g. {"segment": "S16",
+                     "days_since_last_incentive": "f4"}
+    """
+    if not attributes:
+        return REQUEST_DTYPE
+    fields = list(REQUEST_DTYPE.descr)
+    for name, kind in attributes.items():
+        dtype = np.dtype(kind)
+        if name in REQUEST_DTYPE.names or dtype.kind not in ATTRIBUTE_KINDS:
+            raise ValueError(f"Attribute column {name!r}: use a new name and a bytes (S<n>) or float (f4/f8) type")
+        fields.append((name, dtype.newbyteorder("<").str))
+    return np.dtype(fields)
+
+
+def _decode(payload: bytes, magic: bytes, dtype: np.dtype) -> Tuple[np.ndarray, Optional[float]]:
+    if len(payload) < _HEADER.size:
+        raise ValueError("Payload shorter than the protocol header")
+    got_magic, version, count, value = _HEADER.unpack_from(payload)
+    if got_magic != magic:
+        raise ValueError(f"Bad magic {got_magic!r}, expected {magic!r}")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported protocol version {version}")
+    expected = _HEADER.size + count * dtype.itemsize
+    if len(payload) != expected:
+        raise ValueError(f"Payload is {len(payload)} bytes, header says {expected} ({count} records)")
+    records = np.frombuffer(payload, dtype=dtype, count=count, offset=_HEADER.size)
+    return records, None if math.isnan(value) else value
+
+
+def _encode(magic: bytes, records: np.ndarray, value: Optional[float]) -> bytes:
+    header = _HEADER.pack(magic, FORMAT_VERSION, len(records), math.nan if value is None else value)
+    return header + records.tobytes()
+
+
+def decode_requests(payload: bytes, dtype: np.dtype = REQUEST_DTYPE) -> Tuple[np.ndarray, Optional[float]]:
+    """Request body → (read-only view with `dtype` records, budget or None)."""
+    return _decode(payload, REQUEST_MAGIC, dtype)
+
+
+def encode_requests(records: np.ndarray, budget: Optional[float] = None, dtype: np.dtype = REQUEST_DTYPE) -> bytes:
+    """Client side: request records (+ optional campaign budget) → request body."""
+    return _encode(REQUEST_MAGIC, np.asarray(records, dtype=dtype), budget)
+
+
+def decode_responses(payload: bytes) -> Tuple[np.ndarray, Optional[float]]:
+    """Client side: response body → (RESPONSE_DTYPE view, remaining budget or None)."""
+    return _decode(payload, RESPONSE_MAGIC, RESPONSE_DTYPE)
+
+
+def encode_responses(records: np.ndarray, remaining_budget: Optional[float] = None) -> bytes:
+    """RESPONSE_DTYPE array (+ remaining budget) → response body."""
+    return _encode(RESPONSE_MAGIC, records, remaining_budget)
+
+
+def encode_error(message: str) -> bytes:
+    """Error body sent in place of a response."""
+    body = message.encode("utf-8")
+    return _HEADER.pack(ERROR_MAGIC, FORMAT_VERSION, len(body), math.nan) + body
+
+
+def decode_error(payload: bytes) -> Optional[str]:
+    """Client side: the error message if payload is an error body, else None."""
+    if bytes(payload[:len(ERROR_MAGIC)]) != ERROR_MAGIC:
+        return None
+    _, _, length, _ = _HEADER.unpack_from(payload)
+    return bytes(payload[_HEADER.size:_HEADER.size + length]).decode("utf-8", "replace")
@@ -0,0 +1,238 @@
+"""
+Model Experiments (A/B + Shadow)
+--------------------------------
+Routes live traffic between a primary model set and challenger sets, and
+scores shadow sets off the request path.
+
+Design Trade-offs:
+  - Assignment hashes `salt:user_id` (blake2b), so a user always lands in
+    the same variant across requests and restarts; anonymous requests go
+    to the primary.
+  - Shadow variants are scored in a small background thread pool after the
+    response is computed. The pending queue is bounded, and excess shadow
+    work is dropped (and counted) rather than slowing customers down.
+  - Shadow decisions go through DecisionEngine.decide_batch, which does not
+    audit-log, so only served decisions reach the audit trail. They get the
+    same rate counts and rule columns as the served decision, so any
+    disagreement comes from the models alone.
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.decision_engine import DecisionEngine
+from app.core.metrics import Histogram
+from app.core.records import DecisionCode
+
+
+@dataclass
+class ModelVariant:
+    """One churn/anomaly model pair and how it receives traffic."""
+
+    name: str
+    churn_model: Any
+    anomaly_model: Any
+    mode: str = "primary"      # "primary" | "ab" | "shadow"
+    traffic: float = 0.0       # share of users served by an "ab" variant
+    version: str = ""          # model version tag on this variant's decisions
+
+    @property
+    def served_version(self) -> str:
+        """`version`, plus "+r<n>" once n streaming refreshes have replaced anomaly trees."""
+        generation = getattr(self.anomaly_model, "refresh_generation", 0)
+        return f"{self.version}+r{generation}" if generation else self.version
+
+
+@dataclass
+class VariantStats:
+    """Decision and latency statistics for one variant."""
+
+    decisions: Dict[str, int] = field(default_factory=lambda: {c.name: 0 for c in DecisionCode})
+    expected_value: float = 0.0
+    latency: Histogram = field(default_factory=Histogram)
+    agreements: int = 0
+    compared: int = 0
+    errors: int = 0
+    dropped: int = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = sum(self.decisions.values())
+        out = {
+            "decisions": dict(self.decisions),
+            "total": total,
+            "average_expected_value": round(self.expected_value / total, 4) if total else 0.0,
+            "latency_ms": self.latency.snapshot() if self.latency.count else {},
+            "errors": self.errors,
+        }
+        if self.compared or self.dropped:
+            out["agreement_with_served"] = round(self.agreements / self.compared, 4) if self.compared else None
+            out["dropped"] = self.dropped
+        return out
+
+
+def hash_bucket(user_id: str, salt: str = "") -> float:
+    """Deterministic uniform value in [0, 1) for a user."""
+    digest = hashlib.blake2b(f"{salt}:{user_id}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+class ExperimentRouter:
+    """
+    Assigns users to variants and collects per-variant statistics.
+
+    A/B variants take consecutive slices of the hash space, e.g. traffic
+    0.1 and 0.05 → buckets [0, 0.1) and [0.1, 0.15); everyone else is
+    served by the primary.
+    """
+
+    def __init__(
+        self,
+        primary: ModelVariant,
+        variants: Optional[List[ModelVariant]] = None,
+        engine: Optional[DecisionEngine] = None,
+        salt: str = "",
+        shadow_workers: int = 2,
+        max_pending_shadow: int = 1000,
+    ):
+        """
+        Args:
+            primary            : default model set
+            variants           : challenger ("ab") and shadow ("shadow") model sets
+            engine             : engine used for shadow decisions (no audit logging)
+            salt               : changes the hash split without changing user ids
+            shadow_workers     : background threads scoring shadow variants
+            max_pending_shadow : queued shadow jobs before new ones are dropped
+        """
+        variants = variants or []
+        self.primary = primary
+        self.ab_variants = [v for v in variants if v.mode == "ab"]
+        self.shadow_variants = [v for v in variants if v.mode == "shadow"]
+        if sum(v.traffic for v in self.ab_variants) > 1.0:
+            raise ValueError("A/B traffic shares sum to more than 1.0")
+        self.engine = engine
+        self.salt = salt
+        self.max_pending_shadow = max_pending_shadow
+
+        self._cutoffs = np.cumsum([v.traffic for v in self.ab_variants])
+        primary.traffic = round(1.0 - float(self._cutoffs[-1]), 6) if self.ab_variants else 1.0
+        self._stats = {v.name: VariantStats() for v in [primary, *variants]}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._pool = (
+            ThreadPoolExecutor(max_workers=shadow_workers, thread_name_prefix="shadow")
+            if self.shadow_variants else None
+        )
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def assign(self, user_id: Optional[str]) -> ModelVariant:
+        """Variant that serves this user (primary for anonymous requests)."""
+        if not user_id or not self.ab_variants:
+            return self.primary
+        i = int(np.searchsorted(self._cutoffs, hash_bucket(user_id, self.salt), side="right"))
+        return self.ab_variants[i] if i < len(self.ab_variants) else self.primary
+
+    def record(self, variant: ModelVariant, decision: str, expected_value: float, latency_ms: float) -> None:
+        """Record a served decision."""
+        with self._lock:
+            stats = self._stats[variant.name]
+            stats.decisions[decision] += 1
+            stats.expected_value += expected_value
+            stats.latency.observe(latency_ms)
+
+    def record_batch(self, variant: ModelVariant, codes: np.ndarray, expected_value: float, latency_ms: float) -> None:
+        """Record many served decisions: DecisionCode array, their total value, per-decision latency."""
+        counts = np.bincount(np.asarray(codes, dtype=np.int64), minlength=len(DecisionCode))
+        with self._lock:
+            stats = self._stats[variant.name]
+            for code in DecisionCode:
+                stats.decisions[code.name] += int(counts[code])
+            stats.expected_value += expected_value
+            stats.latency.observe(latency_ms, count=len(codes))
+
+    # ------------------------------------------------------------------
+    # Shadow scoring
+    # ------------------------------------------------------------------
+
+    def submit_shadow(
+        self, features: Dict[str, Any], served_decision: str, columns: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Queue shadow scoring for this request; never blocks the caller.
+
+        `columns` are the served decision's other engine inputs (rate counts,
+        rule attributes), passed through unchanged to the shadow decision.
+        """
+        if self._pool is None or self.engine is None:
+            return
+        for variant in self.shadow_variants:
+            with self._lock:
+                if self._pending >= self.max_pending_shadow:
+                    self._stats[variant.name].dropped += 1
+                    continue
+                self._pending += 1
+            self._pool.submit(self._score_shadow, variant, features, served_decision, columns or {})
+
+    def _score_shadow(
+        self, variant: ModelVariant, features: Dict[str, Any], served_decision: str, columns: Dict[str, Any]
+    ) -> None:
+        try:
+            start = time.perf_counter()
+            churn_prob = variant.churn_model.predict_proba(features)
+            anomaly_score = variant.anomaly_model.score(features)
+            result = self.engine.decide_batch(
+                [churn_prob], [churn_prob * 0.3], [anomaly_score], [features["request_count_today"]],
+                **{name: [value] for name, value in columns.items()},
+            )
+            latency_ms = (time.perf_counter() - start) * 1000
+            decision = DecisionCode(int(result["decision_code"][0])).name
+            with self._lock:
+                stats = self._stats[variant.name]
+                stats.decisions[decision] += 1
+                stats.expected_value += float(result["expected_value"][0])
+                stats.latency.observe(latency_ms)
+                stats.compared += 1
+                stats.agreements += decision == served_decision
+        except Exception:
+            with self._lock:
+                self._stats[variant.name].errors += 1
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "salt": self.salt,
+                "variants": {
+                    name: {
+                        "mode": self._variant(name).mode,
+                        "traffic": self._variant(name).traffic,
+                        **stats.snapshot(),
+                    }
+                    for name, stats in self._stats.items()
+                },
+                "pending_shadow_jobs": self._pending,
+            }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _variant(self, name: str) -> ModelVariant:
+        for v in [self.primary, *self.ab_variants, *self.shadow_variants]:
+            if v.name == name:
+                return v
+        raise KeyError(name)
@@ -0,0 +1,360 @@
+"""
+Shared Ollama client (FREE local AI).
+
+One keep-alive HTTP connection pool to the local LLM server, shared by
+AIExplainer, AIInsightsGenerator and NLQueryInterface.
+
+Design Trade-offs:
+  - Talks to the Ollama REST API directly over http.client instead of going
+    through the `ollama` package: we need a bounded pool, per-call timeouts
+    and fast failure, none of which the module-level helpers expose.
+  - Health is checked by a background thread and cached, so callers read a
+    bool instead of paying a round-trip before every generation.
+  - A circuit breaker opens after consecutive failures. While it is open,
+    calls fail immediately instead of hanging until the OS socket timeout.
+    Only server faults count: an exhausted pool is our own backlog, and a
+    4xx or malformed body still proves the server is up.
+"""
+
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+DEFAULT_HOST = "http://localhost:11434"
+
+# What a reused keep-alive socket raises when the server closed it while idle.
+# Timeouts are not among them: retrying one would send the generation twice.
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when the LLM server is unreachable or the circuit is open."""
+
+
+class PoolExhaustedError(LLMUnavailableError):
+    """Raised when no pooled connection frees up in time (local overload, not a server fault)."""
+
+
+class OllamaClient:
+    """
+    Thread-safe, connection-pooled client for the Ollama HTTP API.
+
+    Circuit states:
+        closed    — calls go through; failures are counted
+        open      — calls fail fast with LLMUnavailableError
+        half_open — after `reset_timeout`, one trial call is let through
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        pool_size: int = 4,
+        connect_timeout: float = 2.0,
+        request_timeout: float = 60.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        health_interval: float = 15.0,
+    ):
+        """
+        Args:
+            host              : server URL, defaults to $OLLAMA_HOST or localhost:11434
+            pool_size         : maximum number of open keep-alive connections
+            connect_timeout   : seconds allowed to establish a connection
+            request_timeout   : default seconds allowed for a full call
+            failure_threshold : consecutive failures before the circuit opens
+            reset_timeout     : seconds the circuit stays open before a trial call
+            health_interval   : seconds between background health checks
+        """
+        url = urlparse(host or os.environ.get("OLLAMA_HOST") or DEFAULT_HOST)
+        if not url.scheme:
+            url = urlparse(f"http://{host}")
+        self.host = url.hostname or "localhost"
+        self.port = url.port or 11434
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.health_interval = health_interval
+
+        # Pool slots hold either an idle connection or None (not yet opened)
+        self._pool: "queue.LifoQueue[Optional[http.client.HTTPConnection]]" = queue.LifoQueue(
+            maxsize=pool_size
+        )
+        for _ in range(pool_size):
+            self._pool.put(None)
+
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._healthy: Optional[bool] = None
+        self._last_health_check = 0.0
+        self._monitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Public API (mirrors the subset of `ollama` we use)
+    # ------------------------------------------------------------------
+
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run a non-streaming chat completion.
+
+        Returns the decoded Ollama response, e.g. response['message']['content'].
+        Raises LLMUnavailableError immediately while the circuit is open.
+        """
+        payload = {"model": model, "messages": messages, "stream": False}
+        if options:
+            payload["options"] = options
+        return self._call("POST", "/api/chat", payload, timeout)
+
+    def list(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Return the models available on the server."""
+        return self._call("GET", "/api/tags", None, timeout)
+
+    def show(self, model: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Return model metadata (parameters, context length, template)."""
+        return self._call("POST", "/api/show", {"model": model}, timeout)
+
+    # ------------------------------------------------------------------
+    # Health
+    # ------------------------------------------------------------------
+
+    def is_healthy(self) -> bool:
+        """
+        Cached health state. The first call checks synchronously and starts
+        the background monitor; later calls never touch the network.
+        """
+        if self._healthy is None:
+            self.check_health()
+        self.start_health_monitor()
+        return bool(self._healthy)
+
+    def check_health(self) -> bool:
+        """Ping the server now and update the cached state and the circuit."""
+        try:
+            self._request("GET", "/api/tags", None, self.connect_timeout)
+        except PoolExhaustedError:
+            pass  # every connection busy: no verdict on the server
+        except Exception:
+            self._record_failure(force_open=True)
+        else:
+            self._record_success()
+        self._last_health_check = time.monotonic()
+        return bool(self._healthy)
+
+    def start_health_monitor(self) -> None:
+        """Start the background health thread (idempotent)."""
+        with self._lock:
+            if self._monitor is not None and self._monitor.is_alive():
+                return
+            self._stop.clear()
+            self._monitor = threading.Thread(
+                target=self._monitor_loop, name="ollama-health", daemon=True
+            )
+            self._monitor.start()
+
+    def close(self) -> None:
+        """Stop the health monitor and close pooled connections."""
+        self._stop.set()
+        drained = []
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            if conn is not None:
+                conn.close()
+            drained.append(None)
+        for slot in drained:
+            self._pool.put(slot)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Snapshot of circuit and health state, for logging or /health."""
+        return {
+            "host": f"{self.host}:{self.port}",
+            "healthy": self._healthy,
+            "circuit": self._state,
+            "consecutive_failures": self._failures,
+        }
+
+    def _monitor_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    # ------------------------------------------------------------------
+    # Circuit breaker
+    # ------------------------------------------------------------------
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == "closed":
+                return
+            if self._state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise LLMUnavailableError(
+                        f"LLM server {self.host}:{self.port} unavailable (circuit open)"
+                    )
+                self._state = "half_open"
+            # half_open: allow exactly one trial call through
+            if self._trial_in_flight:
+                raise LLMUnavailableError(
+                    f"LLM server {self.host}:{self.port} unavailable (recovery check in progress)"
+                )
+            self._trial_in_flight = True
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+            self._healthy = True
+
+    def _release_trial(self) -> None:
+        """End a call that says nothing about server health (state unchanged)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _record_failure(self, force_open: bool = False) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if force_open or self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._opened_at = time.monotonic()
+                self._state = "open"
+                self._healthy = False
+
+    def _call(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]],
+        timeout: Optional[float],
+    ) -> Dict[str, Any]:
+        self._before_call()
+        # Settled in `finally` so a half-open trial never stays in flight:
+        # True = server answered, False = server fault, None = no verdict
+        reached = None
+        try:
+            result = self._request(method, path, payload, timeout or self.request_timeout)
+            reached = True
+            return result
+        except PoolExhaustedError:
+            raise
+        except LLMUnavailableError:
+            reached = False
+            raise
+        except (OSError, http.client.HTTPException) as e:
+            reached = False
+            raise LLMUnavailableError(f"LLM server {self.host}:{self.port} unreachable: {e}") from e
+        except (RuntimeError, ValueError):  # 4xx or undecodable body: the server is up
+            reached = True
+            raise
+        finally:
+            if reached is True:
+                self._record_success()
+            elif reached is False:
+                self._record_failure()
+            else:
+                self._release_trial()
+
+    # ------------------------------------------------------------------
+    # Connection pool
+    # ------------------------------------------------------------------
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]],
+        timeout: float,
+    ) -> Dict[str, Any]:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+
+        try:
+            conn = self._pool.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolExhaustedError("LLM connection pool exhausted") from None
+
+        try:
+            # An idle keep-alive socket may have been closed by the server;
+            # retry once on a fresh connection in that case.
+            reused = conn is not None and conn.sock is not None
+            try:
+                conn = self._ensure_connected(conn, timeout)
+                status, data = self._send(conn, method, path, body, headers)
+            except _STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                conn.close()
+                conn = self._ensure_connected(None, timeout)
+                status, data = self._send(conn, method, path, body, headers)
+        except BaseException:
+            if conn is not None:
+                conn.close()
+            self._pool.put(None)
+            raise
+        self._pool.put(conn)
+
+        if status >= 500:
+            raise LLMUnavailableError(f"LLM server error {status}: {data[:200]!r}")
+        decoded = json.loads(data) if data else {}
+        if status >= 400:
+            raise RuntimeError(decoded.get("error", f"HTTP {status}"))
+        return decoded
+
+    def _ensure_connected(
+        self, conn: Optional[http.client.HTTPConnection], timeout: float
+    ) -> http.client.HTTPConnection:
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout)
+        if conn.sock is None:
+            conn.timeout = self.connect_timeout
+            conn.connect()
+        conn.sock.settimeout(timeout)
+        return conn
+
+    @staticmethod
+    def _send(conn, method, path, body, headers):
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        data = resp.read()
+        if resp.will_close:
+            conn.close()
+        return resp.status, data
+
+
+# ---------------------------------------------------------------------------
+# Shared instance
+# ---------------------------------------------------------------------------
+
+_shared_client: Optional[OllamaClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_client(**kwargs) -> OllamaClient:
+    """
+    Return the process-wide OllamaClient, creating it on first use.
+
+    Keyword arguments (host, pool_size, request_timeout, ...) only take effect
+    on the first call; later callers share the same pool and circuit.
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = OllamaClient(**kwargs)
+        return _shared_client
@@ -0,0 +1,115 @@
+"""
+API Middleware
+--------------
+ASGI middleware for the DecisionForge API.
+
+Design Trade-offs:
+  - Plain ASGI classes instead of BaseHTTPMiddleware: no extra task or body
+    buffering per request, which matters at sub-millisecond handler times.
+  - Endpoints are labelled by route template (e.g. /api/v1/decide), and
+    anything that did not match a route is collapsed into "unmatched", so
+    scanners cannot blow up metric cardinality.
+  - Admission control sits inside the metrics middleware, so shed requests
+    still show up in the request counters (status 503) and latency histograms.
+"""
+
+import json
+import math
+import time
+from types import SimpleNamespace
+
+from app.ai.admission import AdmissionController, _deadline, _degraded
+from app.core.metrics import MetricsRegistry, default_registry
+
+
+class MetricsMiddleware:
+    """Per-endpoint request counters and end-to-end latency histograms."""
+
+    def __init__(self, app, metrics: MetricsRegistry = None):
+        self.app = app
+        self.metrics = metrics or default_registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            self.metrics.histogram("http_request_latency_ms", endpoint=endpoint).observe(
+                (time.perf_counter() - start) * 1000
+            )
+            self.metrics.counter(
+                "http_requests", endpoint=endpoint, method=scope["method"], status=str(status)
+            ).inc()
+
+
+class AdmissionControlMiddleware:
+    """
+    Concurrency limit, bounded queue and deadlines for the controller's paths.
+
+    Shed requests get 503 with Retry-After and an `X-Shed-Reason` header
+    (queue_full | deadline) without the handler running. Admitted requests
+    carry their deadline and degraded flag in context variables
+    (app.ai.admission.remaining_ms / is_degraded).
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if not controller.applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        deadline = controller.deadline(scope["headers"], time.monotonic())
+        reason = await controller.acquire(deadline)
+        if reason is not None:
+            # Never routed; label it by path (controlled paths are exact route templates)
+            scope["route"] = SimpleNamespace(path=scope["path"])
+            await self._reject(send, reason)
+            return
+
+        controller.admitted += 1
+        degraded = controller.should_degrade(deadline)
+        if degraded:
+            controller.degraded += 1
+            controller.metrics.counter("admission_degraded").inc()
+        deadline_token = _deadline.set(deadline)
+        degraded_token = _degraded.set(degraded)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(deadline_token)
+            _degraded.reset(degraded_token)
+            controller.release(time.perf_counter() - start)
+
+    async def _reject(self, send, reason: str) -> None:
+        retry_after = max(1, math.ceil(self.controller.service_s * (self.controller.max_queue + 1) / self.controller.max_concurrency))
+        body = json.dumps({"detail": f"Server overloaded, request shed ({reason})."}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(retry_after).encode("ascii")),
+                (b"x-shed-reason", reason.encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
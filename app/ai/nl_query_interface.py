@@ -1,24 +1,172 @@
 """
 Natural Language Query Interface (Ollama version)
+
+The LLM only translates a question into a query spec over the decision
+store; the answer itself is computed locally from indexed data.
 """
 
-from typing import Dict, Any
-import ollama
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from app.ai.llm_client import OllamaClient, get_client
+from app.core.decision_store import (
+    METRICS,
+    NUMERIC_FIELDS,
+    OPERATORS,
+    SCHEMA_DESCRIPTION,
+    TIME_RANGES,
+    validate_query,
+)
 
 
 class NLQueryInterface:
     """Natural language interface using Ollama."""
-    
-    def __init__(self, ai_engine, model: str = "llama3.2"):
+
+    def __init__(
+        self,
+        ai_engine,
+        model: str = "llama3.2",
+        client: Optional[OllamaClient] = None,
+        timeout: Optional[float] = None,
+        cache_size: int = 256,
+        result_ttl: float = 30.0
+    ):
+        """
+        Args:
+            ai_engine  : AIEnhancedDecisionEngine whose `decision_store` is queried
+            cache_size : number of distinct questions to cache
+            result_ttl : seconds a cached answer stays valid, i.e. how far an
+                         answer may lag newly stored decisions (answers are
+                         dropped at once when the store is cleared)
+        """
         self.ai_engine = ai_engine
         self.model = model
-    
+        self.client = client or get_client()
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.result_ttl = result_ttl
+        self._spec_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._result_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
     def query(self, natural_language_query: str) -> Dict[str, Any]:
-        """Process a natural language query."""
-        
+        """
+        Process a natural language query.
+
+        Data questions ("how many FLAGs yesterday with anomaly > 0.9") are
+        translated into a validated query and answered exactly from the
+        decision store. Anything that cannot be translated falls back to a
+        general LLM answer.
+        """
+        store = getattr(self.ai_engine, 'decision_store', None)
+        key = ' '.join(natural_language_query.lower().split())
+
+        if store is not None:
+            cached = self._result_cache.get(key)
+            if cached and cached[0] == store.version and time.monotonic() - cached[1] < self.result_ttl:
+                self._result_cache.move_to_end(key)
+                return dict(cached[2], cached=True)
+
+            spec = self._translate(key, natural_language_query)
+            if spec is not None:
+                result = store.run_query(spec)
+                response = {
+                    "query": natural_language_query,
+                    "response": self._format_answer(result),
+                    "result": result['value'],
+                    "query_spec": result['spec'],
+                    "type": "data",
+                    "success": True
+                }
+                self._remember(self._result_cache, key, (store.version, time.monotonic(), response))
+                return response
+
+        return self._general_answer(natural_language_query)
+
+    # ------------------------------------------------------------------
+    # Translation
+    # ------------------------------------------------------------------
+
+    def _translate(self, key: str, natural_language_query: str) -> Optional[Dict[str, Any]]:
+        """Ask the LLM for a query spec; None if it is not a data question."""
+        if key in self._spec_cache:
+            self._spec_cache.move_to_end(key)
+            return self._spec_cache[key]
+
+        prompt = f"""Translate the question into a JSON query over this table.
+
+{SCHEMA_DESCRIPTION}
+
+Reply with ONLY a JSON object of this shape:
+{{"metric": one of {list(METRICS)},
+  "field": one of {list(NUMERIC_FIELDS)} (omit for "count"),
+  "filters": [{{"field": ..., "op": one of {list(OPERATORS)}, "value": ...}}],
+  "time_range": one of {list(TIME_RANGES)},
+  "group_by": null or "decision"}}
+
+If the question cannot be answered from this table, reply with {{"unsupported": true}}.
+
+Question: {natural_language_query}"""
+
+        try:
+            response = self.client.chat(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                timeout=self.timeout,
+                options={"temperature": 0}
+            )
+            spec = self._extract_json(response['message']['content'])
+            spec = None if spec is None or spec.get('unsupported') else validate_query(spec)
+        except Exception:
+            # Unreachable LLM or an invalid spec: do not cache, fall back
+            return None
+
+        self._remember(self._spec_cache, key, spec)
+        return spec
+
+    @staticmethod
+    def _extract_json(text: str) -> Optional[Dict[str, Any]]:
+        """Pull the first JSON object out of an LLM reply (tolerates code fences)."""
+        match = re.search(r'\{.*\}', text, re.DOTALL)
+        if not match:
+            return None
+        return json.loads(match.group(0))
+
+    def _remember(self, cache: OrderedDict, key: str, value: Any) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Answers
+    # ------------------------------------------------------------------
+
+    def _format_answer(self, result: Dict[str, Any]) -> str:
+        """Render an exact, deterministic answer from a query result."""
+        spec = result['spec']
+        what = 'decisions' if spec['metric'] == 'count' else f"{spec['metric']} of {spec['field']}"
+        conditions = [f"{f['field']} {f['op']} {f['value']}" for f in spec['filters']]
+        if spec['time_range'] != 'all':
+            conditions.append(spec['time_range'].replace('_', ' '))
+        scope = f" ({', '.join(conditions)})" if conditions else ""
+
+        value = result['value']
+        if isinstance(value, dict):
+            if not value:
+                return f"No matching decisions{scope}."
+            breakdown = ', '.join(f"{k}: {v}" for k, v in value.items())
+            return f"{what.capitalize()} by decision{scope}: {breakdown}."
+        if value is None:
+            return f"No matching decisions{scope}."
+        return f"{what.capitalize()}{scope}: {value}."
+
+    def _general_answer(self, natural_language_query: str) -> Dict[str, Any]:
+        """Free-form LLM answer for questions the store cannot answer."""
         # Get context
         history_summary = self.ai_engine.get_decision_history_summary()
-        
+
         prompt = f"""Answer this question about a customer decision system:
 
 Question: {natural_language_query}
@@ -31,22 +179,23 @@ System Context:
 Provide a clear, helpful answer in 2-3 sentences."""
 
         try:
-            response = ollama.chat(
+            response = self.client.chat(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                timeout=self.timeout
             )
-            
+
             return {
                 "query": natural_language_query,
                 "response": response['message']['content'],
                 "type": "general",
                 "success": True
             }
-        
+
         except Exception as e:
             return {
                 "query": natural_language_query,
                 "response": f"Error: {e}",
                 "type": "error",
                 "success": False
-            }
\ No newline at end of file
+            }
@@ -0,0 +1,163 @@
+"""
+Streaming Micro-Batcher
+-----------------------
+Per-connection batching for the persistent decision stream
+(`/api/v1/decide/stream`).
+
+A client pipelines many requests over one WebSocket. The reader puts them
+on a bounded queue. The batcher takes whatever is queued (up to
+`max_batch`, waiting at most `max_wait_ms` for more) and scores that batch
+in the threadpool. Up to `max_inflight` batches run at once. Each batch's
+responses go out as soon as that batch finishes, so responses can arrive
+out of order and clients match them by id.
+
+Design Trade-offs:
+  - Batches form by themselves: while every in-flight slot is busy, new
+    requests queue up, and the next batch takes all of them. Light traffic
+    gets one-request batches with no added delay. Heavy traffic gets large
+    vectorized batches. `max_wait_ms` > 0 trades latency for even larger
+    batches.
+  - The bounded queue applies backpressure. Once `max_pending` requests are
+    waiting, the reader stops reading the socket, and TCP flow control
+    slows the client down. Server memory stays bounded.
+  - The wait is a plain sleep followed by a non-blocking drain, not
+    wait_for(queue.get()). A timed-out get can drop an item on some Python
+    versions.
+  - A batch that fails is answered with an error for each of its items
+    (`on_error`), so pipelining clients never wait forever for those ids.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+
+_CLOSE = object()
+
+
+class MicroBatcher:
+    """
+    Collects one connection's requests into batches scored off the event loop.
+
+    Usage:
+        batcher = MicroBatcher(score_batch, emit)
+        runner = asyncio.create_task(batcher.run())
+        await batcher.put(item)            # per incoming request
+        await batcher.close(); await runner
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Any],
+        emit: Callable[[Any], Awaitable[None]],
+        on_error: Optional[Callable[..., Any]] = None,
+        max_batch: int = 256,
+        max_wait_ms: float = 0.0,
+        max_inflight: int = 4,
+        max_pending: int = 4096,
+    ):
+        """
+        Args:
+            process      : blocking function, list of items → result (run in the threadpool)
+            emit         : coroutine that sends one batch's result to the client
+            on_error     : (batch, exception) → error result emitted instead of a failed batch
+            max_batch    : items per batch
+            max_wait_ms  : extra time to wait for a batch to fill (0 = take what is queued)
+            max_inflight : batches scored concurrently
+            max_pending  : queued items before the reader is paused
+        """
+        self.process = process
+        self.emit = emit
+        self.on_error = on_error
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.send_errors = 0
+
+    async def put(self, item: Any) -> None:
+        await self._queue.put(item)
+
+    async def close(self) -> None:
+        """Stop after everything already queued has been scored and emitted."""
+        await self._queue.put(_CLOSE)
+
+    async def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        emit: Optional[Callable] = None,
+        on_error: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        """
+        Run one pre-batched job (e.g. a binary frame) under the same in-flight limit.
+
+        If fn raises, on_error(*args, exception) gives the result emitted instead.
+        """
+        await self._slots.acquire()
+        self._spawn(fn, args, emit or self.emit, on_error)
+
+    def _spawn(self, fn, args, emit, on_error) -> None:
+        task = asyncio.create_task(self._run_job(fn, args, emit, on_error))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_job(self, fn, args, emit, on_error) -> None:
+        try:
+            try:
+                result = await run_in_threadpool(fn, *args)
+            except Exception as exc:
+                self.errors += 1
+                if on_error is None:
+                    return
+                result = on_error(*args, exc)
+            await emit(result)
+        except Exception:  # a closed socket (or a failing on_error) must not stop the stream
+            self.send_errors += 1
+        finally:
+            self._slots.release()
+
+    async def run(self) -> None:
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is _CLOSE:
+                break
+            batch = [item]
+            closing = self._drain(batch)
+            if not closing and self.max_wait > 0 and len(batch) < self.max_batch:
+                await asyncio.sleep(self.max_wait)
+                closing = self._drain(batch)
+
+            await self._slots.acquire()
+            self.batches += 1
+            self.items += len(batch)
+            self._spawn(self.process, (batch,), self.emit, self.on_error)
+
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def _drain(self, batch: List[Any]) -> bool:
+        """Move already-queued items into batch; True if the close marker was reached."""
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return False
+            if item is _CLOSE:
+                return True
+            batch.append(item)
+        return False
+
+    def get_stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "errors": self.errors,
+            "send_errors": self.send_errors,
+        }
@@ -0,0 +1,204 @@
+"""
+Windowed Decision Analytics
+---------------------------
+Per-minute, per-hour and per-day buckets of decision statistics.
+
+Design Trade-offs:
+  - Each bucket is one fixed-width float vector (decision counts, expected
+    value sum, churn/anomaly histograms), so merging buckets is a vector sum.
+  - Arbitrary windows are answered by covering them with the coarsest whole
+    buckets available and filling the edges with finer ones. A query touches
+    at most a few hundred bucket rows, never raw records.
+  - Resolution degrades with age: minute precision for the last
+    `minute_slots` minutes, hour precision for the last `hour_slots` hours,
+    day precision after that. Older edges are snapped outward to the
+    enclosing coarser bucket.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.core.records import DecisionCode
+
+N_CODES = len(DecisionCode)
+N_BINS = 10
+EV_COL = N_CODES
+CHURN_COLS = slice(N_CODES + 1, N_CODES + 1 + N_BINS)
+ANOMALY_COLS = slice(N_CODES + 1 + N_BINS, N_CODES + 1 + 2 * N_BINS)
+ROW_WIDTH = N_CODES + 1 + 2 * N_BINS
+
+
+class _BucketRing:
+    """Fixed number of time buckets of one width, reused round-robin."""
+
+    def __init__(self, width: int, slots: int):
+        self.width = width
+        self.slots = slots
+        self.rows = np.zeros((slots, ROW_WIDTH), dtype=np.float64)
+        # Absolute bucket index held by each slot (-1 = empty)
+        self.ids = np.full(slots, -1, dtype=np.int64)
+        self.latest = -1
+
+    def add(self, idx: np.ndarray, rows: np.ndarray) -> None:
+        slot = idx % self.slots
+        stale = self.ids[slot] < idx
+        if stale.any():
+            # The newest bucket index claims each slot; older ones are dropped
+            newest = np.full(self.slots, -1, dtype=np.int64)
+            np.maximum.at(newest, slot[stale], idx[stale])
+            touched = np.unique(slot[stale])
+            self.rows[touched] = 0.0
+            self.ids[touched] = newest[touched]
+        keep = self.ids[slot] == idx
+        np.add.at(self.rows, slot[keep], rows[keep])
+        self.latest = max(self.latest, int(idx.max()))
+
+    def collect(self, lo: int, hi: int) -> np.ndarray:
+        """Sum of buckets with index in [lo, hi)."""
+        mask = (self.ids >= lo) & (self.ids < hi)
+        return self.rows[mask].sum(axis=0)
+
+    def oldest_retained(self) -> int:
+        return self.latest - self.slots + 1
+
+
+class WindowedAggregator:
+    """
+    Rolling decision statistics queryable over arbitrary time windows.
+
+    Usage:
+        agg = WindowedAggregator()
+        agg.record("INTERVENE", expected_value=12.5, churn_probability=0.8, anomaly_score=0.1)
+        agg.query(window_seconds=3600)   # last hour
+    """
+
+    def __init__(self, minute_slots: int = 180, hour_slots: int = 72, day_slots: int = 90):
+        """
+        Args:
+            minute_slots : minutes kept at minute resolution (default 3 hours)
+            hour_slots   : hours kept at hour resolution (default 3 days)
+            day_slots    : days kept at day resolution (default 90 days)
+        """
+        # Ordered coarse → fine
+        self._levels = [
+            _BucketRing(86400, day_slots),
+            _BucketRing(3600, hour_slots),
+            _BucketRing(60, minute_slots),
+        ]
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Insert
+    # ------------------------------------------------------------------
+
+    def record(
+        self,
+        decision: str,
+        expected_value: float = 0.0,
+        churn_probability: float = 0.0,
+        anomaly_score: float = 0.0,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Add one decision to the current buckets."""
+        self.record_batch(
+            np.array([DecisionCode[decision]]),
+            np.array([expected_value or 0.0]),
+            np.array([churn_probability or 0.0]),
+            np.array([anomaly_score or 0.0]),
+            np.array([time.time() if timestamp is None else timestamp]),
+        )
+
+    def record_batch(
+        self,
+        codes: np.ndarray,
+        expected_value: np.ndarray,
+        churn_probability: np.ndarray,
+        anomaly_score: np.ndarray,
+        timestamps: np.ndarray,
+    ) -> None:
+        """Add many decisions at once (arrays of equal length)."""
+        n = len(codes)
+        if n == 0:
+            return
+        rows = np.zeros((n, ROW_WIDTH), dtype=np.float64)
+        ar = np.arange(n)
+        rows[ar, np.asarray(codes, dtype=np.int64)] = 1.0
+        rows[:, EV_COL] = expected_value
+        rows[ar, CHURN_COLS.start + _bin(churn_probability)] = 1.0
+        rows[ar, ANOMALY_COLS.start + _bin(anomaly_score)] = 1.0
+        ts = np.asarray(timestamps, dtype=np.float64)
+
+        with self._lock:
+            for level in self._levels:
+                level.add((ts // level.width).astype(np.int64), rows)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        window_seconds: Optional[float] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Statistics for [start, end), or for the last `window_seconds`.
+
+        Returns counts per decision, expected value totals, intervention and
+        flag rates, and 10-bin histograms of churn probability and anomaly score.
+        """
+        end = time.time() if end is None else end
+        if start is None:
+            start = end - (window_seconds if window_seconds is not None else 3600)
+        with self._lock:
+            row = self._span(start, end, 0) if end > start else np.zeros(ROW_WIDTH)
+        return self._format(row, start, end)
+
+    def _span(self, start: float, end: float, li: int) -> np.ndarray:
+        level = self._levels[li]
+        w = level.width
+        finest = li == len(self._levels) - 1
+        if finest or math.floor(start / self._levels[li + 1].width) < self._levels[li + 1].oldest_retained():
+            # Finest level, or the finer level no longer holds this range:
+            # snap outward to whole buckets at this resolution
+            return level.collect(math.floor(start / w), math.ceil(end / w))
+
+        lo, hi = math.ceil(start / w), math.floor(end / w)
+        if lo >= hi:
+            return self._span(start, end, li + 1)
+        total = level.collect(lo, hi)
+        if start < lo * w:
+            total = total + self._span(start, lo * w, li + 1)
+        if hi * w < end:
+            total = total + self._span(hi * w, end, li + 1)
+        return total
+
+    @staticmethod
+    def _format(row: np.ndarray, start: float, end: float) -> Dict[str, Any]:
+        counts = {code.name: int(row[code]) for code in DecisionCode}
+        total = sum(counts.values())
+        ev_sum = float(row[EV_COL])
+        edges = [round(i / N_BINS, 2) for i in range(N_BINS + 1)]
+        return {
+            "window_start": start,
+            "window_end": end,
+            "total_decisions": total,
+            "decision_breakdown": {k: v for k, v in counts.items() if v},
+            "total_expected_value": round(ev_sum, 2),
+            "average_value": round(ev_sum / total, 2) if total else 0.0,
+            "intervention_rate": round(counts["INTERVENE"] / total, 4) if total else 0.0,
+            "flag_rate": round(counts["FLAG"] / total, 4) if total else 0.0,
+            "histogram_edges": edges,
+            "churn_histogram": row[CHURN_COLS].astype(int).tolist(),
+            "anomaly_histogram": row[ANOMALY_COLS].astype(int).tolist(),
+        }
+
+
+def _bin(values: np.ndarray) -> np.ndarray:
+    """Map scores in [0, 1] to histogram bin indices 0..N_BINS-1."""
+    return np.clip((np.asarray(values, dtype=np.float64) * N_BINS).astype(np.int64), 0, N_BINS - 1)
@@ -1,11 +1,39 @@
 import json
 from datetime import datetime
 
+import numpy as np
+
+from app.core.records import DecisionCode, DecisionRecord
+
 class AuditLogger:
     def log(self, inputs, decision):
+        if isinstance(decision, DecisionRecord):
+            # Built from the record fields: the reason stays an unrendered template + args
+            template, args = decision.reason_parts
+            decision_json = (
+                f'{{"decision": "{decision.decision}", "reason": {json.dumps(template)}, '
+                f'"reason_args": {json.dumps(args, default=float)}, '
+                f'"expected_value": {json.dumps(decision.expected_value)}, "latency_ms": {json.dumps(decision.latency_ms)}}}'
+            )
+        else:
+            decision_json = json.dumps(decision)
+        print(
+            f'[AUDIT] {{"timestamp": "{datetime.utcnow().isoformat()}", '
+            f'"inputs": {json.dumps(inputs)}, "decision": {decision_json}}}'
+        )
+
+    def log_batch(self, columns, result):
+        """One record per batch: input columns and decisions as per-row lists."""
+        codes = np.asarray(result["decision_code"])
         record = {
             "timestamp": datetime.utcnow().isoformat(),
-            "inputs": inputs,
-            "decision": decision,
+            "rows": int(len(codes)),
+            "inputs": {name: np.asarray(column).tolist() for name, column in columns.items()},
+            "decisions": {
+                "decision": [DecisionCode(code).name for code in codes.tolist()],
+                "expected_value": np.asarray(result["expected_value"]).tolist(),
+            },
         }
-        print(f"[AUDIT] {json.dumps(record)}")
\ No newline at end of file
+        if "budget_deferred" in result:
+            record["decisions"]["budget_deferred"] = np.asarray(result["budget_deferred"]).tolist()
+        print(f"[AUDIT] {json.dumps(record, default=str)}")
\ No newline at end of file
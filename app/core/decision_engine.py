@@ -20,11 +20,29 @@ System Design Trade-offs
 
 4. Audit Log
    - Every decision is logged with inputs + rationale.
-   - Adds ~0.5ms overhead per request but is mandatory for compliance.
+   - Adds overhead per request but is mandatory for compliance.
+
+5. Pluggable Rules
+   - A `rules:` config section (app.core.rules) is compiled once into an
+     ordered plan around the built-in gate and ROI steps. Without it,
+     decide() keeps the fixed gate → ROI path with no extra branches.
+
+6. Instrumentation
+   - Security gate, ROI and audit stages are timed into fixed-bucket
+     histograms (app.core.metrics); get_latency_profile() reports the
+     measured p50/p95/p99/p999 rather than estimates.
 """
 
 import time
+from typing import Optional
+
+import numpy as np
+
+from app.core.budget import allocate_budget, summarize
+from app.core.metrics import MetricsRegistry, default_registry
+from app.core.records import DecisionCode, DecisionRecord
 from app.core.roi import ROICalculator
+from app.core.rules import RulePlan
 from app.core.security import SecurityGate
 from app.core.audit import AuditLogger
 
@@ -37,19 +55,36 @@ class DecisionEngine:
         1. Security Gate  — block or flag suspicious behavior first
         2. ROI Check      — only intervene if expected value is positive
         3. Default        — do nothing
+
+    Tenant rules from the `rules:` config section are evaluated around these
+    steps in the configured order (see app.core.rules).
     """
 
-    def __init__(self, config: dict):
+    # Histogram family shared with the API's model/serialization stages
+    STAGE_METRIC = "decision_stage_latency_ms"
+
+    def __init__(self, config: dict, metrics: MetricsRegistry = None):
         """
         Args:
-            config : loaded YAML config dict containing thresholds and costs
+            config  : loaded YAML config dict containing thresholds and costs
+            metrics : registry for stage timings (process-wide default if None)
         """
         self.config = config
         self.roi_calculator = ROICalculator(config)
         self.security_gate = SecurityGate(config)
         self.audit_logger = AuditLogger()
+        self.metrics = metrics or default_registry
+        self._gate_hist = self.metrics.histogram(self.STAGE_METRIC, stage="security_gate")
+        self._roi_hist = self.metrics.histogram(self.STAGE_METRIC, stage="roi")
+        self._audit_hist = self.metrics.histogram(self.STAGE_METRIC, stage="audit")
+        self.rule_plan = (
+            RulePlan.from_config(config, self.security_gate, self.roi_calculator, metrics=self.metrics)
+            if config.get("rules") else None
+        )
+        if self.rule_plan is not None:
+            self._rules_hist = self.metrics.histogram(self.STAGE_METRIC, stage="rules")
 
-    def decide(self, inputs: dict) -> dict:
+    def decide(self, inputs: dict, audit: bool = True) -> DecisionRecord:
         """
         Make a real-time decision for a single user.
 
@@ -59,67 +94,190 @@ class DecisionEngine:
                 - expected_lift      (float)  : estimated retention lift from intervention
                 - anomaly_score      (float)  : 0–1, higher = more suspicious
                 - request_count_today(int)    : raw request volume feature
+                - requests_last_minute / requests_last_hour (optional) :
+                      server-side counts checked against `rate_limits:`
+            audit  : False when the caller may still change the decision (e.g. a
+                     budget) and calls audit() with the one it actually serves
 
         Returns:
-            dict with keys:
+            DecisionRecord, readable like a dict with keys:
                 - decision       : "INTERVENE" | "DO_NOTHING" | "FLAG"
-                - reason         : human-readable explanation string
+                - reason         : human-readable explanation string (rendered lazily)
                 - expected_value : estimated $ value of the decision
                 - latency_ms     : time taken for this decision in milliseconds
         """
         start_time = time.perf_counter()
+        if self.rule_plan is not None:
+            return self._decide_with_rules(inputs, start_time, audit)
 
         # --- Step 1: Security Gate ---
-        security_result = self.security_gate.evaluate(inputs)
-        if security_result["action"] in ("BLOCK", "FLAG"):
-            decision = {
-                "decision": "FLAG",
-                "reason": security_result["reason"],
-                "expected_value": 0.0,
-            }
-            latency_ms = round((time.perf_counter() - start_time) * 1000, 3)
-            decision["latency_ms"] = latency_ms
-            self.audit_logger.log(inputs, decision)
+        flag = self.security_gate.flag_reason(inputs)
+        gate_done = time.perf_counter()
+        self._gate_hist.observe((gate_done - start_time) * 1000)
+        if flag is not None:
+            decision = DecisionRecord(
+                DecisionCode.FLAG,
+                0.0,
+                round((gate_done - start_time) * 1000, 3),
+                *flag,
+            )
+            if audit:
+                self.audit(inputs, decision)
             return decision
 
         # --- Step 2: ROI Check ---
-        roi_result = self.roi_calculator.evaluate(inputs)
-        if roi_result["roi_positive"]:
-            decision = {
-                "decision": "INTERVENE",
-                "reason": roi_result["reason"],
-                "expected_value": roi_result["expected_value"],
-            }
-        else:
-            decision = {
-                "decision": "DO_NOTHING",
-                "reason": roi_result["reason"],
-                "expected_value": roi_result["expected_value"],
-            }
+        expected_value = self.roi_calculator.expected_value(
+            inputs.get("churn_probability", 0), inputs.get("expected_lift", 0)
+        )
+        roi_positive = expected_value > 0
 
         # --- Step 3: Record latency ---
-        latency_ms = round((time.perf_counter() - start_time) * 1000, 3)
-        decision["latency_ms"] = latency_ms
+        roi_done = time.perf_counter()
+        self._roi_hist.observe((roi_done - gate_done) * 1000)
+        decision = DecisionRecord(
+            DecisionCode.INTERVENE if roi_positive else DecisionCode.DO_NOTHING,
+            round(expected_value, 2),
+            round((roi_done - start_time) * 1000, 3),
+            self.roi_calculator.POSITIVE_REASON if roi_positive else self.roi_calculator.NEGATIVE_REASON,
+            (expected_value,),
+        )
 
         # --- Step 4: Audit ---
-        self.audit_logger.log(inputs, decision)
+        if audit:
+            self.audit(inputs, decision)
 
         return decision
 
+    def _decide_with_rules(self, inputs: dict, start_time: float, audit: bool = True) -> DecisionRecord:
+        code, expected_value, reason, reason_args, _ = self.rule_plan.evaluate(inputs)
+        done = time.perf_counter()
+        self._rules_hist.observe((done - start_time) * 1000)
+        decision = DecisionRecord(code, expected_value, round((done - start_time) * 1000, 3), reason, reason_args)
+        if audit:
+            self.audit(inputs, decision)
+        return decision
+
+    def audit(self, inputs: dict, decision: DecisionRecord) -> None:
+        """Write one decision to the audit log (timed as the audit stage)."""
+        start = time.perf_counter()
+        self.audit_logger.log(inputs, decision)
+        self._audit_hist.observe((time.perf_counter() - start) * 1000)
+
+    def audit_batch(self, columns: dict, result: dict) -> None:
+        """
+        Audit a decide_batch() result as one record with per-row columns.
+
+        decide_batch() itself does not audit, since offline and simulation
+        callers score millions of rows. Serving paths call this for every
+        batch they return.
+        """
+        start = time.perf_counter()
+        self.audit_logger.log_batch(columns, result)
+        n = len(result["decision_code"])
+        if n:
+            self._audit_hist.observe((time.perf_counter() - start) * 1000 / n, count=n)
+
+    def decide_batch(
+        self,
+        churn_probability,
+        expected_lift,
+        anomaly_score,
+        request_count_today,
+        budget: Optional[float] = None,
+        **columns,
+    ) -> dict:
+        """
+        Vectorized decisions for many users at once (offline/bulk path).
+
+        Applies the same hierarchy as decide() with array operations. Nothing
+        is audited here; serving paths call audit_batch() on the result.
+
+        Args:
+            churn_probability, expected_lift, anomaly_score, request_count_today :
+                equal-length array-likes, one entry per user
+            budget  : optional campaign budget. If the INTERVENE rows would cost
+                more than this, only the set with the highest expected value
+                is funded (see app.core.budget), and the rest become DO_NOTHING
+            columns : extra per-user fields referenced by `rules:` (e.g. segment)
+
+        Returns:
+            dict with keys:
+                - decision_code  : uint8 array of DecisionCode values
+                - expected_value : float array ($0.00 for flagged rows)
+                - budget_deferred : bool array of INTERVENE rows not funded (budget only)
+                - budget          : spend / value summary (budget only)
+        """
+        churn_probability = np.asarray(churn_probability, dtype=np.float64)
+        expected_lift = np.asarray(expected_lift, dtype=np.float64)
+        anomaly_score = np.asarray(anomaly_score, dtype=np.float64)
+        request_count_today = np.asarray(request_count_today, dtype=np.float64)
+
+        if self.rule_plan is not None:
+            result = self.rule_plan.evaluate_batch({
+                **columns,
+                "churn_probability": churn_probability,
+                "expected_lift": expected_lift,
+                "anomaly_score": anomaly_score,
+                "request_count_today": request_count_today,
+            })
+            del result["rule_index"]
+            return self._apply_budget(result, budget)
+
+        flagged = self.security_gate.flag_batch(
+            anomaly_score,
+            request_count_today,
+            _optional_column(columns, "requests_last_minute"),
+            _optional_column(columns, "requests_last_hour"),
+        )
+        raw_value = self.roi_calculator.expected_value_batch(churn_probability, expected_lift)
+
+        codes = np.where(
+            raw_value > 0, DecisionCode.INTERVENE, DecisionCode.DO_NOTHING
+        ).astype(np.uint8)
+        codes[flagged] = DecisionCode.FLAG
+        expected_value = np.round(raw_value, 2)
+        expected_value[flagged] = 0.0
+
+        return self._apply_budget({"decision_code": codes, "expected_value": expected_value}, budget)
+
+    def _apply_budget(self, result: dict, budget: Optional[float]) -> dict:
+        if budget is None:
+            return result
+        codes, cost = result["decision_code"], self.roi_calculator.cost
+        intervene = codes == DecisionCode.INTERVENE
+        funded = allocate_budget(np.where(intervene, result["expected_value"], 0.0), budget, cost)
+        deferred = intervene & ~funded
+        codes[deferred] = DecisionCode.DO_NOTHING
+        result["budget_deferred"] = deferred
+        result["budget"] = {
+            **summarize(funded, result["expected_value"], cost, budget),
+            "deferred": int(deferred.sum()),
+        }
+        return result
+
+    def get_rule_stats(self) -> dict:
+        """Per-rule hit counts and sampled timings (empty without `rules:`)."""
+        return self.rule_plan.get_stats() if self.rule_plan is not None else {"rules": [], "decisions": 0}
+
     def get_latency_profile(self) -> dict:
         """
-        Return system design notes on latency vs accuracy trade-offs.
+        Return measured per-stage latency percentiles (milliseconds).
+
+        Covers the engine's own stages plus any stages the API records into
+        the same registry (feature engineering, model scoring, serialization).
         Useful for API /health and /metrics endpoints.
         """
         return {
-            "model_inference_ms": "~0.1–2ms (Logistic Regression + Isolation Forest)",
-            "roi_calc_ms": "~0.01ms",
-            "security_gate_ms": "~0.01ms",
-            "audit_log_ms": "~0.5ms",
-            "total_p99_ms": "~5ms",
+            "stages": self.metrics.snapshot(self.STAGE_METRIC, "stage"),
+            "unit": "ms",
             "trade_off_note": (
                 "Chosen models optimize for latency. Switching to XGBoost would "
                 "improve F1 by ~5–10% but increase inference latency to ~10–20ms. "
                 "Acceptable for batch use cases, not for <5ms SLA requirements."
             ),
-        }
\ No newline at end of file
+        }
+
+
+def _optional_column(columns: dict, name: str):
+    column = columns.get(name)
+    return None if column is None else np.asarray(column, dtype=np.float64)
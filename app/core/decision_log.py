@@ -0,0 +1,294 @@
+"""
+Decision Log
+------------
+Compact, replayable binary log of every decision.
+
+File layout:
+    b"DFLOG" | uint8 format version | uint32 header length | JSON header | records...
+
+Each record is a fixed-width little-endian struct (RECORD_DTYPE), so a log
+is read back as a numpy structured array via memmap. Columns are available
+without parsing, and a day of traffic streams in large chunks.
+
+Design Trade-offs:
+  - Fixed-width rows over JSON lines: ~90 bytes/decision and zero-copy reads,
+    at the cost of truncating user_id to 32 bytes.
+  - The server-side rate counts the gate saw (requests_last_minute/hour,
+    -1 = not tracked) are stored so replay reproduces `rate_limits:` flags.
+    Version 1 logs, written without them, still read; the writer moves a v1
+    file aside (`<path>.v1`) instead of appending rows of another layout.
+  - Writes are buffered and flushed every `flush_every` records or
+    `flush_interval` seconds, so a crash can lose at most that much. A
+    daemon thread enforces the interval when no new records arrive.
+  - A crash mid-write can leave a partial record at the end. Reopening for
+    append truncates the file to whole records first, otherwise every
+    later record would be read misaligned.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"DFLOG"
+FORMAT_VERSION = 2
+
+RECORD_DTYPE_V1 = np.dtype([
+    ("timestamp", "<f8"),
+    ("user_id", "S32"),
+    ("tenure", "<f4"),
+    ("monthly_charges", "<f4"),
+    ("request_count_today", "<i4"),
+    ("login_attempts", "<i4"),
+    ("churn_probability", "<f4"),
+    ("expected_lift", "<f4"),
+    ("anomaly_score", "<f4"),
+    ("decision", "u1"),
+    ("expected_value", "<f4"),
+    ("config_version", "S12"),
+    ("model_version", "S16"),
+])
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("user_id", "S32"),
+    ("tenure", "<f4"),
+    ("monthly_charges", "<f4"),
+    ("request_count_today", "<i4"),
+    ("login_attempts", "<i4"),
+    ("requests_last_minute", "<i4"),
+    ("requests_last_hour", "<i4"),
+    ("churn_probability", "<f4"),
+    ("expected_lift", "<f4"),
+    ("anomaly_score", "<f4"),
+    ("decision", "u1"),
+    ("expected_value", "<f4"),
+    ("config_version", "S12"),
+    ("model_version", "S16"),
+])
+
+_DTYPES = {1: RECORD_DTYPE_V1, FORMAT_VERSION: RECORD_DTYPE}
+RATE_COLS = ("requests_last_minute", "requests_last_hour")
+
+
+def config_version(config: Dict[str, Any]) -> str:
+    """Short stable hash of a config dict (key order independent)."""
+    payload = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+def _header_bytes() -> bytes:
+    header = json.dumps({
+        "format_version": FORMAT_VERSION,
+        "dtype": [list(field) for field in RECORD_DTYPE.descr],
+    }).encode("utf-8")
+    return MAGIC + struct.pack("<BI", FORMAT_VERSION, len(header)) + header
+
+
+def _read_header(f) -> Tuple[int, int]:
+    """Validate the header and return (format version, byte offset of the first record)."""
+    prefix = f.read(len(MAGIC) + 5)
+    if len(prefix) < len(MAGIC) + 5 or prefix[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a DecisionForge decision log")
+    version, header_len = struct.unpack("<BI", prefix[len(MAGIC):])
+    header = json.loads(f.read(header_len))
+    if version not in _DTYPES or [tuple(x) for x in header["dtype"]] != _DTYPES[version].descr:
+        raise ValueError(f"Unsupported decision log format version {version}")
+    return version, len(MAGIC) + 5 + header_len
+
+
+class DecisionLogWriter:
+    """
+    Thread-safe, buffered appender for decision log files.
+
+    Usage:
+        log = DecisionLogWriter("logs/decisions.dflog", config_version=config_version(cfg))
+        log.append(features, churn_probability=..., anomaly_score=..., decision="FLAG", ...)
+        log.close()
+    """
+
+    def __init__(
+        self,
+        path: str,
+        config_version: str = "",
+        model_version: str = "",
+        flush_every: int = 1024,
+        flush_interval: float = 1.0,
+    ):
+        """
+        Args:
+            path           : log file; created with a header, or appended to
+            config_version : tag stored on every record (see config_version())
+            model_version  : tag stored on every record
+            flush_every    : buffered records before a write
+            flush_interval : max seconds a record waits in the buffer
+        """
+        self.path = path
+        self.config_version = config_version
+        self.model_version = model_version
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer = np.zeros(flush_every, dtype=RECORD_DTYPE)
+        self._n = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                version, offset = _read_header(f)
+            if version != FORMAT_VERSION:
+                os.replace(path, f"{path}.v{version}")
+            else:
+                # Drop a torn last record so appends stay aligned
+                whole = offset + (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+                if os.path.getsize(path) != whole:
+                    os.truncate(path, whole)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, "ab")
+        else:
+            self._file = open(path, "wb")
+            self._file.write(_header_bytes())
+            self._file.flush()
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="decision-log-flush", daemon=True)
+        self._flusher.start()
+
+    def append(
+        self,
+        features: Dict[str, Any],
+        churn_probability: float,
+        expected_lift: float,
+        anomaly_score: float,
+        decision: int,
+        expected_value: float,
+        user_id: Optional[str] = None,
+        model_version: Optional[str] = None,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """
+        Buffer one decision. `decision` is a DecisionCode value; `features`
+        may carry the tracked requests_last_minute / requests_last_hour.
+        """
+        with self._lock:
+            row = self._buffer[self._n]
+            row["timestamp"] = time.time() if timestamp is None else timestamp
+            row["user_id"] = (user_id or "").encode("utf-8")[:32]
+            row["tenure"] = features.get("tenure", 0)
+            row["monthly_charges"] = features.get("monthly_charges", 0)
+            row["request_count_today"] = features.get("request_count_today", 0)
+            row["login_attempts"] = features.get("login_attempts", 0)
+            row["requests_last_minute"] = features.get("requests_last_minute", -1)
+            row["requests_last_hour"] = features.get("requests_last_hour", -1)
+            row["churn_probability"] = churn_probability
+            row["expected_lift"] = expected_lift
+            row["anomaly_score"] = anomaly_score
+            row["decision"] = decision
+            row["expected_value"] = expected_value
+            row["config_version"] = self.config_version.encode("ascii")[:12]
+            row["model_version"] = (model_version or self.model_version).encode("ascii")[:16]
+            self._n += 1
+            if self._n == self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def append_batch(
+        self,
+        features: Dict[str, np.ndarray],
+        churn_probability: np.ndarray,
+        expected_lift: np.ndarray,
+        anomaly_score: np.ndarray,
+        decision: np.ndarray,
+        expected_value: np.ndarray,
+        user_id: Optional[np.ndarray] = None,
+        model_version: Optional[str] = None,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """
+        Write many decisions at once (equal-length arrays; user_id as bytes, e.g. S32).
+        Rate count columns may be NaN for rows that were not tracked.
+        """
+        n = len(decision)
+        if n == 0:
+            return
+        rows = np.zeros(n, dtype=RECORD_DTYPE)
+        rows["timestamp"] = time.time() if timestamp is None else timestamp
+        if user_id is not None:
+            rows["user_id"] = user_id
+        for col in ("tenure", "monthly_charges", "request_count_today", "login_attempts"):
+            if col in features:
+                rows[col] = features[col]
+        for col in RATE_COLS:
+            if col in features:
+                counts = np.asarray(features[col], dtype=np.float64)
+                rows[col] = np.where(np.isnan(counts), -1, counts)  # NaN = not tracked
+            else:
+                rows[col] = -1
+        rows["churn_probability"] = churn_probability
+        rows["expected_lift"] = expected_lift
+        rows["anomaly_score"] = anomaly_score
+        rows["decision"] = decision
+        rows["expected_value"] = expected_value
+        rows["config_version"] = self.config_version.encode("ascii")[:12]
+        rows["model_version"] = (model_version or self.model_version).encode("ascii")[:16]
+        with self._lock:
+            # Buffered single appends go first so the file stays in arrival order
+            self._flush_locked()
+            self._file.write(rows.tobytes())
+            self._file.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        self._closed.set()
+        self._flusher.join(timeout=5.0)
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+
+    def _flush_loop(self) -> None:
+        """Flush records that waited flush_interval, even when no more arrive."""
+        while not self._closed.wait(self.flush_interval / 2):
+            with self._lock:
+                if self._n and time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._n:
+            self._file.write(self._buffer[: self._n].tobytes())
+            self._file.flush()
+            self._n = 0
+        self._last_flush = time.monotonic()
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def read_decision_log(path: str) -> np.ndarray:
+    """
+    Memory-map a whole log as a structured array (read-only, zero-copy).
+
+    Version 1 logs come back in their own dtype, without the rate columns.
+    """
+    with open(path, "rb") as f:
+        version, offset = _read_header(f)
+    dtype = _DTYPES[version]
+    n = (os.path.getsize(path) - offset) // dtype.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(n,))
+
+
+def iter_decision_log(path: str, chunk_size: int = 1_000_000) -> Iterator[np.ndarray]:
+    """Stream a log in chunks of up to `chunk_size` records."""
+    records = read_decision_log(path)
+    for start in range(0, len(records), chunk_size):
+        yield records[start:start + chunk_size]
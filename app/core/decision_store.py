@@ -0,0 +1,329 @@
+"""
+Decision Store
+--------------
+Indexed SQLite table of decisions, queried through a constrained spec.
+
+Design Trade-offs:
+  - SQLite (stdlib) over a columnar engine: no extra dependency, indexed
+    point/range filters in well under a millisecond at our history sizes.
+  - Callers never send SQL. A query is a small JSON spec (metric, field,
+    filters, time range, group by) that is validated against a whitelist
+    and compiled to a parameterized statement, so LLM-generated queries
+    cannot touch anything outside this table.
+  - Commits are batched (`commit_every` rows); the writing connection sees
+    uncommitted rows, so queries are always up to date in-process.
+  - Retention (`max_rows`, `max_age`) is enforced at commit time, not per
+    insert, so the table can overshoot the cap by up to `commit_every` rows
+    between prunes. Deletes go through the id and ts indexes.
+  - A ":memory:" store lives on the process heap (table plus four indexes),
+    so it is capped at MAX_MEMORY_ROWS. Larger retention needs a file.
+  - `version` changes only when rows are removed by clear(). Inserts and
+    retention prunes leave it alone, so callers can cache answers for a
+    short TTL instead of losing the cache on every write.
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.records import DecisionCode
+
+NUMERIC_FIELDS = ("expected_value", "churn_probability", "anomaly_score", "request_count_today")
+TEXT_FIELDS = ("decision", "user_id")
+METRICS = ("count", "sum", "avg", "min", "max")
+OPERATORS = ("=", "!=", ">", ">=", "<", "<=")
+TIME_RANGES = (
+    "all",
+    "last_hour",
+    "last_24_hours",
+    "today",
+    "yesterday",
+    "last_7_days",
+    "last_30_days",
+)
+GROUP_BY = (None, "decision")
+# Row cap for ":memory:" stores; a few hundred bytes of heap per row with its indexes
+MAX_MEMORY_ROWS = 100_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id                  INTEGER PRIMARY KEY,
+    ts                  REAL    NOT NULL,
+    user_id             TEXT,
+    decision            TEXT    NOT NULL,
+    expected_value      REAL    NOT NULL,
+    churn_probability   REAL,
+    anomaly_score       REAL,
+    request_count_today INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_ts ON decisions (ts);
+CREATE INDEX IF NOT EXISTS idx_decisions_decision_ts ON decisions (decision, ts);
+CREATE INDEX IF NOT EXISTS idx_decisions_anomaly ON decisions (anomaly_score);
+CREATE INDEX IF NOT EXISTS idx_decisions_user ON decisions (user_id, ts);
+"""
+
+SCHEMA_DESCRIPTION = """Table `decisions` (one row per decision, timestamps in UTC):
+- decision            : "INTERVENE" | "DO_NOTHING" | "FLAG"
+- user_id             : text, may be null
+- expected_value      : float, $ value of the decision
+- churn_probability   : float, 0-1
+- anomaly_score       : float, 0-1 (higher = more suspicious)
+- request_count_today : integer"""
+
+
+class DecisionStore:
+    """
+    Persists decisions to SQLite and answers validated query specs.
+
+    Query spec example ("how many FLAGs yesterday with anomaly > 0.9"):
+        {"metric": "count",
+         "filters": [{"field": "decision", "op": "=", "value": "FLAG"},
+                     {"field": "anomaly_score", "op": ">", "value": 0.9}],
+         "time_range": "yesterday"}
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        commit_every: int = 100,
+        max_rows: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ):
+        """
+        Args:
+            path         : SQLite file path, or ":memory:" for a process-local store
+            commit_every : number of inserts between commits
+            max_rows     : newest rows kept (None = unbounded for a file,
+                           MAX_MEMORY_ROWS in memory)
+            max_age      : seconds a row is kept (None = forever)
+        """
+        if path == ":memory:" and max_rows is None:
+            max_rows = MAX_MEMORY_ROWS
+        if path == ":memory:" and max_rows > MAX_MEMORY_ROWS:
+            raise ValueError(
+                f"An in-memory decision store holds at most {MAX_MEMORY_ROWS:,} rows; "
+                f"got max_rows={max_rows}. Use a file path for larger retention."
+            )
+        self.path = path
+        self.commit_every = commit_every
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._pending = 0
+        # Bumped by clear(); lets callers drop cached results
+        self.version = 0
+        self.pruned = 0
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def insert(
+        self,
+        decision: str,
+        expected_value: float = 0.0,
+        churn_probability: Optional[float] = None,
+        anomaly_score: Optional[float] = None,
+        request_count_today: Optional[int] = None,
+        user_id: Optional[str] = None,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Insert one decision row."""
+        self.insert_many([(
+            time.time() if timestamp is None else timestamp,
+            user_id,
+            decision,
+            float(expected_value or 0.0),
+            churn_probability,
+            anomaly_score,
+            request_count_today,
+        )])
+
+    def insert_many(self, rows: Iterable[Tuple]) -> None:
+        """
+        Insert rows of (ts, user_id, decision, expected_value,
+        churn_probability, anomaly_score, request_count_today).
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO decisions (ts, user_id, decision, expected_value, "
+                "churn_probability, anomaly_score, request_count_today) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._pending += len(rows)
+            if self._pending >= self.commit_every:
+                self._prune()
+                self._conn.commit()
+                self._pending = 0
+
+    def insert_result(self, decision: Dict[str, Any], inputs: Dict[str, Any]) -> None:
+        """Record a DecisionEngine.decide() result and the inputs it was made on."""
+        self.insert(
+            decision["decision"],
+            expected_value=decision.get("expected_value", 0.0),
+            churn_probability=inputs.get("churn_probability", inputs.get("churn")),
+            anomaly_score=inputs.get("anomaly_score"),
+            request_count_today=inputs.get("request_count_today"),
+            user_id=inputs.get("user_id"),
+        )
+
+    def clear(self) -> None:
+        """Delete every row."""
+        with self._lock:
+            self._conn.execute("DELETE FROM decisions")
+            self._conn.commit()
+            self._pending = 0
+            self.version += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._prune()
+            self._conn.commit()
+            self._conn.close()
+
+    def _prune(self) -> None:
+        """Apply max_age / max_rows (caller holds the lock)."""
+        if self.max_age is not None:
+            cur = self._conn.execute("DELETE FROM decisions WHERE ts < ?", (time.time() - self.max_age,))
+            self.pruned += max(cur.rowcount, 0)
+        if self.max_rows is not None:
+            cur = self._conn.execute(
+                "DELETE FROM decisions WHERE id <= (SELECT MAX(id) FROM decisions) - ?", (self.max_rows,)
+            )
+            self.pruned += max(cur.rowcount, 0)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def run_query(self, spec: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+        """Validate and execute a query spec. Raises ValueError on invalid specs."""
+        sql, params, spec = self.compile_query(spec, now)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        if spec["group_by"] == "decision":
+            value: Any = {row[0]: _round(row[1]) for row in rows}
+        else:
+            value = _round(rows[0][0]) if rows else None
+        return {"spec": spec, "value": value}
+
+    def compile_query(
+        self, spec: Dict[str, Any], now: Optional[float] = None
+    ) -> Tuple[str, List[Any], Dict[str, Any]]:
+        """Return (sql, params, normalized_spec) for a validated spec."""
+        spec = validate_query(spec)
+        metric, field = spec["metric"], spec["field"]
+        select = "COUNT(*)" if metric == "count" else f"{metric.upper()}({field})"
+
+        where: List[str] = []
+        params: List[Any] = []
+        for flt in spec["filters"]:
+            where.append(f"{flt['field']} {flt['op']} ?")
+            params.append(flt["value"])
+        start, end = resolve_time_range(spec["time_range"], now)
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("ts < ?")
+            params.append(end)
+
+        sql = f"SELECT {select} FROM decisions"
+        if spec["group_by"]:
+            sql = f"SELECT {spec['group_by']}, {select} FROM decisions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if spec["group_by"]:
+            sql += f" GROUP BY {spec['group_by']}"
+        return sql, params, spec
+
+
+# ---------------------------------------------------------------------------
+# Spec validation
+# ---------------------------------------------------------------------------
+
+def validate_query(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a query spec against the whitelist and return a normalized copy."""
+    if not isinstance(spec, dict):
+        raise ValueError("Query spec must be an object")
+
+    metric = spec.get("metric", "count")
+    if metric not in METRICS:
+        raise ValueError(f"Unsupported metric: {metric!r}")
+    field = spec.get("field")
+    if metric != "count" and field not in NUMERIC_FIELDS:
+        raise ValueError(f"Metric {metric!r} needs a numeric field, got {field!r}")
+
+    filters = []
+    for flt in spec.get("filters") or []:
+        if not isinstance(flt, dict):
+            raise ValueError("Each filter must be an object")
+        f, op, value = flt.get("field"), flt.get("op"), flt.get("value")
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {op!r}")
+        if f in NUMERIC_FIELDS:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Filter on {f} needs a number, got {value!r}")
+        elif f == "decision":
+            if op not in ("=", "!=") or value not in DecisionCode.__members__:
+                raise ValueError(f"Invalid decision filter: {op} {value!r}")
+        elif f == "user_id":
+            if op not in ("=", "!=") or not isinstance(value, str):
+                raise ValueError(f"Invalid user_id filter: {op} {value!r}")
+        else:
+            raise ValueError(f"Unknown field: {f!r}")
+        filters.append({"field": f, "op": op, "value": value})
+
+    time_range = spec.get("time_range") or "all"
+    if time_range not in TIME_RANGES:
+        raise ValueError(f"Unsupported time_range: {time_range!r}")
+    group_by = spec.get("group_by")
+    if group_by not in GROUP_BY:
+        raise ValueError(f"Unsupported group_by: {group_by!r}")
+
+    return {
+        "metric": metric,
+        "field": field if metric != "count" else None,
+        "filters": filters,
+        "time_range": time_range,
+        "group_by": group_by,
+    }
+
+
+def resolve_time_range(
+    time_range: str, now: Optional[float] = None
+) -> Tuple[Optional[float], Optional[float]]:
+    """Turn a named range into (start, end) epoch seconds in UTC; None = unbounded."""
+    now = time.time() if now is None else now
+    midnight = datetime.fromtimestamp(now, tz=timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    ).timestamp()
+    if time_range == "last_hour":
+        return now - 3600, None
+    if time_range == "last_24_hours":
+        return now - 86400, None
+    if time_range == "today":
+        return midnight, None
+    if time_range == "yesterday":
+        return midnight - timedelta(days=1).total_seconds(), midnight
+    if time_range == "last_7_days":
+        return now - 7 * 86400, None
+    if time_range == "last_30_days":
+        return now - 30 * 86400, None
+    return None, None
+
+
+def _round(value: Any) -> Any:
+    return round(value, 4) if isinstance(value, float) else value
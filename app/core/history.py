@@ -0,0 +1,181 @@
+"""
+Decision History
+----------------
+Bounded, columnar store of recent decisions for summaries and insights.
+
+Design Trade-offs:
+  - Fixed-width numpy columns in a ring buffer instead of a list of dicts:
+      ✓ Memory is capped at `capacity` rows (25 bytes/row)
+      ✓ Oldest rows are overwritten in O(1), no reallocation
+      ✗ Only the five summary fields are kept, not the full inputs
+  - Running aggregates are updated on insert and on eviction, so summaries
+    cover exactly the retained rows and cost O(1) regardless of capacity.
+  - Adding and later subtracting the same floats leaves rounding error
+    behind, and over millions of evictions it accumulates. The float sums
+    are therefore recomputed from the buffer (numpy pairwise summation)
+    each time the ring wraps: O(capacity) once per `capacity` inserts,
+    still O(1) amortized.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+
+from app.core.records import DecisionCode
+
+
+class DecisionHistory:
+    """
+    Ring buffer of decisions with incrementally maintained aggregates.
+
+    Columns: timestamp, decision code, expected value, churn probability,
+    anomaly score.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        """
+        Args:
+            capacity : number of most recent decisions to retain
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._timestamp = np.zeros(capacity, dtype=np.float64)
+        self._code = np.zeros(capacity, dtype=np.uint8)
+        self._expected_value = np.zeros(capacity, dtype=np.float64)
+        self._churn = np.zeros(capacity, dtype=np.float32)
+        self._anomaly = np.zeros(capacity, dtype=np.float32)
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._head = 0          # next slot to write
+        self._size = 0          # rows currently retained
+        self.total_recorded = 0  # lifetime inserts, including evicted rows
+        self._code_counts = [0] * len(DecisionCode)
+        self._ev_sum = 0.0
+        self._churn_sum = 0.0
+        self._anomaly_sum = 0.0
+
+    # ------------------------------------------------------------------
+    # Insert
+    # ------------------------------------------------------------------
+
+    def append(
+        self,
+        decision: str,
+        expected_value: float = 0.0,
+        churn_probability: float = 0.0,
+        anomaly_score: float = 0.0,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Record one decision, evicting the oldest row when full."""
+        code = DecisionCode[decision]
+        ts = time.time() if timestamp is None else timestamp
+        ev = float(expected_value or 0.0)
+        churn = float(churn_probability or 0.0)
+        anomaly = float(anomaly_score or 0.0)
+
+        with self._lock:
+            i = self._head
+            if self._size == self.capacity:
+                # Evict: back the overwritten row out of the aggregates
+                self._code_counts[self._code[i]] -= 1
+                self._ev_sum -= float(self._expected_value[i])
+                self._churn_sum -= float(self._churn[i])
+                self._anomaly_sum -= float(self._anomaly[i])
+            else:
+                self._size += 1
+
+            self._timestamp[i] = ts
+            self._code[i] = code
+            self._expected_value[i] = ev
+            self._churn[i] = churn
+            self._anomaly[i] = anomaly
+
+            self._code_counts[code] += 1
+            self._ev_sum += ev
+            self._churn_sum += float(self._churn[i])
+            self._anomaly_sum += float(self._anomaly[i])
+            self._head = (i + 1) % self.capacity
+            self.total_recorded += 1
+            if self._head == 0 and self._size == self.capacity:
+                self._resum()
+
+    def append_result(self, decision: Dict[str, Any], inputs: Dict[str, Any]) -> None:
+        """Record a DecisionEngine.decide() result and the inputs it was made on."""
+        self.append(
+            decision["decision"],
+            expected_value=decision.get("expected_value", 0.0),
+            churn_probability=inputs.get("churn_probability", inputs.get("churn", 0.0)),
+            anomaly_score=inputs.get("anomaly_score", 0.0),
+        )
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._size
+
+    def summary(self) -> Dict[str, Any]:
+        """O(1) summary over the retained rows."""
+        with self._lock:
+            n = self._size
+            breakdown = {
+                code.name: self._code_counts[code]
+                for code in DecisionCode
+                if self._code_counts[code]
+            }
+            return {
+                "total_decisions": n,
+                "decision_breakdown": breakdown,
+                "total_expected_value": round(self._ev_sum, 2),
+                "average_value": round(self._ev_sum / n, 2) if n else 0.0,
+                "average_churn_probability": round(self._churn_sum / n, 4) if n else 0.0,
+                "average_anomaly_score": round(self._anomaly_sum / n, 4) if n else 0.0,
+                "total_recorded": self.total_recorded,
+                "capacity": self.capacity,
+            }
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Copy of the retained rows as columns, oldest first."""
+        with self._lock:
+            order = self._order()
+            return {
+                "timestamp": self._timestamp[order],
+                "decision_code": self._code[order],
+                "expected_value": self._expected_value[order],
+                "churn_probability": self._churn[order],
+                "anomaly_score": self._anomaly[order],
+            }
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate retained rows as dicts, oldest first (debugging/export)."""
+        cols = self.columns()
+        for i in range(len(cols["timestamp"])):
+            yield {
+                "timestamp": float(cols["timestamp"][i]),
+                "decision": DecisionCode(int(cols["decision_code"][i])).name,
+                "expected_value": float(cols["expected_value"][i]),
+                "churn_probability": round(float(cols["churn_probability"][i]), 4),
+                "anomaly_score": round(float(cols["anomaly_score"][i]), 4),
+            }
+
+    def clear(self) -> None:
+        """Drop all rows and reset aggregates."""
+        with self._lock:
+            self._reset_state()
+
+    def _resum(self) -> None:
+        """Recompute the float aggregates from the retained rows (caller holds the lock)."""
+        self._ev_sum = float(self._expected_value.sum())
+        self._churn_sum = float(self._churn.sum(dtype=np.float64))
+        self._anomaly_sum = float(self._anomaly.sum(dtype=np.float64))
+
+    def _order(self) -> np.ndarray:
+        if self._size < self.capacity:
+            return np.arange(self._size)
+        return (np.arange(self.capacity) + self._head) % self.capacity
@@ -0,0 +1,267 @@
+"""
+Latency & Throughput Metrics
+----------------------------
+Fixed-bucket latency histograms, counters, gauges and Prometheus text exposition.
+
+Design Trade-offs:
+  - Log-spaced fixed buckets (HDR-style, 2^(1/8) growth ≈ 9% relative error)
+    from 1µs to ~70s: O(log b) record via bisect, constant memory, and
+    histograms from different threads/processes merge by adding counts.
+  - Percentiles are read from bucket upper bounds, so p99 is an upper
+    estimate within one bucket width. That is enough for SLA tracking and
+    costs nothing at record time.
+  - One lock per histogram; contention is negligible next to the work timed.
+  - Prometheus gets a coarser, fixed subset of the bounds (every 8th, i.e.
+    powers of two from 1µs), all of them on every scrape. Series must not
+    come and go between scrapes or histogram_quantile() and rate() break,
+    and ~27 series per histogram keep the cardinality reasonable.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Bucket upper bounds in milliseconds: 0.001ms · 2^(i/8)
+_GROWTH = 2 ** (1 / 8)
+BUCKET_BOUNDS_MS: List[float] = [0.001 * _GROWTH ** i for i in range(int(math.log(7e4 / 0.001, _GROWTH)) + 1)]
+QUANTILES = (0.5, 0.95, 0.99, 0.999)
+# Internal buckets folded into each exported Prometheus bucket (8 → one per doubling)
+EXPORT_EVERY = 8
+# (last internal bucket index covered, `le` label in seconds) for every exported bucket
+EXPORT_BUCKETS: List[Tuple[int, str]] = [
+    (i, f"{BUCKET_BOUNDS_MS[i] / 1000:.6g}") for i in range(0, len(BUCKET_BOUNDS_MS), EXPORT_EVERY)
+]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram in milliseconds."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)  # last bucket = overflow
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float, count: int = 1) -> None:
+        """Record `count` observations of value_ms (e.g. a batch's per-row latency)."""
+        i = bisect.bisect_left(BUCKET_BOUNDS_MS, value_ms)
+        with self._lock:
+            self.counts[i] += count
+            self.count += count
+            self.sum += value_ms * count
+            if value_ms > self.max:
+                self.max = value_ms
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - start) * 1000)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (0 if empty)."""
+        with self._lock:
+            counts, total, max_ = list(self.counts), self.count, self.max
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= rank and c:
+                return min(BUCKET_BOUNDS_MS[i], max_) if i < len(BUCKET_BOUNDS_MS) else max_
+        return max_
+
+    def snapshot(self) -> Dict[str, float]:
+        out = {"count": self.count}
+        for q in QUANTILES:
+            out[_quantile_key(q)] = round(self.quantile(q), 4)
+        out["mean"] = round(float(self.sum) / self.count, 4) if self.count else 0.0
+        out["max"] = round(float(self.max), 4)
+        return out
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Last-set value (e.g. a drift score recomputed periodically)."""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class MetricsRegistry:
+    """
+    Named, labelled histograms, counters and gauges.
+
+    Usage:
+        hist = registry.histogram("decision_stage_latency_ms", stage="roi")
+        hist.observe(0.02)
+        with registry.histogram("decision_stage_latency_ms", stage="audit").time():
+            ...
+    """
+
+    def __init__(self, namespace: str = "decisionforge"):
+        self.namespace = namespace
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Counter] = {}
+        self._gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Gauge] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        hist = self._histograms.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(key, Histogram())
+        return hist
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        key = (name, tuple(sorted(labels.items())))
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        key = (name, tuple(sorted(labels.items())))
+        gauge = self._gauges.get(key)
+        if gauge is None:
+            with self._lock:
+                gauge = self._gauges.setdefault(key, Gauge())
+        return gauge
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def snapshot(self, name: Optional[str] = None, label: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        JSON-friendly view. With `name`/`label`, returns {label value: stats}
+        for that histogram family, e.g. snapshot("decision_stage_latency_ms", "stage").
+        """
+        if name is not None:
+            return {
+                dict(labels).get(label, ""): hist.snapshot()
+                for (n, labels), hist in list(self._histograms.items())
+                if n == name
+            }
+        return {
+            "histograms": {
+                _series(n, labels): hist.snapshot() for (n, labels), hist in list(self._histograms.items())
+            },
+            "counters": {
+                _series(n, labels): c.value for (n, labels), c in list(self._counters.items())
+            },
+        }
+
+    def counter_totals(self, name: str, label: str) -> Dict[str, int]:
+        """Sum a counter family by one label, e.g. requests per endpoint."""
+        totals: Dict[str, int] = {}
+        for (n, labels), counter in list(self._counters.items()):
+            if n == name:
+                key = dict(labels).get(label, "")
+                totals[key] = totals.get(key, 0) + counter.value
+        return totals
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        families: Dict[str, List] = {}
+        for (name, labels), hist in list(self._histograms.items()):
+            families.setdefault(name, []).append((labels, hist))
+
+        for name, series in sorted(families.items()):
+            # Exported in seconds, per Prometheus convention
+            metric = f"{self.namespace}_{_base_name(name)}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, hist in series:
+                with hist._lock:
+                    counts, total, total_sum = list(hist.counts), hist.count, hist.sum
+                cumulative, start = 0, 0
+                for end, le in EXPORT_BUCKETS:
+                    cumulative += sum(counts[start:end + 1])
+                    start = end + 1
+                    lines.append(f"{metric}_bucket{_labels(labels, le=le)} {cumulative}")
+                lines.append(f'{metric}_bucket{_labels(labels, le="+Inf")} {total}')
+                lines.append(f"{metric}_sum{_labels(labels)} {total_sum / 1000}")
+                lines.append(f"{metric}_count{_labels(labels)} {total}")
+            quantile_metric = f"{metric[:-len('_seconds')]}_quantile_seconds"
+            lines.append(f"# TYPE {quantile_metric} gauge")
+            for labels, hist in series:
+                for q in QUANTILES:
+                    lines.append(f"{quantile_metric}{_labels(labels, quantile=str(q))} {hist.quantile(q) / 1000}")
+
+        counter_families: Dict[str, List] = {}
+        for (name, labels), counter in list(self._counters.items()):
+            counter_families.setdefault(name, []).append((labels, counter))
+        for name, series in sorted(counter_families.items()):
+            metric = f"{self.namespace}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for labels, counter in series:
+                lines.append(f"{metric}{_labels(labels)} {counter.value}")
+
+        gauge_families: Dict[str, List] = {}
+        for (name, labels), gauge in list(self._gauges.items()):
+            gauge_families.setdefault(name, []).append((labels, gauge))
+        for name, series in sorted(gauge_families.items()):
+            metric = f"{self.namespace}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            for labels, gauge in series:
+                lines.append(f"{metric}{_labels(labels)} {gauge.value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _quantile_key(q: float) -> str:
+    return "p" + f"{q * 100:g}".replace(".", "")
+
+
+def _base_name(name: str) -> str:
+    return name[:-3] if name.endswith("_ms") else name
+
+
+def _series(name: str, labels: Tuple[Tuple[str, str], ...]) -> str:
+    return name + _labels(labels) if labels else name
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], **extra: str) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Process-wide registry used by the engine, models and API
+default_registry = MetricsRegistry()
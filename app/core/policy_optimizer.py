@@ -0,0 +1,166 @@
+"""
+Policy Optimizer
+----------------
+Evaluates a whole grid of ROI/security thresholds against a scored dataset
+without calling DecisionEngine.decide per user or per grid point.
+
+Design Trade-offs:
+  - The decision rule factors cleanly:
+        FLAG      if anomaly_score > anomaly_threshold or requests > request_limit
+        INTERVENE if p * lift > incentive_cost / revenue_per_user
+    So users are sorted once by s = p * lift. For each gate setting, one
+    O(n) pass builds suffix counts/sums of the unflagged users. Every
+    (revenue, cost) pair is then a binary search into those suffix arrays:
+    O(log n) per grid point instead of O(n).
+  - Gate settings are independent, so they are spread over a process pool;
+    the sorted arrays are shipped once per worker.
+  - Pareto frontier objectives: maximize total expected value, minimize
+    intervention rate (incentive spend) and flag rate (customer friction).
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+_worker_arrays: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(s_sorted: np.ndarray, anomaly_sorted: np.ndarray, requests_sorted: np.ndarray) -> None:
+    _worker_arrays["s"] = s_sorted
+    _worker_arrays["anomaly"] = anomaly_sorted
+    _worker_arrays["requests"] = requests_sorted
+
+
+def _evaluate_gate(
+    anomaly_threshold: float,
+    request_limit: float,
+    revenue: np.ndarray,
+    cost: np.ndarray,
+) -> tuple:
+    """EV / intervention count for every (revenue, cost) pair under one gate setting."""
+    s = _worker_arrays["s"]
+    passed = ~((_worker_arrays["anomaly"] > anomaly_threshold) | (_worker_arrays["requests"] > request_limit))
+
+    # Suffix sums over unflagged users: index k → users at sorted positions >= k
+    suffix_count = np.zeros(len(s) + 1)
+    suffix_sum = np.zeros(len(s) + 1)
+    suffix_count[:-1] = np.cumsum(passed[::-1])[::-1]
+    suffix_sum[:-1] = np.cumsum(np.where(passed, s, 0.0)[::-1])[::-1]
+
+    k = np.searchsorted(s, cost / revenue, side="right")
+    count = suffix_count[k]
+    expected_value = revenue * suffix_sum[k] - cost * count
+    return expected_value, count, int(len(s) - suffix_count[0])
+
+
+def sweep(
+    churn_probability: np.ndarray,
+    expected_lift: np.ndarray,
+    anomaly_score: np.ndarray,
+    request_count_today: np.ndarray,
+    revenue_per_user: Sequence[float],
+    incentive_cost: Sequence[float],
+    anomaly_threshold: Sequence[float],
+    request_limit: Sequence[float],
+    workers: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every combination of the four parameter arrays.
+
+    Args:
+        churn_probability, expected_lift, anomaly_score, request_count_today :
+            scored historical dataset, one entry per user
+        revenue_per_user, incentive_cost, anomaly_threshold, request_limit :
+            candidate values for each config key (revenue must be > 0)
+        workers : processes to spread gate settings over (default: CPU count)
+
+    Returns:
+        dict of equal-length arrays, one entry per grid point:
+            revenue_per_user, incentive_cost, anomaly_threshold, request_limit,
+            expected_value (total $ over intervened users), expected_value_per_user,
+            intervention_rate, flag_rate
+        plus "pareto" (indices of non-dominated points) and "best" (max EV index).
+    """
+    s = np.asarray(churn_probability, dtype=np.float64) * np.asarray(expected_lift, dtype=np.float64)
+    order = np.argsort(s, kind="stable")
+    s_sorted = s[order]
+    anomaly_sorted = np.asarray(anomaly_score, dtype=np.float64)[order]
+    requests_sorted = np.asarray(request_count_today, dtype=np.float64)[order]
+    n = len(s)
+
+    revenue = np.asarray(revenue_per_user, dtype=np.float64)
+    cost = np.asarray(incentive_cost, dtype=np.float64)
+    if (revenue <= 0).any():
+        raise ValueError("revenue_per_user values must be positive")
+    rev_grid, cost_grid = (g.ravel() for g in np.meshgrid(revenue, cost, indexing="ij"))
+    gates = list(itertools.product(anomaly_threshold, request_limit))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(gates)))
+    if workers == 1:
+        _init_worker(s_sorted, anomaly_sorted, requests_sorted)
+        results = [_evaluate_gate(t, r, rev_grid, cost_grid) for t, r in gates]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(s_sorted, anomaly_sorted, requests_sorted),
+        ) as pool:
+            results = list(pool.map(
+                _evaluate_gate,
+                [t for t, _ in gates],
+                [r for _, r in gates],
+                itertools.repeat(rev_grid),
+                itertools.repeat(cost_grid),
+                chunksize=max(1, len(gates) // (workers * 4)),
+            ))
+
+    m = len(rev_grid)
+    n_safe = max(n, 1)
+    expected_value = np.concatenate([ev for ev, _, _ in results])
+    interventions = np.concatenate([c for _, c, _ in results])
+    flagged = np.repeat([f for _, _, f in results], m)
+
+    report = {
+        "revenue_per_user": np.tile(rev_grid, len(gates)),
+        "incentive_cost": np.tile(cost_grid, len(gates)),
+        "anomaly_threshold": np.repeat([t for t, _ in gates], m).astype(np.float64),
+        "request_limit": np.repeat([r for _, r in gates], m).astype(np.float64),
+        "expected_value": np.round(expected_value, 2),
+        "expected_value_per_user": np.round(expected_value / n_safe, 4),
+        "intervention_rate": np.round(interventions / n_safe, 6),
+        "flag_rate": np.round(flagged / n_safe, 6),
+    }
+    report["pareto"] = pareto_frontier(
+        report["expected_value"], report["intervention_rate"], report["flag_rate"]
+    )
+    report["best"] = int(np.argmax(report["expected_value"])) if len(expected_value) else -1
+    return report
+
+
+def pareto_frontier(
+    expected_value: np.ndarray,
+    intervention_rate: np.ndarray,
+    flag_rate: np.ndarray,
+) -> np.ndarray:
+    """
+    Indices of points not dominated on (max EV, min intervention rate, min flag rate).
+
+    Points are visited in descending EV order, so a point is dominated iff an
+    already-kept point is no worse on both rates. Exact duplicates keep only
+    the first occurrence.
+    """
+    order = np.lexsort((flag_rate, intervention_rate, -expected_value))
+    kept_ir = np.empty(len(order))
+    kept_fr = np.empty(len(order))
+    kept = []
+    for idx in order:
+        k = len(kept)
+        if k and np.any((kept_ir[:k] <= intervention_rate[idx]) & (kept_fr[:k] <= flag_rate[idx])):
+            continue
+        kept_ir[k] = intervention_rate[idx]
+        kept_fr[k] = flag_rate[idx]
+        kept.append(idx)
+    return np.array(sorted(kept), dtype=np.int64)
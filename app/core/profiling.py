@@ -0,0 +1,203 @@
+"""
+Request Profiler
+----------------
+Opt-in wall-clock stack sampling for the decision request path.
+
+A background thread periodically snapshots the stacks of threads that are
+currently serving a profiled request (sys._current_frames) and aggregates
+them as collapsed stacks — one "root;caller;leaf count" line per distinct
+stack — which flamegraph.pl, speedscope and similar tools read directly.
+
+Design Trade-offs:
+  - Wall-clock sampling over cProfile: near-constant overhead regardless of
+    call count, and time blocked in I/O or waiting on the GIL shows up,
+    which is what a latency spike is made of. The price is statistical
+    rather than exact call counts.
+  - Only threads inside profile() are sampled, and the sampler thread sleeps
+    on an Event while none are, so an idle profiler costs nothing. When
+    profiling is disabled in config the API holds no profiler at all.
+  - Memory is bounded by `max_stacks` distinct stacks; once full, new
+    stacks are counted under "[other]" instead of growing the table.
+  - CPU-bound pure-Python code only yields the GIL every switch interval
+    (5ms by default), so samples cluster at GIL release points; C
+    extensions (numpy, sklearn) release often and sample well.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+OVERFLOW_STACK = "[other]"
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of threads serving profiled requests.
+
+    Usage:
+        profiler = SamplingProfiler(sample_rate=0.01)
+        if profiler.should_sample(request_header):
+            with profiler.profile():
+                handle(request)
+        print(profiler.collapsed())
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        interval: float = 0.001,
+        max_stacks: int = 5000,
+        max_depth: int = 64,
+        allow_header: bool = False,
+    ):
+        """
+        Args:
+            sample_rate  : fraction of requests profiled without being asked (0–1)
+            interval     : seconds between stack samples
+            max_stacks   : distinct collapsed stacks kept before overflow
+            max_depth    : frames kept per stack (leaf side)
+            allow_header : honour a per-request opt-in header (off by default:
+                           any client could then slow its own requests and
+                           fill the stack table)
+        """
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.allow_header = allow_header
+
+        self._stacks: Dict[str, int] = {}
+        self._active: Dict[int, int] = {}   # thread id → nesting depth
+        self._names: Dict[object, str] = {}  # code object → frame label
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.samples = 0
+        self.profiled_requests = 0
+        self.started_at = time.time()
+
+    # ------------------------------------------------------------------
+    # Request hooks
+    # ------------------------------------------------------------------
+
+    def should_sample(self, header: Optional[str] = None) -> bool:
+        """True if this request should be profiled (header opt-in or random sample)."""
+        if header is not None and self.allow_header and header.strip().lower() in ("1", "true", "yes", "on"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        """Sample the calling thread until the block exits."""
+        tid = threading.get_ident()
+        with self._lock:
+            self._active[tid] = self._active.get(tid, 0) + 1
+            self.profiled_requests += 1
+            self._ensure_thread()
+            self._wake.set()
+        try:
+            yield
+        finally:
+            with self._lock:
+                depth = self._active[tid] - 1
+                if depth:
+                    self._active[tid] = depth
+                else:
+                    del self._active[tid]
+                if not self._active:
+                    self._wake.clear()
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            self._wake.wait()
+            if self._stopped:
+                return
+            frames = sys._current_frames()
+            with self._lock:
+                for tid in self._active:
+                    frame = frames.get(tid)
+                    if frame is not None and tid != own:
+                        self._record_locked(frame)
+            del frames
+            time.sleep(self.interval)
+
+    def _record_locked(self, frame) -> None:
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        if frame is not None:
+            labels.append("[truncated]")
+        key = ";".join(reversed(labels))
+
+        self.samples += 1
+        if key in self._stacks:
+            self._stacks[key] += 1
+        elif len(self._stacks) < self.max_stacks:
+            self._stacks[key] = 1
+        else:
+            self._stacks[OVERFLOW_STACK] = self._stacks.get(OVERFLOW_STACK, 0) + 1
+
+    def _label(self, code) -> str:
+        label = self._names.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{os.path.basename(code.co_filename)}:{name}"
+            self._names[code] = label
+        return label
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def collapsed(self, limit: Optional[int] = None) -> str:
+        """Collapsed stacks ("frame;frame;frame count"), heaviest first."""
+        with self._lock:
+            items = sorted(self._stacks.items(), key=lambda kv: kv[1], reverse=True)
+        if limit is not None:
+            items = items[:limit]
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval * 1000,
+                "samples": self.samples,
+                "profiled_requests": self.profiled_requests,
+                "distinct_stacks": len(self._stacks),
+                "max_stacks": self.max_stacks,
+                "overflow_samples": self._stacks.get(OVERFLOW_STACK, 0),
+                "active_threads": len(self._active),
+                "since": self.started_at,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+            self.profiled_requests = 0
+            self.started_at = time.time()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
@@ -0,0 +1,204 @@
+"""
+Request Rate Tracker
+--------------------
+Server-side per-user request counts over sliding minute / hour / day
+windows, so the security gate no longer has to trust the
+`request_count_today` value a caller reports.
+
+Each window uses the sliding-window-counter approximation. It keeps the
+count for the current fixed window and the previous one, and estimates
+the last W seconds as
+
+    previous * (1 - elapsed_in_current / W) + current
+
+That is three integers per window per user, O(1) per update, and within a
+fraction of a percent of an exact log-based count for steady traffic.
+
+Design Trade-offs:
+  - Approximate sliding windows over exact timestamp logs: memory per user
+    is constant instead of growing with request volume, which is what
+    makes abusive users cheap to track.
+  - Users are spread over `shards` independently locked LRU tables. API
+    worker threads updating different users rarely contend on the same
+    lock, and eviction work stays local to one small table.
+  - Memory is bounded twice. Whenever a shard adds a user, users idle for
+    `idle_seconds` are evicted from its cold end, and each shard holds at
+    most max_users / shards users (least recently seen evicted first). An
+    evicted user starts again from zero, so `idle_seconds` should be at
+    least the longest window limit that matters (a day by default).
+  - Counts are per process. Multiple API workers each see their own share
+    of traffic, so limits are enforced per worker.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple, Optional
+
+MINUTE = 60.0
+HOUR = 3600.0
+DAY = 86400.0
+
+
+class RateCounts(NamedTuple):
+    per_minute: int
+    per_hour: int
+    per_day: int
+
+
+class _UserWindows:
+    """Previous/current fixed-window counts for the minute, hour and day windows."""
+
+    __slots__ = (
+        "last_seen",
+        "m_start", "m_prev", "m_cur",
+        "h_start", "h_prev", "h_cur",
+        "d_start", "d_prev", "d_cur",
+    )
+
+    def __init__(self, now: float):
+        self.last_seen = now
+        self.m_start, self.m_prev, self.m_cur = int(now // MINUTE), 0, 0
+        self.h_start, self.h_prev, self.h_cur = int(now // HOUR), 0, 0
+        self.d_start, self.d_prev, self.d_cur = int(now // DAY), 0, 0
+
+    def roll(self, now: float) -> None:
+        """Advance each window to the one containing `now`."""
+        idx = int(now // MINUTE)
+        if idx == self.m_start:
+            return  # hour and day boundaries are also minute boundaries
+        self.m_prev = self.m_cur if idx == self.m_start + 1 else 0
+        self.m_cur, self.m_start = 0, idx
+        idx = int(now // HOUR)
+        if idx != self.h_start:
+            self.h_prev = self.h_cur if idx == self.h_start + 1 else 0
+            self.h_cur, self.h_start = 0, idx
+        idx = int(now // DAY)
+        if idx != self.d_start:
+            self.d_prev = self.d_cur if idx == self.d_start + 1 else 0
+            self.d_cur, self.d_start = 0, idx
+
+    def counts(self, now: float) -> RateCounts:
+        return RateCounts(
+            round(self.m_prev * (1.0 - (now % MINUTE) / MINUTE) + self.m_cur),
+            round(self.h_prev * (1.0 - (now % HOUR) / HOUR) + self.h_cur),
+            round(self.d_prev * (1.0 - (now % DAY) / DAY) + self.d_cur),
+        )
+
+
+class _Shard:
+    __slots__ = ("lock", "users", "evicted_idle", "evicted_capacity")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users: "OrderedDict[Hashable, _UserWindows]" = OrderedDict()
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+
+class RequestRateTracker:
+    """
+    Sharded, memory-bounded per-user request counters.
+
+    Usage:
+        tracker = RequestRateTracker()
+        counts = tracker.record("user_42")   # counts include this request
+        counts.per_minute, counts.per_hour, counts.per_day
+    """
+
+    def __init__(
+        self,
+        shards: int = 16,
+        max_users: int = 100_000,
+        idle_seconds: float = DAY,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            shards       : independently locked user tables
+            max_users    : users tracked across all shards before LRU eviction
+            idle_seconds : users not seen for this long are dropped
+            clock        : wall-clock source in seconds (injectable for replay/tests)
+        """
+        if shards < 1 or max_users < shards:
+            raise ValueError("need shards >= 1 and max_users >= shards")
+        self.idle_seconds = idle_seconds
+        self.max_users = max_users
+        self.clock = clock
+        self._shards = tuple(_Shard() for _ in range(shards))
+        self._per_shard = -(-max_users // shards)
+
+    def _shard(self, user_id: Hashable) -> _Shard:
+        return self._shards[hash(user_id) % len(self._shards)]
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def record(self, user_id: Hashable, now: Optional[float] = None) -> RateCounts:
+        """Count one request for `user_id` and return its windowed counts (including it)."""
+        now = self.clock() if now is None else now
+        shard = self._shard(user_id)
+        with shard.lock:
+            users = shard.users
+            windows = users.get(user_id)
+            if windows is None:
+                windows = users[user_id] = _UserWindows(now)
+                self._evict_locked(shard, now)
+            else:
+                users.move_to_end(user_id)
+                windows.roll(now)
+            windows.last_seen = now
+            windows.m_cur += 1
+            windows.h_cur += 1
+            windows.d_cur += 1
+            return windows.counts(now)
+
+    def _evict_locked(self, shard: _Shard, now: float) -> None:
+        # LRU order is last-seen order, so idle users sit at the front
+        users = shard.users
+        cutoff = now - self.idle_seconds
+        while users:
+            oldest = next(iter(users.values()))
+            if oldest.last_seen >= cutoff:
+                break
+            users.popitem(last=False)
+            shard.evicted_idle += 1
+        while len(users) > self._per_shard:
+            users.popitem(last=False)
+            shard.evicted_capacity += 1
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def peek(self, user_id: Hashable, now: Optional[float] = None) -> RateCounts:
+        """Windowed counts for `user_id` without counting a request."""
+        now = self.clock() if now is None else now
+        shard = self._shard(user_id)
+        with shard.lock:
+            windows = shard.users.get(user_id)
+            if windows is None or windows.last_seen < now - self.idle_seconds:
+                return RateCounts(0, 0, 0)
+            windows.roll(now)
+            return windows.counts(now)
+
+    def __len__(self) -> int:
+        return sum(len(shard.users) for shard in self._shards)
+
+    def get_stats(self) -> dict:
+        return {
+            "users": len(self),
+            "max_users": self.max_users,
+            "shards": len(self._shards),
+            "idle_seconds": self.idle_seconds,
+            "evicted_idle": sum(shard.evicted_idle for shard in self._shards),
+            "evicted_capacity": sum(shard.evicted_capacity for shard in self._shards),
+        }
+
+    def reset(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.users.clear()
+                shard.evicted_idle = 0
+                shard.evicted_capacity = 0
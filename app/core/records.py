@@ -0,0 +1,124 @@
+"""
+Decision record types shared across the decision path.
+"""
+
+from collections.abc import Mapping
+from enum import IntEnum
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class DecisionCode(IntEnum):
+    """Compact integer code for each business action (fits in one byte)."""
+
+    INTERVENE = 0
+    DO_NOTHING = 1
+    FLAG = 2
+
+
+_CODE_NAMES = tuple(code.name for code in DecisionCode)
+_KEYS = ("decision", "reason", "expected_value", "latency_ms")
+
+
+class DecisionRecord(Mapping):
+    """
+    Immutable result of DecisionEngine.decide().
+
+    Stores the decision as a DecisionCode plus two floats. The reason string
+    is kept as a format template and its arguments, and rendered only when
+    someone reads it (serialization, audit, explanations).
+
+    Reads like the dict decide() used to return — record["decision"],
+    record.get("expected_value"), dict(record) — so existing callers keep
+    working; to_dict() gives a real dict for JSON encoding.
+    """
+
+    __slots__ = ("_code", "_expected_value", "_latency_ms", "_reason", "_reason_args")
+
+    def __init__(
+        self,
+        code: DecisionCode,
+        expected_value: float = 0.0,
+        latency_ms: float = 0.0,
+        reason: str = "",
+        reason_args: Optional[Tuple[Any, ...]] = None,
+    ):
+        """
+        Args:
+            code           : decision code
+            expected_value : estimated $ value of the decision
+            latency_ms     : engine time for this decision
+            reason         : reason text, or a str.format template if reason_args is given
+            reason_args    : positional arguments for the template (rendered lazily)
+        """
+        # Plain slot stores; public fields are read-only properties below
+        self._code = code
+        self._expected_value = expected_value
+        self._latency_ms = latency_ms
+        self._reason = reason
+        self._reason_args = reason_args
+
+    @property
+    def code(self) -> DecisionCode:
+        return self._code
+
+    @property
+    def expected_value(self) -> float:
+        return self._expected_value
+
+    @property
+    def latency_ms(self) -> float:
+        return self._latency_ms
+
+    @property
+    def decision(self) -> str:
+        return _CODE_NAMES[self._code]
+
+    @property
+    def reason_parts(self) -> Tuple[str, Optional[Tuple[Any, ...]]]:
+        """(template, args) without rendering; args is None once rendered."""
+        return self._reason, self._reason_args
+
+    @property
+    def reason(self) -> str:
+        if self._reason_args is not None:
+            self._reason = self._reason.format(*self._reason_args)
+            self._reason_args = None
+        return self._reason
+
+    # ------------------------------------------------------------------
+    # Mapping interface (dict compatibility)
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "decision":
+            return _CODE_NAMES[self._code]
+        if key == "expected_value":
+            return self._expected_value
+        if key == "latency_ms":
+            return self._latency_ms
+        if key == "reason":
+            return self.reason
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_KEYS)
+
+    def __len__(self) -> int:
+        return len(_KEYS)
+
+    def __contains__(self, key) -> bool:
+        return key in _KEYS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "decision": _CODE_NAMES[self._code],
+            "reason": self.reason,
+            "expected_value": self._expected_value,
+            "latency_ms": self._latency_ms,
+        }
+
+    def __repr__(self) -> str:
+        return f"DecisionRecord({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (DecisionRecord, (self._code, self._expected_value, self._latency_ms, self.reason))
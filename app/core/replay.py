@@ -0,0 +1,102 @@
+"""
+Decision Replay
+---------------
+Re-runs logged traffic through a candidate DecisionEngine (and optionally a
+candidate churn/anomaly model pair) and reports what would change.
+
+All work happens on whole chunks of the log: batch scoring, then
+DecisionEngine.decide_batch. Nothing is evaluated per record.
+"""
+
+from typing import Any, Dict, Iterable
+
+import numpy as np
+
+from app.core.decision_engine import DecisionEngine
+from app.core.decision_log import RATE_COLS
+from app.core.records import DecisionCode
+
+
+def replay(
+    chunks: Iterable[np.ndarray],
+    engine: DecisionEngine,
+    churn_model=None,
+    anomaly_model=None,
+    lift_factor: float = 0.3,
+) -> Dict[str, Any]:
+    """
+    Replay decision log chunks and diff against the logged decisions.
+
+    Args:
+        chunks        : structured arrays from iter_decision_log()
+        engine        : candidate engine (candidate config)
+        churn_model   : optional candidate ChurnModel; logged scores otherwise
+        anomaly_model : optional candidate AnomalyModel; logged scores otherwise
+        lift_factor   : expected_lift = churn_probability * lift_factor when rescoring
+
+    Returns:
+        dict with record count, flip count/rate, a from→to transition matrix,
+        and realized expected value (sum over INTERVENE rows) before and after.
+    """
+    n_codes = len(DecisionCode)
+    transitions = np.zeros((n_codes, n_codes), dtype=np.int64)
+    ev_old = ev_new = 0.0
+    total = 0
+
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        churn = chunk["churn_probability"].astype(np.float64)
+        lift = chunk["expected_lift"].astype(np.float64)
+        anomaly = chunk["anomaly_score"].astype(np.float64)
+
+        if churn_model is not None or anomaly_model is not None:
+            import pandas as pd
+
+            features = pd.DataFrame({
+                "tenure": chunk["tenure"],
+                "monthly_charges": chunk["monthly_charges"],
+                "request_count_today": chunk["request_count_today"],
+                "login_attempts": chunk["login_attempts"],
+            })
+            if churn_model is not None:
+                churn = churn_model.predict_proba_batch(features)
+                lift = churn * lift_factor
+            if anomaly_model is not None:
+                anomaly = anomaly_model.score_batch(features)
+
+        # Server-side rate counts as the gate saw them (-1 = not tracked → missing)
+        rates = {
+            name: np.where(chunk[name] < 0, np.nan, chunk[name].astype(np.float64))
+            for name in RATE_COLS
+            if name in chunk.dtype.names
+        }
+        result = engine.decide_batch(churn, lift, anomaly, chunk["request_count_today"], **rates)
+        old_codes = chunk["decision"].astype(np.int64)
+        new_codes = result["decision_code"].astype(np.int64)
+
+        np.add.at(transitions, (old_codes, new_codes), 1)
+        # Compare at the log's float32 precision so unchanged rows cancel exactly
+        new_ev = result["expected_value"].astype(np.float32)
+        ev_old += float(chunk["expected_value"][old_codes == DecisionCode.INTERVENE].sum(dtype=np.float64))
+        ev_new += float(new_ev[new_codes == DecisionCode.INTERVENE].sum(dtype=np.float64))
+        total += len(chunk)
+
+    flips = int(transitions.sum() - np.trace(transitions))
+    names = [code.name for code in DecisionCode]
+    return {
+        "records": total,
+        "flipped": flips,
+        "flip_rate": round(flips / total, 6) if total else 0.0,
+        "transitions": {
+            f"{names[i]}->{names[j]}": int(transitions[i, j])
+            for i in range(n_codes)
+            for j in range(n_codes)
+            if i != j and transitions[i, j]
+        },
+        "decisions_before": {names[i]: int(transitions[i, :].sum()) for i in range(n_codes)},
+        "decisions_after": {names[j]: int(transitions[:, j].sum()) for j in range(n_codes)},
+        "expected_value_before": round(ev_old, 2),
+        "expected_value_after": round(ev_new, 2),
+        "expected_value_delta": round(ev_new - ev_old, 2),
+    }
@@ -1,18 +1,31 @@
 class ROICalculator:
+    # Reason templates, formatted with the unrounded expected value
+    POSITIVE_REASON = "Expected value ${0:.2f} — ROI positive"
+    NEGATIVE_REASON = "Expected value ${0:.2f} — not worth intervening"
+
     def __init__(self, config):
         self.config = config
+        self.revenue = config.get("revenue_per_user", 100)
+        self.cost = config.get("incentive_cost", 20)
 
-    def evaluate(self, inputs):
-        churn_prob = inputs.get("churn_probability", 0)
-        expected_lift = inputs.get("expected_lift", 0)
-        revenue = self.config.get("revenue_per_user", 100)
-        cost = self.config.get("incentive_cost", 20)
+    def expected_value(self, churn_prob, expected_lift):
+        """Unrounded expected value of intervening (hot path, no allocation)."""
+        return churn_prob * expected_lift * self.revenue - self.cost
 
-        expected_value = (churn_prob * expected_lift * revenue) - cost
+    def evaluate(self, inputs):
+        expected_value = self.expected_value(
+            inputs.get("churn_probability", 0), inputs.get("expected_lift", 0)
+        )
         roi_positive = expected_value > 0
 
         return {
             "roi_positive": roi_positive,
             "expected_value": round(expected_value, 2),
-            "reason": f"Expected value ${expected_value:.2f} — {'ROI positive' if roi_positive else 'not worth intervening'}",
-        }
\ No newline at end of file
+            "reason": (self.POSITIVE_REASON if roi_positive else self.NEGATIVE_REASON).format(expected_value),
+        }
+
+    def expected_value_batch(self, churn_probability, expected_lift):
+        """Vectorized expected value for arrays of churn probabilities and lifts."""
+        revenue = self.config.get("revenue_per_user", 100)
+        cost = self.config.get("incentive_cost", 20)
+        return churn_probability * expected_lift * revenue - cost
\ No newline at end of file
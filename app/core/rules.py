@@ -0,0 +1,349 @@
+"""
+Declarative Decision Rules
+--------------------------
+Tenant-defined rules evaluated alongside the built-in security gate and
+ROI check, compiled once from the `rules:` section of the YAML config.
+
+    rules:
+      - name: vip_exemption
+        when: {segment: vip}
+        action: DO_NOTHING
+        reason: VIP accounts are handled by account managers
+      - builtin: security_gate
+      - name: smb_min_value
+        when: {segment: smb, expected_value: {lt: 5}}
+        action: DO_NOTHING
+      - name: cooldown
+        when: {days_since_last_intervention: {lt: 7}}
+        action: DO_NOTHING
+      - builtin: roi
+
+Rules are checked top to bottom and the first match decides (short-circuit).
+`builtin: security_gate` / `builtin: roi` place the existing checks; when
+omitted, the gate runs first and ROI last. ROI always matches, so it must
+be the final rule.
+
+Conditions are ANDed. `field: value` means equality; otherwise
+`field: {op: value}` with op in eq, ne, lt, lte, gt, gte, in, not_in.
+Fields come from the decision inputs (any extra key the caller passes, e.g.
+segment or incentive_spend_today) plus the derived `expected_value`. A
+missing field never matches. In batches a value is missing per row when it
+is None (object columns), NaN (float columns) or empty (string columns).
+
+Design Trade-offs:
+  - Compiled to a flat tuple of (rule, predicate closures) — no YAML or dict
+    walking per decision, and no generated source code.
+  - Batches are evaluated column-wise: each rule is one boolean mask over the
+    rows still undecided, and evaluation stops once every row is decided.
+  - Per-rule hit counters are exact; per-rule timing is sampled (every
+    `timing_every`-th scalar evaluation, every batch) to keep the scalar
+    path to one clock read per decision.
+"""
+
+import itertools
+import operator
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.metrics import MetricsRegistry, default_registry
+from app.core.records import DecisionCode
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda value, options: value in options,
+    "not_in": lambda value, options: value not in options,
+}
+
+BUILTINS = ("security_gate", "roi")
+
+
+class Rule:
+    """One compiled rule: ANDed predicates → action."""
+
+    __slots__ = ("name", "action", "reason", "conditions", "predicates", "builtin")
+
+    def __init__(self, name: str, action: Optional[DecisionCode], reason: str, conditions, builtin: Optional[str] = None):
+        self.name = name
+        self.action = action
+        self.reason = reason
+        self.conditions = conditions  # [(field, op, value)]
+        self.builtin = builtin
+        self.predicates = tuple(_compile_condition(*c) for c in conditions)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "action": self.action.name if self.action is not None else None,
+            "builtin": self.builtin,
+            "when": [{"field": f, "op": op, "value": v} for f, op, v in self.conditions],
+        }
+
+
+def _compile_condition(field: str, op: str, value: Any) -> Callable[[dict, float], bool]:
+    fn = OPERATORS[op]
+    if field == "expected_value":
+        return lambda inputs, ev: fn(ev, value)
+
+    def predicate(inputs, ev):
+        actual = inputs.get(field)
+        return actual is not None and fn(actual, value)
+
+    return predicate
+
+
+def _parse_conditions(name: str, when: Any) -> List[Tuple[str, str, Any]]:
+    if when is None:
+        return []
+    if not isinstance(when, dict):
+        raise ValueError(f"Rule '{name}': 'when' must be a mapping of field → condition")
+    conditions = []
+    for field, spec in when.items():
+        if isinstance(spec, dict):
+            if not spec:
+                raise ValueError(f"Rule '{name}': empty condition for '{field}'")
+            for op, value in spec.items():
+                if op not in OPERATORS:
+                    raise ValueError(f"Rule '{name}': unknown operator '{op}' (use {', '.join(OPERATORS)})")
+                if op in ("in", "not_in"):
+                    if not isinstance(value, (list, tuple)):
+                        raise ValueError(f"Rule '{name}': '{op}' expects a list")
+                    value = tuple(value)
+                conditions.append((str(field), op, value))
+        else:
+            conditions.append((str(field), "eq", spec))
+    return conditions
+
+
+def compile_rules(specs: Optional[List[Dict[str, Any]]]) -> List[Rule]:
+    """
+    Validate `rules:` config entries and return the ordered plan.
+
+    Raises:
+        ValueError on unknown actions/operators, duplicate names, or a
+        misplaced ROI rule.
+    """
+    rules: List[Rule] = []
+    seen = set()
+    for i, spec in enumerate(specs or []):
+        if not isinstance(spec, dict):
+            raise ValueError(f"Rule #{i + 1}: expected a mapping")
+        if "builtin" in spec:
+            builtin = spec["builtin"]
+            if builtin not in BUILTINS:
+                raise ValueError(f"Rule #{i + 1}: unknown builtin '{builtin}' (use {', '.join(BUILTINS)})")
+            name = builtin
+            rule = Rule(name, None, "", [], builtin=builtin)
+        else:
+            name = spec.get("name") or f"rule_{i + 1}"
+            action = str(spec.get("action", "")).upper()
+            if action not in DecisionCode.__members__:
+                raise ValueError(f"Rule '{name}': action must be one of {', '.join(DecisionCode.__members__)}")
+            conditions = _parse_conditions(name, spec.get("when"))
+            reason = str(spec.get("reason") or f"Rule '{name}' matched")
+            rule = Rule(name, DecisionCode[action], reason, conditions)
+        if name in seen:
+            raise ValueError(f"Duplicate rule name '{name}'")
+        seen.add(name)
+        rules.append(rule)
+
+    names = [r.name for r in rules]
+    if "security_gate" not in names:
+        rules.insert(0, Rule("security_gate", None, "", [], builtin="security_gate"))
+    if "roi" not in names:
+        rules.append(Rule("roi", None, "", [], builtin="roi"))
+    if rules[-1].builtin != "roi":
+        raise ValueError("The 'roi' rule always matches and must be last")
+    return rules
+
+
+def _present(column: np.ndarray):
+    """Rows that have a value: not NaN (floats), not empty (strings)."""
+    if column.dtype.kind == "f":
+        return ~np.isnan(column)
+    if column.dtype.kind in "US":
+        return column != column.dtype.type()
+    return True
+
+
+class RulePlan:
+    """
+    Ordered, compiled rule plan with hit counters and sampled timing.
+
+    evaluate() returns (code, expected_value, reason_template, reason_args,
+    rule_index) for one decision; evaluate_batch() returns decision codes,
+    expected values and the index of the deciding rule per row.
+    """
+
+    METRIC_HITS = "decision_rule_hits"
+    METRIC_LATENCY = "decision_rule_latency_ms"
+
+    def __init__(self, rules: List[Rule], security_gate, roi_calculator, metrics: MetricsRegistry = None, timing_every: int = 64):
+        """
+        Args:
+            rules          : output of compile_rules()
+            security_gate  : SecurityGate used by the security_gate builtin
+            roi_calculator : ROICalculator used by the roi builtin and expected_value
+            metrics        : registry for per-rule counters/histograms
+            timing_every   : time each rule on every Nth scalar evaluation
+        """
+        self.rules = tuple(rules)
+        self.security_gate = security_gate
+        self.roi_calculator = roi_calculator
+        self.metrics = metrics or default_registry
+        self.timing_every = max(1, timing_every)
+
+        self._hits = [self.metrics.counter(self.METRIC_HITS, rule=r.name) for r in rules]
+        self._latency = [self.metrics.histogram(self.METRIC_LATENCY, rule=r.name) for r in rules]
+        self._evaluations = itertools.count(1)  # next() is atomic under the GIL
+
+    @classmethod
+    def from_config(cls, config: dict, security_gate, roi_calculator, metrics: MetricsRegistry = None) -> "RulePlan":
+        return cls(compile_rules(config.get("rules")), security_gate, roi_calculator, metrics=metrics)
+
+    # ------------------------------------------------------------------
+    # Scalar
+    # ------------------------------------------------------------------
+
+    def evaluate(self, inputs: dict) -> Tuple[DecisionCode, float, str, tuple, int]:
+        ev = self.roi_calculator.expected_value(
+            inputs.get("churn_probability", 0), inputs.get("expected_lift", 0)
+        )
+        timed = next(self._evaluations) % self.timing_every == 0
+
+        for i, rule in enumerate(self.rules):
+            if timed:
+                start = time.perf_counter()
+            result = self._match(rule, inputs, ev)
+            if timed:
+                self._latency[i].observe((time.perf_counter() - start) * 1000)
+            if result is not None:
+                self._hits[i].inc()
+                return result + (i,)
+        raise AssertionError("unreachable: roi rule always matches")
+
+    def _match(self, rule: Rule, inputs: dict, ev: float):
+        builtin = rule.builtin
+        if builtin is None:
+            for predicate in rule.predicates:
+                if not predicate(inputs, ev):
+                    return None
+            value = 0.0 if rule.action == DecisionCode.FLAG else round(ev, 2)
+            return rule.action, value, rule.reason, None
+        if builtin == "security_gate":
+            flag = self.security_gate.flag_reason(inputs)
+            if flag is None:
+                return None
+            return (DecisionCode.FLAG, 0.0, *flag)
+        # roi
+        if ev > 0:
+            return DecisionCode.INTERVENE, round(ev, 2), self.roi_calculator.POSITIVE_REASON, (ev,)
+        return DecisionCode.DO_NOTHING, round(ev, 2), self.roi_calculator.NEGATIVE_REASON, (ev,)
+
+    # ------------------------------------------------------------------
+    # Vectorized
+    # ------------------------------------------------------------------
+
+    def evaluate_batch(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Evaluate the plan over equal-length columns.
+
+        Args:
+            columns : churn_probability, expected_lift, anomaly_score,
+                      request_count_today and any extra rule fields
+
+        Returns:
+            dict with decision_code (uint8), expected_value (float, 0 for
+            FLAG rows) and rule_index (int32 index into self.rules)
+        """
+        n = len(columns["churn_probability"])
+        ev = self.roi_calculator.expected_value_batch(
+            np.asarray(columns["churn_probability"], dtype=np.float64),
+            np.asarray(columns["expected_lift"], dtype=np.float64),
+        )
+        codes = np.full(n, DecisionCode.DO_NOTHING, dtype=np.uint8)
+        rule_index = np.zeros(n, dtype=np.int32)
+        pending = np.ones(n, dtype=bool)
+
+        for i, rule in enumerate(self.rules):
+            start = time.perf_counter()
+            mask = pending & self._match_batch(rule, columns, ev, n)
+            if rule.builtin == "roi":
+                codes[mask] = np.where(ev[mask] > 0, DecisionCode.INTERVENE, DecisionCode.DO_NOTHING)
+            else:
+                codes[mask] = DecisionCode.FLAG if rule.builtin == "security_gate" else rule.action
+            rule_index[mask] = i
+            pending &= ~mask
+            hits = int(mask.sum())
+            if hits:
+                self._hits[i].inc(hits)
+            self._latency[i].observe((time.perf_counter() - start) * 1000)
+            if not pending.any():
+                break
+
+        expected_value = np.round(ev, 2)
+        expected_value[codes == DecisionCode.FLAG] = 0.0
+        return {"decision_code": codes, "expected_value": expected_value, "rule_index": rule_index}
+
+    def _match_batch(self, rule: Rule, columns: Dict[str, np.ndarray], ev: np.ndarray, n: int) -> np.ndarray:
+        if rule.builtin == "security_gate":
+            return self.security_gate.flag_batch(
+                np.asarray(columns["anomaly_score"], dtype=np.float64),
+                np.asarray(columns["request_count_today"], dtype=np.float64),
+                *(
+                    None if columns.get(name) is None else np.asarray(columns[name], dtype=np.float64)
+                    for name in ("requests_last_minute", "requests_last_hour")
+                ),
+            )
+        if rule.builtin == "roi":
+            return np.ones(n, dtype=bool)
+
+        mask = np.ones(n, dtype=bool)
+        for field, op, value in rule.conditions:
+            if field == "expected_value":
+                column = ev
+            elif field in columns:
+                column = np.asarray(columns[field])
+            else:
+                return np.zeros(n, dtype=bool)  # missing field never matches
+            if column.dtype == object:
+                # Mixed / partly missing values (e.g. JSON attributes): scalar semantics per row
+                fn = OPERATORS[op]
+                mask &= np.fromiter((v is not None and fn(v, value) for v in column), dtype=bool, count=n)
+            else:
+                if op in ("in", "not_in"):
+                    hit = np.isin(column, list(value))
+                    hit = hit if op == "in" else ~hit
+                else:
+                    hit = np.asarray(OPERATORS[op](column, value), dtype=bool)
+                mask &= hit & _present(column)
+            if not mask.any():
+                break
+        return mask
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-rule hits, hit share and sampled latency (ms)."""
+        total = sum(c.value for c in self._hits)
+        return {
+            "rules": [
+                {
+                    **rule.describe(),
+                    "hits": hits.value,
+                    "hit_rate": round(hits.value / total, 4) if total else 0.0,
+                    "latency_ms": latency.snapshot(),
+                }
+                for rule, hits, latency in zip(self.rules, self._hits, self._latency)
+            ],
+            "decisions": total,
+            "timing_every": self.timing_every,
+        }
@@ -1,15 +1,57 @@
 class SecurityGate:
+    # Reason templates, formatted with (anomaly_score, request_count) and (count, window, limit)
+    FLAG_REASON = "Anomaly score {0:.2f} or {1} requests exceeded threshold"
+    RATE_REASON = "{0} requests in the last {1} exceeded the limit of {2}"
+
     def __init__(self, config):
-        self.anomaly_threshold = config.get("anomaly_threshold", 0.7)
+        self.anomaly_threshold = config.get("anomaly_threshold", 0.95)
         self.request_limit = config.get("request_limit", 10)
+        rate_limits = config.get("rate_limits") or {}
+        self.minute_limit = rate_limits.get("per_minute")
+        self.hour_limit = rate_limits.get("per_hour")
+        self.has_rate_limits = self.minute_limit is not None or self.hour_limit is not None
 
-    def evaluate(self, inputs):
+    def is_flagged(self, anomaly_score, requests):
+        """Scalar gate (hot path, no allocation)."""
+        return anomaly_score > self.anomaly_threshold or requests > self.request_limit
+
+    def rate_violation(self, inputs):
+        """(count, window, limit) for the first exceeded per-minute/per-hour limit, else None."""
+        minute = inputs.get("requests_last_minute")
+        if self.minute_limit is not None and minute is not None and minute > self.minute_limit:
+            return minute, "minute", self.minute_limit
+        hour = inputs.get("requests_last_hour")
+        if self.hour_limit is not None and hour is not None and hour > self.hour_limit:
+            return hour, "hour", self.hour_limit
+        return None
+
+    def flag_reason(self, inputs):
+        """(reason template, args) if the request is flagged, else None."""
         anomaly_score = inputs.get("anomaly_score", 0)
         requests = inputs.get("request_count_today", 0)
+        if self.is_flagged(anomaly_score, requests):
+            return self.FLAG_REASON, (anomaly_score, requests)
+        if self.has_rate_limits:
+            violation = self.rate_violation(inputs)
+            if violation is not None:
+                return self.RATE_REASON, violation
+        return None
 
-        if anomaly_score > self.anomaly_threshold or requests > self.request_limit:
+    def evaluate(self, inputs):
+        flag = self.flag_reason(inputs)
+        if flag is not None:
+            template, args = flag
             return {
                 "action": "FLAG",
-                "reason": f"Anomaly score {anomaly_score:.2f} or {requests} requests exceeded threshold",
+                "reason": template.format(*args),
             }
-        return {"action": "PASS", "reason": "Security checks passed"}
\ No newline at end of file
+        return {"action": "PASS", "reason": "Security checks passed"}
+
+    def flag_batch(self, anomaly_score, request_count_today, requests_last_minute=None, requests_last_hour=None):
+        """Vectorized gate: boolean array, True where the request is flagged."""
+        flagged = (anomaly_score > self.anomaly_threshold) | (request_count_today > self.request_limit)
+        if self.minute_limit is not None and requests_last_minute is not None:
+            flagged |= requests_last_minute > self.minute_limit
+        if self.hour_limit is not None and requests_last_hour is not None:
+            flagged |= requests_last_hour > self.hour_limit
+        return flagged
\ No newline at end of file
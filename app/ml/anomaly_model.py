@@ -7,18 +7,29 @@ Design Trade-offs:
   - Isolation Forest chosen for unsupervised anomaly detection:
       ✓ No labeled anomaly data required
       ✓ Efficient O(n log n) training, O(log n) inference
-      ✗ Scores are relative, not calibrated probabilities
+      ✗ Raw scores are relative, so they are calibrated at train time
+        (app.ml.calibration): percentiles of training traffic, or
+        probabilities when labels are given
   - contamination=0.2 means we expect ~20% of traffic to be anomalous.
     This is tunable per client via YAML config.
+  - Inference walks a flattened numpy copy of the fitted trees
+    (app.ml.inference) instead of calling sklearn, which removes per-call
+    validation/joblib overhead and keeps scikit-learn off the import path.
+  - The trained forest is static; app.ml.streaming_anomaly can roll new
+    trees in from live traffic and swap `scorer` in place.
 """
 
+from typing import TYPE_CHECKING, Optional
+
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import IsolationForest
-from sklearn.metrics import f1_score, precision_score, recall_score
 
+from app.ml.calibration import ScoreCalibrator
+from app.ml.inference import ForestScorer, verify
 from app.ml.preprocessor import FeaturePreprocessor
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class AnomalyModel:
     """
@@ -35,16 +46,30 @@ class AnomalyModel:
         "high_request_flag",
     ]
 
-    def __init__(self, contamination: float = 0.2):
+    # Above this many rows sklearn's fixed per-call overhead is amortized and
+    # its Cython tree walk beats the numpy scorer
+    SKLEARN_BATCH_ROWS = 2048
+
+    # Scaled training rows kept as the fixed reference for recalibration
+    REFERENCE_ROWS = 4096
+
+    def __init__(self, contamination: float = 0.2, **model_params):
         """
         Args:
             contamination : expected fraction of anomalies in training data.
                             Controls the decision threshold of Isolation Forest.
+            model_params  : optional IsolationForest overrides (e.g. n_estimators, max_samples)
         """
-        self.model = IsolationForest(
-            contamination=contamination, random_state=42, n_estimators=100
-        )
+        self.model_params = {"random_state": 42, "n_estimators": 100, **model_params}
+        self.contamination = contamination
+        self.model = None  # sklearn IsolationForest, created by train()
+        # (numpy-only scorer, calibrator); replaced as one tuple so readers never mix them
+        self._serving = (None, None)
         self.preprocessor = FeaturePreprocessor()
+        # Sample of scaled training rows; streaming refreshes recalibrate against it
+        self.reference_rows: Optional[np.ndarray] = None
+        # Streaming refreshes applied since training (0 = the trained forest)
+        self.refresh_generation = 0
         self.is_trained = False
         self.evaluation_report: dict = {}
 
@@ -52,7 +77,7 @@ class AnomalyModel:
     # Training
     # ------------------------------------------------------------------
 
-    def train(self, df: pd.DataFrame, labels: pd.Series = None) -> dict:
+    def train(self, df: "pd.DataFrame", labels: "pd.Series" = None) -> dict:
         """
         Train the anomaly model.
 
@@ -64,6 +89,9 @@ class AnomalyModel:
         Returns:
             dict with evaluation metrics (or empty dict if no labels)
         """
+        from sklearn.ensemble import IsolationForest
+        from sklearn.metrics import f1_score, precision_score, recall_score
+
         # 1. Feature engineering
         df = self.preprocessor.engineer_anomaly_features(df)
 
@@ -78,11 +106,26 @@ class AnomalyModel:
         X_scaled_df = self.preprocessor.fit_transform(X)
         X_scaled = X_scaled_df[self.FEATURE_COLS].values
 
-        # 3. Train Isolation Forest
+        # 3. Train Isolation Forest and compile the numpy scorer
+        self.model = IsolationForest(**self.model_params, contamination=self.contamination)
         self.model.fit(X_scaled)
+        scorer = ForestScorer.from_estimator(self.model)
+        verify(scorer.decision_function, self.model.decision_function, X_scaled)
+
+        # 4. Calibrate: raw "outlierness" (-decision_function) → percentile / probability
+        outlierness = -scorer.decision_function(X_scaled)
+        if labels is not None:
+            calibrator = ScoreCalibrator.isotonic(outlierness, np.asarray(labels) == -1)
+        else:
+            calibrator = ScoreCalibrator.percentile(outlierness)
+        self.install(scorer, calibrator)
+        rng = np.random.default_rng(self.model_params.get("random_state"))
+        keep = rng.choice(len(X_scaled), min(len(X_scaled), self.REFERENCE_ROWS), replace=False)
+        self.reference_rows = np.ascontiguousarray(X_scaled[np.sort(keep)], dtype=np.float64)
+        self.refresh_generation = 0
         self.is_trained = True
 
-        # 4. Evaluate if labels provided
+        # 5. Evaluate if labels provided
         if labels is not None:
             preds = self.model.predict(X_scaled)  # 1 = normal, -1 = anomaly
             # Convert to binary: anomaly=1, normal=0
@@ -94,6 +137,7 @@ class AnomalyModel:
                 "recall": round(recall_score(y_true_bin, y_pred_bin, zero_division=0), 4),
                 "f1_score": round(f1_score(y_true_bin, y_pred_bin, zero_division=0), 4),
                 "note": "Supervised eval using provided labels.",
+                "calibration": calibrator.describe(),
             }
         else:
             # Unsupervised: report contamination assumption and score distribution
@@ -106,10 +150,62 @@ class AnomalyModel:
                 "flagged_fraction": round(
                     float(np.mean(self.model.predict(X_scaled) == -1)), 4
                 ),
+                "calibration": calibrator.describe(),
             }
 
         return self.evaluation_report
 
+    def tune(
+        self,
+        df: "pd.DataFrame",
+        labels: "pd.Series",
+        grid: Optional[dict] = None,
+        n_splits: int = 5,
+        scoring: str = "average_precision",
+        prune_after: int = 2,
+        workers: Optional[int] = None,
+    ) -> dict:
+        """
+        Pick IsolationForest parameters by stratified k-fold CV, then train on all of df.
+
+        Forests are fit without labels. The labels only score each held-out
+        fold, so at least a few labelled anomalies are required.
+
+        Args:
+            df          : DataFrame with raw behavior features
+            labels      : Series of ground-truth labels (1=normal, -1=anomaly)
+            grid        : parameter grid, may include "contamination"
+                          (default: app.ml.tuning.ANOMALY_GRID)
+            n_splits    : CV folds (each class needs at least n_splits rows)
+            scoring     : fold metric to maximize (average precision suits rare anomalies)
+            prune_after : folds every candidate runs before median pruning
+            workers     : processes for the search (default: CPU count)
+
+        Returns:
+            evaluation report from train(), plus a "cross_validation" entry
+            with per-candidate, per-fold metrics
+        """
+        from app.ml.tuning import ANOMALY_GRID, preprocessed_folds, search
+
+        engineered = self.preprocessor.engineer_anomaly_features(df)
+        for col in self.FEATURE_COLS:
+            if col not in engineered.columns:
+                engineered[col] = 0
+        y = (np.asarray(labels) == -1).astype(int)
+        folds = preprocessed_folds(engineered[self.FEATURE_COLS], y, n_splits=n_splits)
+        report = search(
+            "anomaly", folds, grid or ANOMALY_GRID,
+            base_params={**self.model_params, "contamination": self.contamination},
+            scoring=scoring, prune_after=prune_after, workers=workers,
+        )
+
+        best = dict(report["best_params"])
+        self.contamination = best.pop("contamination", self.contamination)
+        self.model_params = {**self.model_params, **best}
+        self.train(df, labels=labels)
+        self.evaluation_report["cross_validation"] = report
+        return self.evaluation_report
+
     # ------------------------------------------------------------------
     # Inference
     # ------------------------------------------------------------------
@@ -118,10 +214,10 @@ class AnomalyModel:
         """
         Return anomaly score for a single request.
 
-        Score interpretation:
-          > 0.5  → likely anomalous (high risk)
-          0–0.5  → borderline
-          < 0    → normal behavior
+        Score interpretation (calibrated at train time):
+          without labels → percentile of training traffic; 0.95 means more
+                           anomalous than 95% of the rows the model was trained on
+          with labels    → estimated probability that the request is anomalous
 
         Args:
             features : dict with keys 'request_count_today', 'login_attempts'
@@ -129,24 +225,100 @@ class AnomalyModel:
         Returns:
             float anomaly score (higher = more anomalous)
         """
+        return round(float(self.score_features(self.featurize_row(features))[0]), 4)
+
+    def score_batch(self, df: "pd.DataFrame") -> np.ndarray:
+        """
+        Return anomaly scores for many requests in one vectorized pass.
+
+        Args:
+            df : DataFrame with columns 'request_count_today', 'login_attempts'
+
+        Returns:
+            1-D float array of calibrated anomaly scores in [0, 1] (higher = more anomalous)
+        """
+        return self.score_features(self.featurize(df))
+
+    def featurize(self, df: "pd.DataFrame") -> np.ndarray:
+        """
+        Feature engineering + scaling: raw rows → model input matrix.
+
+        Split from inference so callers can time the two stages separately.
+        """
         if not self.is_trained:
             raise RuntimeError("Model not trained. Call train() first.")
 
-        row = pd.DataFrame([features])
-        row = self.preprocessor.engineer_anomaly_features(row)
+        rows = self.preprocessor.engineer_anomaly_features(df)
 
         for col in self.FEATURE_COLS:
-            if col not in row.columns:
-                row[col] = 0
+            if col not in rows.columns:
+                rows[col] = 0
+
+        rows_scaled = self.preprocessor.transform(rows[self.FEATURE_COLS])
+        return rows_scaled[self.FEATURE_COLS].values
+
+    def featurize_row(self, features: dict) -> np.ndarray:
+        """
+        featurize() for one request given as a dict, without pandas.
+
+        Returns:
+            (1, n_features) scaled matrix
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model not trained. Call train() first.")
 
-        row_scaled = self.preprocessor.transform(row)
-        X = row_scaled[self.FEATURE_COLS].values
+        requests = float(features["request_count_today"])
+        logins = float(features["login_attempts"])
+        row = np.array([[
+            requests,
+            logins,
+            requests / (logins + 1),
+            float(requests > 5),
+        ]])
+        return self.preprocessor.transform_array(row, self.FEATURE_COLS)
 
+    def featurize_arrays(self, request_count_today: np.ndarray, login_attempts: np.ndarray) -> np.ndarray:
+        """featurize() for column arrays (e.g. a decoded binary batch), without pandas."""
+        if not self.is_trained:
+            raise RuntimeError("Model not trained. Call train() first.")
+
+        requests = np.asarray(request_count_today, dtype=np.float64)
+        logins = np.asarray(login_attempts, dtype=np.float64)
+        X = np.column_stack([
+            requests,
+            logins,
+            requests / (logins + 1),
+            (requests > 5).astype(np.float64),
+        ])
+        return self.preprocessor.transform_array(X, self.FEATURE_COLS)
+
+    def score_features(self, X: np.ndarray) -> np.ndarray:
+        """Calibrated anomaly scores in [0, 1] for a matrix produced by featurize()."""
+        scorer, calibrator = self._serving
         # Isolation Forest decision_function: lower = more anomalous
-        raw_score = self.model.decision_function(X)[0]
-        # Invert and normalize to [0, 1] range for intuitive interpretation
-        anomaly_score = float(1 / (1 + np.exp(raw_score * 5)))
-        return round(anomaly_score, 4)
+        model = self.model
+        if model is not None and len(X) >= self.SKLEARN_BATCH_ROWS:
+            raw_scores = model.decision_function(X)
+        else:
+            raw_scores = scorer.decision_function(X)
+        # Table lookup (np.interp), so thresholds keep their meaning across retrains
+        return calibrator.transform(-raw_scores)
+
+    # ------------------------------------------------------------------
+    # Serving state
+    # ------------------------------------------------------------------
+
+    @property
+    def scorer(self) -> ForestScorer:
+        return self._serving[0]
+
+    @property
+    def calibrator(self) -> ScoreCalibrator:
+        return self._serving[1]
+
+    def install(self, scorer: ForestScorer, calibrator: ScoreCalibrator) -> None:
+        """Atomically replace the scorer and its calibration (single assignment)."""
+        self._serving = (scorer, calibrator)
 
     # ------------------------------------------------------------------
     # Metrics access
@@ -0,0 +1,97 @@
+"""
+Score Calibration
+-----------------
+Monotone lookup tables that turn raw model scores into scores with a
+stable meaning, built once at training time.
+
+  - percentile  (no labels): the share of training scores below a score,
+    so a calibrated score of 0.95 means "more anomalous than 95% of the
+    training traffic". It is the same for every retrain.
+  - probability (labels given): isotonic regression of the label on the
+    raw score, so 0.7 means an estimated 70% chance of being anomalous.
+
+Either way the table is a pair of sorted knot arrays applied with
+np.interp, an O(log k) binary search per score over at most `max_knots`
+knots.
+
+Design Trade-offs:
+  - Empirical tables over parametric fits (sigmoid / Platt): no shape
+    assumption, and percentiles are exact at the knots. The price is
+    stepwise resolution on small or heavily tied training sets; between
+    knots, scores are linearly interpolated.
+  - Knot count is capped, so a table built on millions of rows stays a few
+    KB and the lookup stays in cache.
+  - Scores outside the training range clamp to the ends of the table (0/1
+    for percentiles). A percentile cannot say how much more extreme a
+    score is than anything seen in training.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+class ScoreCalibrator:
+    """Monotone raw → calibrated mapping (higher raw = higher calibrated)."""
+
+    def __init__(self, knots: np.ndarray, values: np.ndarray, method: str,
+                 left: Optional[float] = None, right: Optional[float] = None):
+        self.knots = np.ascontiguousarray(knots, dtype=np.float64)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.method = method
+        self.left = float(self.values[0]) if left is None else left
+        self.right = float(self.values[-1]) if right is None else right
+
+    @classmethod
+    def percentile(cls, raw: np.ndarray, max_knots: int = 1001) -> "ScoreCalibrator":
+        """Fraction of training scores strictly below x."""
+        raw = np.sort(np.asarray(raw, dtype=np.float64))
+        if len(raw) == 0:
+            raise ValueError("Cannot calibrate on an empty score set")
+        knots = np.unique(raw)
+        # Strict "<" so tied blocks take their lower edge: a threshold t never
+        # flags more than 1 - t of the training rows, however many ties
+        values = np.searchsorted(raw, knots, side="left") / len(raw)
+        knots, values = _thin(knots, values, max_knots)
+        return cls(knots, values, "percentile", left=0.0, right=1.0)
+
+    @classmethod
+    def isotonic(cls, raw: np.ndarray, positive: np.ndarray, max_knots: int = 1001) -> "ScoreCalibrator":
+        """Isotonic fit of P(positive | raw); needs scikit-learn (training time only)."""
+        from sklearn.isotonic import IsotonicRegression
+
+        iso = IsotonicRegression(out_of_bounds="clip", y_min=0.0, y_max=1.0)
+        iso.fit(np.asarray(raw, dtype=np.float64), np.asarray(positive, dtype=np.float64))
+        knots, values = _thin(iso.X_thresholds_, iso.y_thresholds_, max_knots)
+        return cls(knots, values, "probability")
+
+    def transform(self, raw: np.ndarray) -> np.ndarray:
+        """Calibrated scores for an array of raw scores."""
+        return np.interp(raw, self.knots, self.values, left=self.left, right=self.right)
+
+    def remap(self, old_raw: np.ndarray, new_raw: np.ndarray, max_knots: int = 1001) -> "ScoreCalibrator":
+        """
+        Carry this calibration over to a new scorer by quantile matching.
+
+        `old_raw` and `new_raw` are the old and new scorer's raw scores on
+        the same rows. Each new-score quantile maps to the calibrated value
+        of the old score at that quantile, so calibrated scores keep their
+        meaning after the scorer changes, without labels or a full refit.
+        """
+        levels = np.linspace(0.0, 1.0, min(max_knots, max(len(new_raw), 2)))
+        knots = np.quantile(new_raw, levels)
+        values = self.transform(np.quantile(old_raw, levels))
+        # Merge tied knots (discrete features), keeping the lower edge as percentile() does
+        keep = np.insert(np.diff(knots) > 0, 0, True)
+        return ScoreCalibrator(knots[keep], values[keep], self.method, left=self.left, right=self.right)
+
+    def describe(self) -> dict:
+        return {"method": self.method, "knots": int(len(self.knots))}
+
+
+def _thin(knots: np.ndarray, values: np.ndarray, max_knots: int):
+    """Keep at most max_knots evenly spaced knots, always including both ends."""
+    if len(knots) <= max_knots:
+        return knots, values
+    idx = np.unique(np.linspace(0, len(knots) - 1, max_knots).round().astype(int))
+    return knots[idx], values[idx]
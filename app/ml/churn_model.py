@@ -9,22 +9,21 @@ Design Trade-offs:
       ✓ Probability outputs are well-calibrated
       ✗ Lower accuracy on non-linear patterns vs XGBoost
   - StandardScaler is applied before training for numerical stability.
+  - Inference runs on numpy copies of the fitted coefficients
+    (app.ml.inference), so pandas and scikit-learn are imported only when
+    training or when a DataFrame is passed in.
 """
 
+from typing import TYPE_CHECKING, Optional
+
 import numpy as np
-import pandas as pd
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import (
-    classification_report,
-    f1_score,
-    precision_score,
-    recall_score,
-    roc_auc_score,
-)
-from sklearn.model_selection import train_test_split
 
+from app.ml.inference import LinearScorer, verify
 from app.ml.preprocessor import FeaturePreprocessor
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class ChurnModel:
     """
@@ -37,8 +36,14 @@ class ChurnModel:
     # Features used for training and inference
     FEATURE_COLS = ["tenure", "monthly_charges", "charge_per_tenure", "high_charge_flag"]
 
-    def __init__(self):
-        self.model = LogisticRegression(max_iter=1000, random_state=42)
+    def __init__(self, **model_params):
+        """
+        Args:
+            model_params : optional LogisticRegression overrides (e.g. C, class_weight)
+        """
+        self.model_params = {"max_iter": 1000, "random_state": 42, **model_params}
+        self.model = None  # sklearn LogisticRegression, created by train()
+        self.scorer = None  # numpy-only copy used for inference
         self.preprocessor = FeaturePreprocessor()
         self.is_trained = False
         self.evaluation_report: dict = {}
@@ -47,7 +52,7 @@ class ChurnModel:
     # Training
     # ------------------------------------------------------------------
 
-    def train(self, df: pd.DataFrame, target: str = "churn") -> dict:
+    def train(self, df: "pd.DataFrame", target: str = "churn") -> dict:
         """
         Train the churn model and evaluate with Precision, Recall, F1, AUC.
 
@@ -58,6 +63,16 @@ class ChurnModel:
         Returns:
             dict with evaluation metrics
         """
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.metrics import (
+            classification_report,
+            f1_score,
+            precision_score,
+            recall_score,
+            roc_auc_score,
+        )
+        from sklearn.model_selection import train_test_split
+
         # 1. Feature engineering
         df = self.preprocessor.engineer_churn_features(df)
 
@@ -77,8 +92,11 @@ class ChurnModel:
             # Small dataset: train = val (demo/simulation mode)
             X_train, X_val, y_train, y_val = X_scaled, X_scaled, y, y
 
-        # 4. Fit model
+        # 4. Fit model and compile the numpy scorer
+        self.model = LogisticRegression(**self.model_params)
         self.model.fit(X_train, y_train)
+        self.scorer = LinearScorer.from_estimator(self.model)
+        verify(self.scorer.predict_proba, lambda X: self.model.predict_proba(X)[:, 1], X_scaled)
         self.is_trained = True
 
         # 5. Evaluate
@@ -97,6 +115,47 @@ class ChurnModel:
 
         return self.evaluation_report
 
+    def tune(
+        self,
+        df: "pd.DataFrame",
+        target: str = "churn",
+        grid: Optional[dict] = None,
+        n_splits: int = 5,
+        scoring: str = "roc_auc",
+        prune_after: int = 2,
+        workers: Optional[int] = None,
+    ) -> dict:
+        """
+        Pick hyperparameters by stratified k-fold CV, then train on all of df.
+
+        Args:
+            df          : DataFrame with raw features + target column
+            target      : name of the binary target column
+            grid        : LogisticRegression parameter grid (default: app.ml.tuning.CHURN_GRID,
+                          C × penalty × class_weight)
+            n_splits    : CV folds (each class needs at least n_splits rows)
+            scoring     : fold metric to maximize
+            prune_after : folds every candidate runs before median pruning
+            workers     : processes for the search (default: CPU count)
+
+        Returns:
+            evaluation report from train(), plus a "cross_validation" entry
+            with per-candidate, per-fold metrics
+        """
+        from app.ml.tuning import CHURN_GRID, logistic_params, preprocessed_folds, search
+
+        engineered = self.preprocessor.engineer_churn_features(df)
+        folds = preprocessed_folds(engineered[self.FEATURE_COLS], engineered[target], n_splits=n_splits)
+        report = search(
+            "churn", folds, grid or CHURN_GRID,
+            base_params=self.model_params, scoring=scoring, prune_after=prune_after, workers=workers,
+        )
+
+        self.model_params = logistic_params({**self.model_params, **report["best_params"]})
+        self.train(df, target=target)
+        self.evaluation_report["cross_validation"] = report
+        return self.evaluation_report
+
     # ------------------------------------------------------------------
     # Inference
     # ------------------------------------------------------------------
@@ -111,22 +170,78 @@ class ChurnModel:
         Returns:
             float in [0, 1] — probability of churn
         """
+        return float(self.predict_proba_features(self.featurize_row(features))[0])
+
+    def predict_proba_batch(self, df: "pd.DataFrame") -> np.ndarray:
+        """
+        Return churn probabilities for many users in one vectorized pass.
+
+        Args:
+            df : DataFrame with columns 'tenure', 'monthly_charges'
+
+        Returns:
+            1-D float array of churn probabilities, one per row
+        """
+        return self.predict_proba_features(self.featurize(df))
+
+    def featurize(self, df: "pd.DataFrame") -> np.ndarray:
+        """
+        Feature engineering + scaling: raw rows → model input matrix.
+
+        Split from inference so callers can time the two stages separately.
+        """
         if not self.is_trained:
             raise RuntimeError("Model not trained. Call train() first.")
 
         # Derive engineered features for inference
-        row = pd.DataFrame([features])
-        row = self.preprocessor.engineer_churn_features(row)
+        rows = self.preprocessor.engineer_churn_features(df)
 
         # Fill any missing engineered columns with 0
         for col in self.FEATURE_COLS:
-            if col not in row.columns:
-                row[col] = 0
+            if col not in rows.columns:
+                rows[col] = 0
 
-        row_scaled = self.preprocessor.transform(row)
-        X = row_scaled[self.FEATURE_COLS].values
+        rows_scaled = self.preprocessor.transform(rows[self.FEATURE_COLS])
+        return rows_scaled[self.FEATURE_COLS].values
+
+    def featurize_row(self, features: dict) -> np.ndarray:
+        """
+        featurize() for one user given as a dict, without pandas.
+
+        Returns:
+            (1, n_features) scaled matrix
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model not trained. Call train() first.")
+
+        tenure = float(features["tenure"])
+        monthly_charges = float(features["monthly_charges"])
+        row = np.array([[
+            tenure,
+            monthly_charges,
+            monthly_charges / (tenure + 1),
+            float(monthly_charges > 180),
+        ]])
+        return self.preprocessor.transform_array(row, self.FEATURE_COLS)
+
+    def featurize_arrays(self, tenure: np.ndarray, monthly_charges: np.ndarray) -> np.ndarray:
+        """featurize() for column arrays (e.g. a decoded binary batch), without pandas."""
+        if not self.is_trained:
+            raise RuntimeError("Model not trained. Call train() first.")
 
-        return float(self.model.predict_proba(X)[0][1])
+        tenure = np.asarray(tenure, dtype=np.float64)
+        monthly_charges = np.asarray(monthly_charges, dtype=np.float64)
+        X = np.column_stack([
+            tenure,
+            monthly_charges,
+            monthly_charges / (tenure + 1),
+            (monthly_charges > 180).astype(np.float64),
+        ])
+        return self.preprocessor.transform_array(X, self.FEATURE_COLS)
+
+    def predict_proba_features(self, X: np.ndarray) -> np.ndarray:
+        """Churn probabilities for a matrix produced by featurize()."""
+        return self.scorer.predict_proba(X)
 
     # ------------------------------------------------------------------
     # Metrics access
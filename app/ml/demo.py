@@ -0,0 +1,49 @@
+"""
+Demo Models
+-----------
+The small hand-written training set used by the command-line tools
+(evaluate.py, optimize_policy.py, replay.py --rescore, benchmarks), and a
+helper that trains a churn/anomaly pair on it.
+
+Design Trade-offs:
+  - Lives in the package rather than in evaluate.py so other scripts and
+    tools import it without running or importing a script.
+  - The data is deliberately tiny and fixed, so simulation results stay
+    reproducible run to run. Serving trains on its own default set (see
+    app.ai.api) or loads registered models.
+"""
+
+from typing import TYPE_CHECKING, Tuple
+
+from app.ml.anomaly_model import AnomalyModel
+from app.ml.churn_model import ChurnModel
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def demo_training_data() -> Tuple["pd.DataFrame", "pd.DataFrame"]:
+    """Demo training data (churn, anomaly)."""
+    import pandas as pd
+
+    churn_data = pd.DataFrame({
+        "tenure": [1, 5, 10, 2, 7],
+        "monthly_charges": [200, 150, 100, 220, 130],
+        "churn": [1, 0, 0, 1, 0],
+    })
+    anomaly_data = pd.DataFrame({
+        "request_count_today": [1, 2, 1, 10, 2],
+        "login_attempts": [1, 1, 1, 7, 1],
+    })
+    return churn_data, anomaly_data
+
+
+def train_models() -> Tuple[ChurnModel, AnomalyModel]:
+    """Train a churn/anomaly model pair on the demo data."""
+    churn_model = ChurnModel()
+    anomaly_model = AnomalyModel()
+
+    churn_data, anomaly_data = demo_training_data()
+    churn_model.train(churn_data, target="churn")
+    anomaly_model.train(anomaly_data)
+    return churn_model, anomaly_model
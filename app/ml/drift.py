@@ -0,0 +1,381 @@
+"""
+Feature Drift Monitoring
+------------------------
+Compares live request features against the training snapshot taken in
+FeaturePreprocessor.fit, using constant-memory streaming sketches.
+
+Per numeric feature the monitor keeps:
+  - a KLL quantile sketch. Its CDF at the training quantiles, compared
+    with the training empirical CDF at the same points, gives a KS
+    statistic that stays exact for discrete (count) features.
+  - counts over the training decile bins, which feed the PSI.
+Categorical features use a count-min sketch for live category
+frequencies. PSI is computed over the training categories plus an
+"other" bucket.
+
+PSI rule of thumb: < 0.1 stable, 0.1–0.25 moderate shift, > 0.25 major
+shift (retrain or investigate).
+
+Design Trade-offs:
+  - Sketches over stored samples: memory is fixed (KLL: O(k log(n/k))
+    values, count-min: width × depth counters), whatever the traffic
+    volume, and every update is amortized O(1).
+  - Requests only append to a small buffer under one lock. Sketches and
+    bins are updated with numpy once per `flush_every` rows, so the
+    per-request cost is a list append rather than a sketch update.
+  - Windows instead of all-time totals: after `window` rows the live
+    sketches start over. A cumulative sketch would take ever longer to
+    show a recent shift. The report uses the newest window with enough rows.
+  - KLL gives approximate ranks (error ~1/k), and count-min only
+    over-estimates. Both are far below the PSI/KS thresholds that matter.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+PSI_EPSILON = 1e-4
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+PROFILE_QUANTILES = np.linspace(0.0, 1.0, 101)
+
+
+# ---------------------------------------------------------------------------
+# Sketches
+# ---------------------------------------------------------------------------
+
+class KLLSketch:
+    """
+    KLL streaming quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Level h holds items of weight 2^h. A full level is sorted and every
+    other item (random offset) is promoted to the next level.
+    """
+
+    def __init__(self, k: int = 200, c: float = 2.0 / 3.0, seed: int = 0):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self._levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, int(np.ceil(self.k * self.c ** depth)))
+
+    def update_many(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind at this level
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                promoted = pairs[self._rng.integers(2)::2]
+                self._levels[level] = keep
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def _weighted(self):
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self._levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        values, cumulative = self._weighted()
+        if len(values) == 0:
+            return np.full(len(list(qs)), np.nan)
+        ranks = np.asarray(list(qs), dtype=np.float64) * cumulative[-1]
+        return values[np.minimum(np.searchsorted(cumulative, ranks, side="left"), len(values) - 1)]
+
+    def cdf(self, points: np.ndarray) -> np.ndarray:
+        """Estimated fraction of values <= each point."""
+        values, cumulative = self._weighted()
+        if len(values) == 0:
+            return np.zeros(len(points))
+        idx = np.searchsorted(values, points, side="right")
+        below = np.where(idx > 0, cumulative[np.maximum(idx - 1, 0)], 0.0)
+        return below / cumulative[-1]
+
+    def size(self) -> int:
+        return sum(len(items) for items in self._levels)
+
+
+class CountMinSketch:
+    """Count-min sketch for category frequencies (never under-counts)."""
+
+    def __init__(self, width: int = 2048, depth: int = 4, seed: int = 0):
+        self.width = width
+        self.depth = depth
+        self.counts = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+        self._salts = [seed * 1_000_003 + row for row in range(depth)]
+
+    def _columns(self, key) -> List[int]:
+        return [hash((salt, key)) % self.width for salt in self._salts]
+
+    def update_many(self, keys: Iterable) -> None:
+        for key in keys:
+            for row, col in enumerate(self._columns(key)):
+                self.counts[row, col] += 1
+            self.total += 1
+
+    def estimate(self, key) -> int:
+        return int(min(self.counts[row, col] for row, col in enumerate(self._columns(key))))
+
+
+# ---------------------------------------------------------------------------
+# Training snapshot
+# ---------------------------------------------------------------------------
+
+class FeatureProfile:
+    """Training-time distribution of one feature (numeric or categorical)."""
+
+    def __init__(self, kind: str, count: int, edges=None, expected=None, quantiles=None,
+                 categories=None, mean: float = 0.0, std: float = 0.0, cdf=None):
+        self.kind = kind
+        self.count = count
+        self.edges = edges          # numeric: interior bin edges (training deciles)
+        self.expected = expected    # bin / category proportions (+ "other" last for categorical)
+        self.quantiles = quantiles  # numeric: values at PROFILE_QUANTILES
+        # numeric: training fraction <= each of those values. Differs from the
+        # nominal levels on discrete features, where many levels share one value.
+        self.cdf = cdf
+        self.categories = categories
+        self.mean = mean
+        self.std = std
+
+    @classmethod
+    def numeric(cls, values: np.ndarray, bins: int = 10) -> "FeatureProfile":
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            raise ValueError("Cannot profile an empty feature")
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        quantiles = np.quantile(values, PROFILE_QUANTILES)
+        expected = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        return cls(
+            "numeric",
+            count=len(values),
+            edges=edges,
+            expected=expected / len(values),
+            quantiles=quantiles,
+            cdf=np.searchsorted(np.sort(values), quantiles, side="right") / len(values),
+            mean=float(values.mean()),
+            std=float(values.std()),
+        )
+
+    @classmethod
+    def categorical(cls, values: Iterable, top: int = 20) -> "FeatureProfile":
+        values = list(values)
+        if not values:
+            raise ValueError("Cannot profile an empty feature")
+        keys, counts = np.unique(np.asarray(values, dtype=object).astype(str), return_counts=True)
+        order = np.argsort(-counts, kind="stable")[:top]
+        expected = counts[order] / len(values)
+        return cls(
+            "categorical",
+            count=len(values),
+            categories=[str(k) for k in keys[order]],
+            expected=np.append(expected, max(0.0, 1.0 - expected.sum())),
+        )
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index between two proportion vectors."""
+    e = np.maximum(np.asarray(expected, dtype=np.float64), PSI_EPSILON)
+    a = np.maximum(np.asarray(actual, dtype=np.float64), PSI_EPSILON)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def drift_status(psi_value: float) -> str:
+    if psi_value >= PSI_MAJOR:
+        return "major"
+    if psi_value >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+# ---------------------------------------------------------------------------
+# Live monitor
+# ---------------------------------------------------------------------------
+
+class _LiveWindow:
+    """Sketches for one window of live traffic."""
+
+    def __init__(self, profiles: Dict[str, FeatureProfile], k: int):
+        self.rows = 0
+        self.sketches = {
+            name: KLLSketch(k=k) if p.kind == "numeric" else CountMinSketch()
+            for name, p in profiles.items()
+        }
+        self.bins = {
+            name: np.zeros(len(p.edges) + 1, dtype=np.int64)
+            for name, p in profiles.items() if p.kind == "numeric"
+        }
+
+
+class DriftMonitor:
+    """
+    Streams live features into sketches and scores them against training.
+
+    Usage:
+        monitor = DriftMonitor(preprocessor.training_profile)
+        monitor.observe({"tenure": 3, "monthly_charges": 120.0})
+        monitor.report()
+    """
+
+    def __init__(
+        self,
+        profiles: Dict[str, FeatureProfile],
+        window: int = 100_000,
+        flush_every: int = 256,
+        min_rows: int = 500,
+        k: int = 200,
+        metrics=None,
+    ):
+        """
+        Args:
+            profiles    : feature name → training FeatureProfile
+            window      : live rows per window before the sketches start over
+            flush_every : buffered rows per sketch update
+            min_rows    : rows a window needs before it is reported on its own
+            k           : KLL accuracy parameter (rank error ~1/k)
+            metrics     : optional MetricsRegistry; PSI/KS gauges are set on each flush
+        """
+        self.profiles = dict(profiles)
+        self.window = window
+        self.flush_every = flush_every
+        self.min_rows = min_rows
+        self.k = k
+        self.metrics = metrics
+
+        self._buffer: Dict[str, list] = {name: [] for name in self.profiles}
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._current = _LiveWindow(self.profiles, k)
+        self._previous: Optional[_LiveWindow] = None
+        self.observed = 0
+
+    def observe(self, features: dict) -> None:
+        """Buffer one request's features (missing features are skipped)."""
+        with self._lock:
+            for name, buffer in self._buffer.items():
+                value = features.get(name)
+                if value is not None:
+                    buffer.append(value)
+            self._buffered += 1
+            self.observed += 1
+            full = self._buffered >= self.flush_every
+        if full:
+            self.flush()
+
+    def observe_batch(self, columns: Dict[str, np.ndarray]) -> None:
+        """Buffer many requests given as equal-length feature columns."""
+        rows = len(next(iter(columns.values()))) if columns else 0
+        if rows == 0:
+            return
+        with self._lock:
+            for name, buffer in self._buffer.items():
+                if name in columns:
+                    buffer.extend(np.asarray(columns[name]).tolist())
+            self._buffered += rows
+            self.observed += rows
+            full = self._buffered >= self.flush_every
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Fold buffered rows into the current window's sketches."""
+        with self._flush_lock:
+            with self._lock:
+                buffers = self._buffer
+                rows = self._buffered
+                self._buffer = {name: [] for name in self.profiles}
+                self._buffered = 0
+            if rows == 0:
+                return
+
+            live = self._current
+            for name, values in buffers.items():
+                if not values:
+                    continue
+                profile = self.profiles[name]
+                if profile.kind == "numeric":
+                    values = np.asarray(values, dtype=np.float64)
+                    live.sketches[name].update_many(values)
+                    live.bins[name] += np.bincount(
+                        np.searchsorted(profile.edges, values, side="right"), minlength=len(profile.edges) + 1
+                    )
+                else:
+                    live.sketches[name].update_many(str(v) for v in values)
+            live.rows += rows
+
+            if self.metrics is not None:
+                for name, scores in self._scores(live).items():
+                    self.metrics.gauge("feature_drift_psi", feature=name).set(scores["psi"])
+                    if "ks" in scores:
+                        self.metrics.gauge("feature_drift_ks", feature=name).set(scores["ks"])
+
+            if live.rows >= self.window:
+                self._previous, self._current = live, _LiveWindow(self.profiles, self.k)
+
+    def _scores(self, live: _LiveWindow) -> Dict[str, dict]:
+        scores = {}
+        for name, profile in self.profiles.items():
+            sketch = live.sketches[name]
+            if profile.kind == "numeric":
+                if sketch.n == 0:
+                    continue
+                actual = live.bins[name] / live.bins[name].sum()
+                train_cdf = profile.cdf if getattr(profile, "cdf", None) is not None else PROFILE_QUANTILES
+                ks = float(np.max(np.abs(sketch.cdf(profile.quantiles) - train_cdf)))
+                live_q = sketch.quantiles((0.5, 0.95))
+                scores[name] = {
+                    "psi": round(psi(profile.expected, actual), 4),
+                    "ks": round(ks, 4),
+                    "train_p50": round(float(profile.quantiles[50]), 4),
+                    "live_p50": round(float(live_q[0]), 4),
+                    "train_p95": round(float(profile.quantiles[95]), 4),
+                    "live_p95": round(float(live_q[1]), 4),
+                }
+            else:
+                if sketch.total == 0:
+                    continue
+                freqs = np.array([sketch.estimate(c) for c in profile.categories], dtype=np.float64) / sketch.total
+                actual = np.append(freqs, max(0.0, 1.0 - freqs.sum()))
+                scores[name] = {"psi": round(psi(profile.expected, actual), 4)}
+            scores[name]["status"] = drift_status(scores[name]["psi"])
+        return scores
+
+    def report(self) -> dict:
+        """PSI / KS per feature for the newest window with at least min_rows rows."""
+        self.flush()
+        live = self._current
+        if live.rows < self.min_rows and self._previous is not None:
+            live = self._previous
+        features = self._scores(live)
+        worst = max((f["psi"] for f in features.values()), default=0.0)
+        return {
+            "observed": self.observed,
+            "window_rows": live.rows,
+            "window": self.window,
+            "status": drift_status(worst),
+            "features": features,
+            "thresholds": {"psi_moderate": PSI_MODERATE, "psi_major": PSI_MAJOR},
+        }
@@ -8,11 +8,19 @@ Design Trade-offs:
     (faster, but sensitive to outliers in production traffic spikes).
   - Feature engineering is done at preprocessing time, not inference time,
     to keep latency low during real-time decisions.
+  - StandardScaler is only used to fit; its mean/scale are kept as numpy
+    arrays and applied directly, so inference needs neither scikit-learn
+    nor (for single rows, via transform_array) pandas. Both load lazily.
 """
 
+from typing import TYPE_CHECKING, Dict, List
+
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from app.ml.drift import FeatureProfile
 
 
 class FeaturePreprocessor:
@@ -26,15 +34,20 @@ class FeaturePreprocessor:
     """
 
     def __init__(self):
-        self.scaler = StandardScaler()
+        self.scaler = None  # sklearn StandardScaler, created by fit()
         self.feature_medians: dict = {}
+        self.fitted_columns: List[str] = []
+        self.mean_ = np.zeros(0)
+        self.scale_ = np.ones(0)
+        self._param_cache: Dict[tuple, Dict[str, np.ndarray]] = {}
+        self.training_profile: Dict[str, "FeatureProfile"] = {}
         self.is_fitted = False
 
     # ------------------------------------------------------------------
     # Churn feature engineering
     # ------------------------------------------------------------------
 
-    def engineer_churn_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def engineer_churn_features(self, df: "pd.DataFrame") -> "pd.DataFrame":
         """
         Add derived features to churn data.
 
@@ -53,7 +66,7 @@ class FeaturePreprocessor:
     # Anomaly feature engineering
     # ------------------------------------------------------------------
 
-    def engineer_anomaly_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def engineer_anomaly_features(self, df: "pd.DataFrame") -> "pd.DataFrame":
         """
         Add derived features to anomaly/security data.
 
@@ -74,20 +87,35 @@ class FeaturePreprocessor:
     # Fit / transform
     # ------------------------------------------------------------------
 
-    def fit(self, df: pd.DataFrame) -> "FeaturePreprocessor":
+    def fit(self, df: "pd.DataFrame") -> "FeaturePreprocessor":
         """
         Compute scaling parameters and median values from training data.
         Must be called before transform().
+
+        Also snapshots each numeric column's training distribution
+        (training_profile) for live drift monitoring.
         """
+        from sklearn.preprocessing import StandardScaler
+
+        from app.ml.drift import FeatureProfile
+
         numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
         # Store medians for missing-value imputation at inference time
         self.feature_medians = df[numeric_cols].median().to_dict()
-        self.scaler.fit(df[numeric_cols])
+        self.scaler = StandardScaler().fit(df[numeric_cols])
         self.fitted_columns = numeric_cols
+        self.mean_ = np.asarray(self.scaler.mean_, dtype=np.float64)
+        self.scale_ = np.asarray(self.scaler.scale_, dtype=np.float64)
+        self._param_cache = {}
+        self.training_profile = {
+            col: FeatureProfile.numeric(df[col].to_numpy(dtype=np.float64))
+            for col in numeric_cols
+            if df[col].notna().any()
+        }
         self.is_fitted = True
         return self
 
-    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+    def transform(self, df: "pd.DataFrame") -> "pd.DataFrame":
         """
         Apply median imputation + standard scaling to a DataFrame.
 
@@ -104,11 +132,42 @@ class FeaturePreprocessor:
                 df[col] = df[col].fillna(median_val)
 
         # Scale only the columns seen during fit
-        cols_present = [c for c in self.fitted_columns if c in df.columns]
-        df[cols_present] = self.scaler.transform(df[cols_present])
+        idx = [i for i, c in enumerate(self.fitted_columns) if c in df.columns]
+        cols_present = [self.fitted_columns[i] for i in idx]
+        df[cols_present] = (df[cols_present].to_numpy(dtype=np.float64) - self.mean_[idx]) / self.scale_[idx]
         return df
 
-    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+    def transform_array(self, X: np.ndarray, columns: List[str]) -> np.ndarray:
+        """
+        numpy-only transform for rows already laid out in `columns` order.
+
+        Same imputation and scaling as transform(); used on the real-time
+        path to avoid building a DataFrame per request.
+        """
+        if not self.is_fitted:
+            raise RuntimeError("Call fit() before transform().")
+
+        params = self._column_params(tuple(columns))
+        X = np.asarray(X, dtype=np.float64)
+        if np.isnan(X).any():
+            X = np.where(np.isnan(X), params["median"], X)
+        return (X - params["mean"]) / params["scale"]
+
+    def _column_params(self, columns: tuple) -> Dict[str, np.ndarray]:
+        params = self._param_cache.get(columns)
+        if params is None:
+            position = {c: i for i, c in enumerate(self.fitted_columns)}
+            mean = np.zeros(len(columns))
+            scale = np.ones(len(columns))
+            for j, col in enumerate(columns):
+                if col in position:
+                    mean[j] = self.mean_[position[col]]
+                    scale[j] = self.scale_[position[col]]
+            median = np.array([self.feature_medians.get(c, 0.0) for c in columns], dtype=np.float64)
+            params = self._param_cache[columns] = {"mean": mean, "scale": scale, "median": median}
+        return params
+
+    def fit_transform(self, df: "pd.DataFrame") -> "pd.DataFrame":
         """Convenience: fit then transform in one call."""
         return self.fit(df).transform(df)
 
@@ -127,7 +186,5 @@ class FeaturePreprocessor:
         Returns:
             Scaled 1-D numpy array ready for model.predict()
         """
-        row = {k: feature_dict.get(k, self.feature_medians.get(k, 0)) for k in feature_keys}
-        df = pd.DataFrame([row])
-        scaled = self.transform(df)
-        return scaled[feature_keys].values[0]
\ No newline at end of file
+        row = [feature_dict.get(k, self.feature_medians.get(k, 0)) for k in feature_keys]
+        return self.transform_array(np.array([row], dtype=np.float64), feature_keys)[0]
\ No newline at end of file
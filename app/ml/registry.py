@@ -0,0 +1,219 @@
+"""
+Model Registry
+--------------
+Versioned, filesystem-backed storage for trained ChurnModel / AnomalyModel
+pairs, so the API serves a known, reproducible model set instead of
+whatever it trained at startup.
+
+Layout:
+    <root>/
+        PINNED                  # version the API loads at startup
+        v0001/
+            metadata.json       # version, created_at, data hashes, metrics, feature schema
+            churn.pkl
+            anomaly.pkl
+        v0002/ ...
+
+Design Trade-offs:
+  - One directory per version, written under a temporary name and renamed
+    into place, so readers never see a half-written version. PINNED is
+    replaced the same way (write + os.replace).
+  - Artifacts are pickled whole model objects: the preprocessor,
+    calibrator and compiled numpy scorers load with no refit. Pickles
+    depend on library versions, so those versions are recorded in
+    metadata.json. A SHA-256 per artifact is checked on load.
+  - Versions are short sequential ids (v0001, ...). They fit the decision
+    log's 16-byte model_version column and sort naturally. The content
+    identity is the training-data hash in metadata.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import platform
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ARTIFACTS = ("churn.pkl", "anomaly.pkl")
+PIN_FILE = "PINNED"
+
+
+def data_hash(df) -> Optional[str]:
+    """Order-sensitive content hash of a training DataFrame (None if not given)."""
+    if df is None:
+        return None
+    import pandas as pd
+
+    digest = hashlib.sha256()
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _jsonable(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+
+class ModelRegistry:
+    """
+    Local registry of model versions.
+
+    Usage:
+        registry = ModelRegistry("models")
+        version = registry.register(churn_model, anomaly_model, churn_data=df_c, anomaly_data=df_a)
+        registry.pin(version)
+        churn_model, anomaly_model, metadata = registry.load(registry.pinned())
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def register(self, churn_model, anomaly_model, churn_data=None, anomaly_data=None, note: str = "") -> str:
+        """Store a trained model pair as the next version and return its id."""
+        import sklearn
+
+        if not (churn_model.is_trained and anomaly_model.is_trained):
+            raise RuntimeError("Both models must be trained before registering.")
+
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            digests = {}
+            for name, model in zip(ARTIFACTS, (churn_model, anomaly_model)):
+                path = os.path.join(staging, name)
+                with open(path, "wb") as f:
+                    pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+                digests[name] = _file_sha256(path)
+
+            metadata = {
+                "created_at": time.time(),
+                "note": note,
+                "data_hash": {"churn": data_hash(churn_data), "anomaly": data_hash(anomaly_data)},
+                "metrics": {
+                    "churn": _jsonable(churn_model.evaluation_report),
+                    "anomaly": _jsonable(anomaly_model.evaluation_report),
+                },
+                "feature_schema": {
+                    "churn": list(churn_model.FEATURE_COLS),
+                    "anomaly": list(anomaly_model.FEATURE_COLS),
+                },
+                "params": {
+                    "churn": _jsonable(churn_model.model_params),
+                    "anomaly": _jsonable({**anomaly_model.model_params, "contamination": anomaly_model.contamination}),
+                },
+                "artifacts": digests,
+                "environment": {
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "scikit-learn": sklearn.__version__,
+                },
+            }
+
+            # Claim the next id by renaming the staged directory into place
+            while True:
+                version = self._next_version()
+                metadata["version"] = version
+                with open(os.path.join(staging, "metadata.json"), "w") as f:
+                    json.dump(metadata, f, indent=2)
+                try:
+                    os.rename(staging, os.path.join(self.root, version))
+                    return version
+                except OSError:
+                    if not os.path.isdir(os.path.join(self.root, version)):
+                        raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def pin(self, version: str) -> None:
+        """Make `version` the one loaded at startup (atomic replace of PINNED)."""
+        self.metadata(version)  # must exist
+        fd, tmp = tempfile.mkstemp(prefix=".pin-", dir=self.root)
+        with os.fdopen(fd, "w") as f:
+            f.write(version + "\n")
+        os.replace(tmp, os.path.join(self.root, PIN_FILE))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def versions(self) -> List[str]:
+        """Registered versions, oldest first."""
+        return sorted(
+            name for name in os.listdir(self.root)
+            if name.startswith("v") and os.path.isfile(os.path.join(self.root, name, "metadata.json"))
+        )
+
+    def latest(self) -> Optional[str]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def pinned(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, PIN_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def resolve(self, version: Optional[str]) -> Optional[str]:
+        """"pinned" / "latest" / None (= pinned, else latest) / explicit id → version id."""
+        if version in (None, "pinned"):
+            return self.pinned() or (self.latest() if version is None else None)
+        if version == "latest":
+            return self.latest()
+        return version
+
+    def metadata(self, version: str) -> Dict[str, Any]:
+        path = os.path.join(self.root, version, "metadata.json")
+        if not os.path.isfile(path):
+            raise KeyError(f"Unknown model version {version!r}")
+        with open(path) as f:
+            return json.load(f)
+
+    def load(self, version: str) -> Tuple[Any, Any, Dict[str, Any]]:
+        """(churn_model, anomaly_model, metadata) for a version, with checksums verified."""
+        metadata = self.metadata(version)
+        models = []
+        for name in ARTIFACTS:
+            path = os.path.join(self.root, version, name)
+            if _file_sha256(path) != metadata["artifacts"][name]:
+                raise ValueError(f"Checksum mismatch for {version}/{name}")
+            with open(path, "rb") as f:
+                models.append(pickle.load(f))
+        return models[0], models[1], metadata
+
+    def describe(self) -> Dict[str, Any]:
+        """Versions with their creation time, data hashes and headline metrics."""
+        out = []
+        for version in self.versions():
+            meta = self.metadata(version)
+            out.append({
+                "version": version,
+                "created_at": meta["created_at"],
+                "note": meta.get("note", ""),
+                "data_hash": meta["data_hash"],
+                "churn_metrics": {k: v for k, v in meta["metrics"]["churn"].items() if k != "classification_report"},
+                "anomaly_metrics": meta["metrics"]["anomaly"],
+            })
+        return {"root": self.root, "pinned": self.pinned(), "versions": out}
+
+    def _next_version(self) -> str:
+        latest = self.latest()
+        return f"v{(int(latest[1:]) if latest else 0) + 1:04d}"
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,327 @@
+"""
+Streaming Anomaly Refresh
+-------------------------
+Keeps a trained AnomalyModel current as traffic shifts, without full
+retrains or pauses in scoring.
+
+Scored feature vectors go into a fixed-size ring buffer of recent traffic
+(the reservoir). A background thread periodically grows a few new
+isolation trees on the reservoir and retires the same number of the oldest
+trees (rolling tree replacement). It then recompiles the forest into a new
+ForestScorer, re-derives the contamination threshold on recent traffic,
+carries the score calibration over by quantile matching on a fixed sample
+of training rows, and swaps scorer and calibration into the model with a
+single assignment.
+
+Design Trade-offs:
+  - Rolling replacement over periodic full retrains: each refresh fits
+    `trees_per_refresh` small trees off the request path, and after
+    n_estimators / trees_per_refresh refreshes the whole forest reflects
+    recent traffic. Old behavior fades out gradually instead of flipping
+    overnight.
+  - Readers never lock. Scoring threads read the model's (scorer,
+    calibrator) pair once per call, so a swap mid-request is harmless.
+    Writers hold a short lock only to copy a row into the ring buffer.
+  - After the first refresh the sklearn estimator no longer describes the
+    served forest, so it is detached (`model.model = None`) and every batch
+    size goes through the numpy scorer.
+  - The reservoir holds what the model scores, including attacks. A long
+    attack therefore gradually becomes "normal" to the forest. The drift
+    report (score shift vs the first refresh window) is the signal to watch,
+    and `freeze()` stops adaptation while an incident is investigated.
+  - Trees are grown with the original max_samples so path-length
+    normalization stays consistent across old and new trees.
+  - Calibration is matched on the training reference rows, not on the
+    reservoir. A calibrated score keeps meaning "as unusual as this
+    percentile of training traffic", so shifts in live traffic still move
+    the calibrated distribution and show up in the drift report. Matching
+    on the reservoir would pin the live distribution to the old one.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from app.ml.anomaly_model import AnomalyModel
+from app.ml.inference import ForestScorer
+
+REPORT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _score_summary(scores: np.ndarray, threshold: float) -> dict:
+    """Distribution of normalized [0, 1] anomaly scores."""
+    if len(scores) == 0:
+        return {"n": 0}
+    q = np.quantile(scores, REPORT_QUANTILES)
+    return {
+        "n": int(len(scores)),
+        "mean": round(float(scores.mean()), 4),
+        "p50": round(float(q[0]), 4),
+        "p95": round(float(q[1]), 4),
+        "p99": round(float(q[2]), 4),
+        "flagged_fraction": round(float(np.mean(scores > threshold)), 4),
+    }
+
+
+def _ks_statistic(a: np.ndarray, b: np.ndarray) -> float:
+    """Two-sample Kolmogorov–Smirnov statistic (max CDF gap)."""
+    if len(a) == 0 or len(b) == 0:
+        return 0.0
+    a, b = np.sort(a), np.sort(b)
+    grid = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, grid, side="right") / len(a)
+    cdf_b = np.searchsorted(b, grid, side="right") / len(b)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+
+class StreamingAnomalyRefresher:
+    """
+    Rolling tree replacement for a trained AnomalyModel.
+
+    Usage:
+        refresher = StreamingAnomalyRefresher(anomaly_model)
+        refresher.start()
+        X = anomaly_model.featurize_row(features)
+        score = anomaly_model.score_features(X)
+        refresher.observe(X)
+        ...
+        refresher.get_drift_report()
+    """
+
+    def __init__(
+        self,
+        model: AnomalyModel,
+        reservoir_size: int = 10_000,
+        refresh_every: int = 5_000,
+        refresh_interval: float = 300.0,
+        trees_per_refresh: int = 10,
+        min_samples: Optional[int] = None,
+        flag_threshold: float = 0.95,
+        history: int = 50,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            model             : trained AnomalyModel whose scorer is refreshed in place
+            reservoir_size    : recent feature vectors kept for refitting
+            refresh_every     : new observations that trigger a refresh
+            refresh_interval  : seconds between refresh checks without that trigger
+            trees_per_refresh : oldest trees replaced per refresh
+            min_samples       : reservoir rows required before refreshing
+                                (default: the forest's max_samples)
+            flag_threshold    : normalized score reported as "flagged" in drift stats
+                                (use the config's anomaly_threshold)
+            history           : refresh reports kept
+            seed              : base random seed for new trees
+        """
+        if not model.is_trained:
+            raise RuntimeError("Model not trained. Call train() first.")
+        scorer = model.scorer
+        self.model = model
+        self.reservoir_size = reservoir_size
+        self.refresh_every = refresh_every
+        self.refresh_interval = refresh_interval
+        self.trees_per_refresh = min(trees_per_refresh, len(scorer.roots))
+        # New trees must see max_samples rows to share the old trees' normalization
+        self.min_samples = max(min_samples or 0, scorer.max_samples)
+        self.flag_threshold = flag_threshold
+        self.seed = seed
+
+        estimator = model.model
+        # Oldest first; refreshes pop from the left and append on the right
+        self._trees = deque(
+            (tree.tree_, np.asarray(features))
+            for tree, features in zip(estimator.estimators_, estimator.estimators_features_)
+        )
+        self._max_samples = scorer.max_samples
+
+        n_features = len(model.FEATURE_COLS)
+        self._buffer = np.zeros((reservoir_size, n_features))
+        self._count = 0       # total observed rows
+        self._since = 0       # rows observed since the last refresh
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self.frozen = False
+
+        self.generation = 0
+        self.refreshes: deque = deque(maxlen=history)
+        self.last_error: Optional[str] = None
+        self._baseline: Optional[np.ndarray] = None
+        # Fixed rows for carrying calibration across refreshes (training sample;
+        # models trained before it was recorded fall back to the first reservoir)
+        self._reference: Optional[np.ndarray] = getattr(model, "reference_rows", None)
+
+    # ------------------------------------------------------------------
+    # Request path
+    # ------------------------------------------------------------------
+
+    def observe(self, X: np.ndarray) -> None:
+        """Add scaled feature rows (from featurize/featurize_row) to the reservoir."""
+        observed = n = len(X)
+        if n == 0:
+            return
+        with self._lock:
+            if n >= self.reservoir_size:
+                X = X[-self.reservoir_size:]
+                self._count += n - len(X)
+                n = len(X)
+            pos = self._count % self.reservoir_size
+            first = min(n, self.reservoir_size - pos)
+            self._buffer[pos:pos + first] = X[:first]
+            if first < n:
+                self._buffer[:n - first] = X[first:]
+            self._count += n
+            self._since += observed
+            trigger = self._since >= self.refresh_every
+        if trigger and not self.frozen:
+            self._wake.set()
+
+    def reservoir(self) -> np.ndarray:
+        """Copy of the recent feature rows, oldest first."""
+        with self._lock:
+            if self._count < self.reservoir_size:
+                return self._buffer[:self._count].copy()
+            pos = self._count % self.reservoir_size
+            return np.concatenate([self._buffer[pos:], self._buffer[:pos]])
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> Optional[dict]:
+        """
+        Replace the oldest trees with trees grown on the reservoir and swap
+        the recompiled scorer in. Returns the refresh report, or None if the
+        reservoir is too small or refreshing is frozen.
+        """
+        from sklearn.ensemble import IsolationForest
+
+        with self._refresh_lock:
+            X = self.reservoir()
+            if self.frozen or len(X) < self.min_samples:
+                return None
+            with self._lock:
+                self._since = 0
+
+            start = time.perf_counter()
+            old, old_calibrator = self.model.scorer, self.model.calibrator
+            before = self._normalized(old, old_calibrator, X)
+            if self._baseline is None:
+                # First refresh: the served forest on early traffic is the reference
+                self._baseline = before
+            if self._reference is None:
+                self._reference = X
+
+            self.generation += 1
+            grown = IsolationForest(
+                n_estimators=self.trees_per_refresh,
+                max_samples=self._max_samples,
+                random_state=self.seed + self.generation,
+            ).fit(X)
+            for _ in range(self.trees_per_refresh):
+                self._trees.popleft()
+            for tree, features in zip(grown.estimators_, grown.estimators_features_):
+                self._trees.append((tree.tree_, np.asarray(features)))
+
+            # Keep the contamination semantics: threshold at that quantile of recent traffic
+            scorer = ForestScorer.from_trees(list(self._trees), self._max_samples, offset=0.0)
+            scorer.offset = float(np.percentile(scorer.score_samples(X), 100.0 * self.model.contamination))
+
+            # Calibrated scores keep their meaning: match new-score quantiles to old
+            # ones on the fixed reference rows, so recent traffic is free to shift
+            R = self._reference
+            calibrator = old_calibrator.remap(-old.decision_function(R), -scorer.decision_function(R))
+
+            # Atomic swap; in-flight requests finish on the pair they already hold
+            self.model.model = None
+            self.model.install(scorer, calibrator)
+            self.model.refresh_generation = self.generation  # tags decisions "<version>+r<n>"
+
+            after = self._normalized(scorer, calibrator, X)
+            report = {
+                "generation": self.generation,
+                "timestamp": time.time(),
+                "reservoir_rows": int(len(X)),
+                "trees_replaced": self.trees_per_refresh,
+                "fit_ms": round((time.perf_counter() - start) * 1000, 2),
+                "scores_before": _score_summary(before, self.flag_threshold),
+                "scores_after": _score_summary(after, self.flag_threshold),
+                "ks_vs_baseline": round(_ks_statistic(self._baseline, before), 4),
+            }
+            self.refreshes.append(report)
+            return report
+
+    @staticmethod
+    def _normalized(scorer: ForestScorer, calibrator, X: np.ndarray) -> np.ndarray:
+        # Same [0, 1] mapping as AnomalyModel.score_features
+        return calibrator.transform(-scorer.decision_function(X))
+
+    def freeze(self, frozen: bool = True) -> None:
+        """Stop (or resume) adapting, e.g. while an attack is investigated."""
+        self.frozen = frozen
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="anomaly-refresh", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            if self._stopped:
+                return
+            if self._since == 0:
+                continue
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as exc:  # keep serving on the current forest
+                self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def get_drift_report(self) -> dict:
+        """
+        Refresh history plus the current score distribution vs the baseline.
+
+        The baseline is the reservoir at the first refresh, scored by the
+        originally trained forest.
+        """
+        X = self.reservoir()
+        current = self._normalized(self.model.scorer, self.model.calibrator, X) if len(X) else np.empty(0)
+        return {
+            "generation": self.generation,
+            "frozen": self.frozen,
+            "observed": self._count,
+            "reservoir_rows": int(len(X)),
+            "trees": len(self._trees),
+            "trees_per_refresh": self.trees_per_refresh,
+            "baseline": _score_summary(self._baseline, self.flag_threshold) if self._baseline is not None else None,
+            "current": _score_summary(current, self.flag_threshold),
+            "ks_vs_baseline": (
+                round(_ks_statistic(self._baseline, current), 4) if self._baseline is not None else None
+            ),
+            "last_error": self.last_error,
+            "refreshes": list(self.refreshes),
+        }
@@ -0,0 +1,9 @@
+"""
+DecisionForge benchmark suite.
+
+Run:
+    python -m benchmarks                          # micro + API load test
+    python -m benchmarks --quick                  # batch sizes up to 10^4
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks --compare benchmarks/baseline.json
+"""
@@ -0,0 +1,89 @@
+"""
+Run the benchmark suite.
+
+    python -m benchmarks [--quick] [--sizes 1,100,10000] [--skip-api]
+                         [--out results.json] [--save-baseline PATH]
+                         [--compare PATH] [--tolerance 0.25]
+
+Exit status is 1 when --compare finds a regression beyond --tolerance.
+"""
+
+import argparse
+import sys
+import time
+
+from app.config_loader import load_config
+from benchmarks import harness, load, micro
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="DecisionForge benchmark suite")
+    parser.add_argument("--config", default="configs/ecommerce.yaml")
+    parser.add_argument("--sizes", help="comma-separated batch sizes (default 1..10^6)")
+    parser.add_argument("--quick", action="store_true", help="batch sizes up to 10^4, fewer API requests")
+    parser.add_argument("--loop-cap", type=int, default=10_000, help="largest n for per-row APIs")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per sample")
+    parser.add_argument("--skip-api", action="store_true", help="skip the ASGI load test")
+    parser.add_argument("--requests", type=int, default=None, help="API load-test requests")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--out", default="benchmarks/results/latest.json")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also write results as the baseline")
+    parser.add_argument("--compare", metavar="PATH", help="baseline to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative slowdown allowed")
+    args = parser.parse_args(argv)
+
+    if args.sizes:
+        sizes = [int(float(s)) for s in args.sizes.split(",")]
+    elif args.quick:
+        sizes = [s for s in micro.DEFAULT_SIZES if s <= 10_000]
+    else:
+        sizes = list(micro.DEFAULT_SIZES)
+    requests = args.requests or (200 if args.quick else 1000)
+
+    from app.ml.demo import train_models
+
+    config = load_config(args.config)
+    churn_model, anomaly_model = train_models()
+
+    started = time.time()
+    results = {
+        "created_at": started,
+        "environment": None,
+        "benchmarks": micro.run(
+            config, churn_model, anomaly_model,
+            sizes=sizes,
+            loop_cap=args.loop_cap,
+            repeat=args.repeat,
+            min_time=args.min_time,
+            progress=lambda name: print(f"  {name}", file=sys.stderr),
+        ),
+    }
+    if not args.skip_api:
+        print("  api load test", file=sys.stderr)
+        api_results = load.run(requests=requests, concurrency=args.concurrency)
+        results["benchmarks"].update(api_results.pop("benchmarks"))
+        results["api"] = api_results
+    results["environment"] = harness.environment()
+    results["elapsed_s"] = round(time.time() - started, 1)
+
+    print(harness.format_results(results))
+    harness.save_results(results, args.out)
+    print(f"\nResults written to {args.out}")
+    if args.save_baseline:
+        harness.save_results(results, args.save_baseline)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.compare:
+        rows = harness.compare(results, harness.load_results(args.compare), tolerance=args.tolerance)
+        print()
+        print(harness.format_comparison(rows))
+        regressions = [row["name"] for row in rows if row["status"] == "REGRESSION"]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
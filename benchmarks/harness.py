@@ -0,0 +1,173 @@
+"""
+Benchmark Harness
+-----------------
+Timing, environment capture and baseline comparison shared by the
+micro-benchmarks and the API load test.
+
+Design Trade-offs:
+  - timeit-style auto-ranging: each sample runs the case enough times to
+    last at least `min_time`, so sub-microsecond calls are not dominated by
+    timer resolution. The median of `repeat` samples is reported; min and
+    p95 are kept for judging noise.
+  - GC is disabled while a sample runs (as timeit does) and stdout is sent
+    to /dev/null so the audit logger's prints measure formatting cost, not
+    terminal speed.
+  - Regressions are judged on median time per item against a stored JSON
+    baseline with a relative tolerance, since absolute numbers only mean
+    something on the machine that produced them.
+"""
+
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+def measure(
+    fn: Callable[[], Any],
+    items: int = 1,
+    repeat: int = 7,
+    min_time: float = 0.05,
+) -> Dict[str, float]:
+    """
+    Time `fn` and return per-call and per-item statistics.
+
+    Args:
+        fn       : zero-argument callable (one call = one benchmark operation)
+        items    : rows processed per call, for per-item cost and throughput
+        repeat   : number of samples
+        min_time : minimum seconds per sample; calls are looped to reach it
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fn()  # warm-up (caches, lazy imports, first-call allocation)
+
+        # Calibrate loops per sample
+        loops = 1
+        while True:
+            elapsed = _sample(fn, loops)
+            if elapsed >= min_time or loops >= 1 << 20:
+                break
+            loops *= 10 if elapsed < min_time / 10 else 2
+        if loops == 1 and elapsed > 1.0:
+            repeat = min(repeat, 3)  # 10^6-row cases: a few samples are enough
+
+        per_call = [_sample(fn, loops) / loops for _ in range(repeat)]
+
+    per_call.sort()
+    median = statistics.median(per_call)
+    return {
+        "items": items,
+        "loops": loops,
+        "repeat": repeat,
+        "median_s": median,
+        "min_s": per_call[0],
+        "p95_s": per_call[min(len(per_call) - 1, int(round(0.95 * (len(per_call) - 1))))],
+        "per_item_ns": median / items * 1e9,
+        "items_per_s": items / median if median > 0 else float("inf"),
+    }
+
+
+def _sample(fn: Callable[[], Any], loops: int) -> float:
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def environment() -> Dict[str, Any]:
+    """Versions and hardware facts needed to interpret a result file."""
+    env = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    for name in ("numpy", "pandas", "sklearn", "fastapi", "pydantic"):
+        module = sys.modules.get(name)
+        if module is not None:
+            env[name] = getattr(module, "__version__", "unknown")
+    return env
+
+
+# ---------------------------------------------------------------------------
+# Result files
+# ---------------------------------------------------------------------------
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    Compare two result files benchmark by benchmark.
+
+    A benchmark regresses when its median per-item time is more than
+    `tolerance` (relative) above the baseline, and improves when it is more
+    than `tolerance` below. Benchmarks missing from either side are skipped.
+
+    Returns:
+        list of rows: name, baseline_ns, current_ns, ratio, status
+    """
+    rows = []
+    base = baseline.get("benchmarks", {})
+    for name, result in current.get("benchmarks", {}).items():
+        if name not in base:
+            continue
+        old, new = base[name]["per_item_ns"], result["per_item_ns"]
+        ratio = new / old if old else float("inf")
+        if ratio > 1 + tolerance:
+            status = "REGRESSION"
+        elif ratio < 1 / (1 + tolerance):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({"name": name, "baseline_ns": old, "current_ns": new, "ratio": ratio, "status": status})
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':<44} {'baseline/item':>14} {'current/item':>14} {'ratio':>7}  status"]
+    for row in rows:
+        lines.append(
+            f"{row['name']:<44} {_fmt_ns(row['baseline_ns']):>14} {_fmt_ns(row['current_ns']):>14} "
+            f"{row['ratio']:>7.2f}  {row['status']}"
+        )
+    return "\n".join(lines)
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    lines = [f"{'benchmark':<44} {'per call':>12} {'per item':>12} {'items/s':>14}"]
+    for name, r in results.get("benchmarks", {}).items():
+        lines.append(
+            f"{name:<44} {_fmt_ns(r['median_s'] * 1e9):>12} {_fmt_ns(r['per_item_ns']):>12} "
+            f"{r['items_per_s']:>14,.0f}"
+        )
+    return "\n".join(lines)
+
+
+def _fmt_ns(ns: Optional[float]) -> str:
+    if ns is None:
+        return "-"
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("µs", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f}{unit}"
+    return f"{ns:.0f}ns"
@@ -0,0 +1,132 @@
+"""
+API Load Test
+-------------
+In-process load test of the FastAPI app through its ASGI interface.
+
+Requests go through httpx.AsyncClient + ASGITransport, so routing,
+validation, the handler and response serialization are all exercised
+without sockets or a uvicorn process. Numbers are therefore an upper bound
+on what a single worker can serve; network and TLS are not included.
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+
+from app.core.simulation import synthetic_users
+
+
+def _payloads(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    users = synthetic_users(n, seed=seed)
+    return [
+        {
+            "user_id": f"user_{i:06d}",
+            "features": {
+                "tenure": float(users["tenure"][i]),
+                "monthly_charges": float(users["monthly_charges"][i]),
+                "request_count_today": int(users["request_count_today"][i]),
+                "login_attempts": int(users["login_attempts"][i]),
+            },
+        }
+        for i in range(n)
+    ]
+
+
+async def _drive(app, path: str, bodies: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    latencies = np.zeros(len(bodies))
+    errors = 0
+    next_index = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            nonlocal next_index, errors
+            while next_index < len(bodies):
+                i = next_index
+                next_index += 1
+                start = time.perf_counter()
+                response = await client.post(path, json=bodies[i])
+                latencies[i] = time.perf_counter() - start
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    lat_ms = latencies * 1000
+    return {
+        "requests": len(bodies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "requests_per_s": len(bodies) / elapsed,
+        "latency_ms": {
+            "p50": float(np.percentile(lat_ms, 50)),
+            "p95": float(np.percentile(lat_ms, 95)),
+            "p99": float(np.percentile(lat_ms, 99)),
+            "max": float(lat_ms.max()),
+        },
+    }
+
+
+def run(requests: int = 500, concurrency: int = 8, batch_size: int = 100) -> Dict[str, Any]:
+    """
+    Load-test /api/v1/decide and /api/v1/decide/batch.
+
+    Startup is invoked directly (ASGITransport does not send lifespan events).
+
+    Returns:
+        {"decide": stats, "decide_batch": stats, "stages": server-side stage percentiles}
+        plus benchmark entries in the harness format under "benchmarks".
+    """
+    from app.ai import api
+    from app.core.metrics import default_registry
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        api.startup_event()
+        default_registry.reset()
+
+        single = _payloads(requests)
+        batches = [
+            {"users": single[i:i + batch_size]}
+            for i in range(0, len(single), batch_size)
+        ]
+        # Warm-up outside the measured runs
+        asyncio.run(_drive(api.app, "/api/v1/decide", single[:20], concurrency=1))
+        default_registry.reset()
+
+        decide = asyncio.run(_drive(api.app, "/api/v1/decide", single, concurrency))
+        decide_batch = asyncio.run(_drive(api.app, "/api/v1/decide/batch", batches, concurrency=1))
+        api.shutdown_event()
+
+    decide_batch["users_per_s"] = requests / decide_batch["elapsed_s"]
+    return {
+        "decide": decide,
+        "decide_batch": decide_batch,
+        "stages": api._engine.get_latency_profile()["stages"],
+        "benchmarks": {
+            f"api.decide[c={concurrency}]": _as_benchmark(decide, items=1),
+            f"api.decide_batch[n={batch_size}]": _as_benchmark(decide_batch, items=batch_size),
+        },
+    }
+
+
+def _as_benchmark(stats: Dict[str, Any], items: int) -> Dict[str, float]:
+    """Express a load-test run in the harness result format (per request)."""
+    per_call = stats["latency_ms"]["p50"] / 1000
+    return {
+        "items": items,
+        "loops": stats["requests"],
+        "repeat": 1,
+        "median_s": per_call,
+        "min_s": per_call,
+        "p95_s": stats["latency_ms"]["p95"] / 1000,
+        "per_item_ns": per_call / items * 1e9,
+        "items_per_s": stats["requests"] * items / stats["elapsed_s"],
+    }
@@ -0,0 +1,112 @@
+"""
+Micro-benchmarks
+----------------
+Per-component timings for the decision pipeline at batch sizes 1 → 10^6.
+
+Components:
+  preprocessor.transform     FeaturePreprocessor.transform on churn features
+  churn.predict_proba        single dict (n=1) / predict_proba_batch (n>1)
+  anomaly.score              single dict (n=1) / score_batch (n>1)
+  engine.decide              DecisionEngine.decide called n times (incl. audit)
+  engine.decide_batch        vectorized DecisionEngine.decide_batch
+  audit.log                  AuditLogger.log called n times
+
+Per-row APIs (decide, audit.log) are looped, so they stop at `loop_cap` rows.
+"""
+
+import contextlib
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+import pandas as pd
+
+from app.core.audit import AuditLogger
+from app.core.decision_engine import DecisionEngine
+from app.core.simulation import synthetic_users
+from benchmarks.harness import measure
+
+DEFAULT_SIZES = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def cases(
+    config: dict,
+    churn_model,
+    anomaly_model,
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    loop_cap: int = 10_000,
+    seed: int = 42,
+) -> Iterator[Tuple[str, int, Callable[[], Any]]]:
+    """Yield (name, items, fn) for every component × batch size."""
+    engine = DecisionEngine(config)
+    audit = AuditLogger()
+    preprocessor = churn_model.preprocessor
+
+    for n in sizes:
+        users = pd.DataFrame(synthetic_users(n, seed=seed))
+        churn_df = preprocessor.engineer_churn_features(users[["tenure", "monthly_charges"]])
+        churn_X = churn_df[churn_model.FEATURE_COLS]
+        anomaly_df = users[["request_count_today", "login_attempts"]]
+
+        churn = churn_model.predict_proba_batch(users)
+        lift = churn * 0.3
+        anomaly = anomaly_model.score_batch(anomaly_df)
+        requests = users["request_count_today"].to_numpy()
+
+        yield f"preprocessor.transform[n={n}]", n, lambda X=churn_X: preprocessor.transform(X)
+
+        if n == 1:
+            churn_row = users[["tenure", "monthly_charges"]].iloc[0].to_dict()
+            anomaly_row = anomaly_df.iloc[0].to_dict()
+            yield "churn.predict_proba[n=1]", 1, lambda row=churn_row: churn_model.predict_proba(row)
+            yield "anomaly.score[n=1]", 1, lambda row=anomaly_row: anomaly_model.score(row)
+        else:
+            yield f"churn.predict_proba[n={n}]", n, lambda df=users: churn_model.predict_proba_batch(df)
+            yield f"anomaly.score[n={n}]", n, lambda df=anomaly_df: anomaly_model.score_batch(df)
+
+        yield (
+            f"engine.decide_batch[n={n}]", n,
+            lambda c=churn, l=lift, a=anomaly, r=requests: engine.decide_batch(c, l, a, r),
+        )
+        # Budget sized to fund roughly a tenth of the batch
+        budget = max(n // 10, 1) * engine.roi_calculator.cost
+        yield (
+            f"engine.decide_batch+budget[n={n}]", n,
+            lambda c=churn, l=lift, a=anomaly, r=requests, b=budget: engine.decide_batch(c, l, a, r, budget=b),
+        )
+
+        if n <= loop_cap:
+            rows = [
+                {
+                    "churn_probability": float(c),
+                    "expected_lift": float(l),
+                    "anomaly_score": float(a),
+                    "request_count_today": int(r),
+                }
+                for c, l, a, r in zip(churn, lift, anomaly, requests)
+            ]
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                decisions = [engine.decide(row) for row in rows]
+            yield f"engine.decide[n={n}]", n, lambda rows=rows: [engine.decide(row) for row in rows]
+            yield (
+                f"audit.log[n={n}]", n,
+                lambda pairs=list(zip(rows, decisions)): [audit.log(i, d) for i, d in pairs],
+            )
+
+
+def run(
+    config: dict,
+    churn_model,
+    anomaly_model,
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    loop_cap: int = 10_000,
+    repeat: int = 7,
+    min_time: float = 0.05,
+    progress: Callable[[str], None] = None,
+) -> Dict[str, Dict[str, float]]:
+    """Measure every case; returns {benchmark name: stats}."""
+    results = {}
+    for name, items, fn in cases(config, churn_model, anomaly_model, sizes, loop_cap):
+        results[name] = measure(fn, items=items, repeat=repeat, min_time=min_time)
+        if progress:
+            progress(name)
+    return results
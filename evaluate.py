@@ -1,86 +1,138 @@
+"""
+evaluate.py
+-----------
+Business simulation: baseline (intervene on churn probability alone) vs
+DecisionForge net revenue.
+
+Run:
+    python evaluate.py                                  # five-user walkthrough
+    python evaluate.py --users 1000000                  # synthetic population + CI
+    python evaluate.py --data users.csv --resamples 2000 --workers 8
+
+`--data` replays a CSV of real users with columns tenure, monthly_charges,
+request_count_today and (optionally) login_attempts.
+"""
+
+import argparse
+
 import pandas as pd
 from app.config_loader import load_config
 from app.core.decision_engine import DecisionEngine
-from app.ml.churn_model import ChurnModel
-from app.ml.anomaly_model import AnomalyModel
-
-# Load config
-config = load_config("configs/ecommerce.yaml")
-
-# Init models
-churn_model = ChurnModel()
-anomaly_model = AnomalyModel()
-
-# Dummy training data (same as before)
-churn_data = pd.DataFrame({
-    "tenure": [1, 5, 10, 2, 7],
-    "monthly_charges": [200, 150, 100, 220, 130],
-    "churn": [1, 0, 0, 1, 0]
-})
-
-anomaly_data = pd.DataFrame({
-    "request_count_today": [1, 2, 1, 10, 2],
-    "login_attempts": [1, 1, 1, 7, 1]
-})
-
-churn_model.train(churn_data, target="churn")
-anomaly_model.train(anomaly_data)
-
-engine = DecisionEngine(config)
-
-# Simulated users
-users = [
-    {"tenure": 1, "monthly_charges": 220, "request_count_today": 1},
-    {"tenure": 8, "monthly_charges": 120, "request_count_today": 1},
-    {"tenure": 2, "monthly_charges": 210, "request_count_today": 6},
-    {"tenure": 6, "monthly_charges": 140, "request_count_today": 1},
-    {"tenure": 3, "monthly_charges": 200, "request_count_today": 1},
-]
-
-baseline_revenue = 0
-forge_revenue = 0
-baseline_cost = 0
-forge_cost = 0
-
-for user in users:
-    churn_prob = churn_model.predict_proba({
-        "tenure": user["tenure"],
-        "monthly_charges": user["monthly_charges"]
-    })
-
-    expected_lift = churn_prob * 0.3
-    anomaly_score = anomaly_model.score({
-        "request_count_today": user["request_count_today"],
-        "login_attempts": 1
-    })
-
-    # ---- BASELINE ----
-    if churn_prob > 0.5:
-        baseline_cost += config["incentive_cost"]
-        baseline_revenue += config["revenue_per_user"] * 0.7
+from app.core.simulation import ROISimulator, synthetic_users
+from app.ml.demo import train_models
+
+
+def run_demo(config, churn_model, anomaly_model):
+    """Original walkthrough over five hand-picked users."""
+    engine = DecisionEngine(config)
+
+    # Simulated users
+    users = [
+        {"tenure": 1, "monthly_charges": 220, "request_count_today": 1},
+        {"tenure": 8, "monthly_charges": 120, "request_count_today": 1},
+        {"tenure": 2, "monthly_charges": 210, "request_count_today": 6},
+        {"tenure": 6, "monthly_charges": 140, "request_count_today": 1},
+        {"tenure": 3, "monthly_charges": 200, "request_count_today": 1},
+    ]
+
+    baseline_revenue = 0
+    forge_revenue = 0
+    baseline_cost = 0
+    forge_cost = 0
+
+    for user in users:
+        churn_prob = churn_model.predict_proba({
+            "tenure": user["tenure"],
+            "monthly_charges": user["monthly_charges"]
+        })
+
+        expected_lift = churn_prob * 0.3
+        anomaly_score = anomaly_model.score({
+            "request_count_today": user["request_count_today"],
+            "login_attempts": 1
+        })
+
+        # ---- BASELINE ----
+        if churn_prob > 0.5:
+            baseline_cost += config["incentive_cost"]
+            baseline_revenue += config["revenue_per_user"] * 0.7
+        else:
+            baseline_revenue += config["revenue_per_user"]
+
+        # ---- DECISIONFORGE ----
+        decision = engine.decide({
+            "churn_probability": churn_prob,
+            "expected_lift": expected_lift,
+            "anomaly_score": anomaly_score,
+            "request_count_today": user["request_count_today"]
+        })
+
+        if decision["decision"] == "INTERVENE":
+            forge_cost += config["incentive_cost"]
+            forge_revenue += config["revenue_per_user"] * 0.7
+        else:
+            forge_revenue += config["revenue_per_user"]
+
+    # Results
+    baseline_net = baseline_revenue - baseline_cost
+    forge_net = forge_revenue - forge_cost
+
+    uplift_pct = ((forge_net - baseline_net) / baseline_net) * 100
+
+    print("\nBASELINE NET REVENUE:", baseline_net)
+    print("DECISIONFORGE NET REVENUE:", forge_net)
+    print("UPLIFT (%):", round(uplift_pct, 2))
+
+
+def run_simulation(config, churn_model, anomaly_model, args):
+    """Vectorized population-scale simulation with bootstrap CI on uplift."""
+    if args.data:
+        users = pd.read_csv(args.data)
+        if "login_attempts" not in users.columns:
+            users["login_attempts"] = 1
     else:
-        baseline_revenue += config["revenue_per_user"]
-
-    # ---- DECISIONFORGE ----
-    decision = engine.decide({
-        "churn_probability": churn_prob,
-        "expected_lift": expected_lift,
-        "anomaly_score": anomaly_score,
-        "request_count_today": user["request_count_today"]
-    })
-
-    if decision["decision"] == "INTERVENE":
-        forge_cost += config["incentive_cost"]
-        forge_revenue += config["revenue_per_user"] * 0.7
-    else:
-        forge_revenue += config["revenue_per_user"]
-
-# Results
-baseline_net = baseline_revenue - baseline_cost
-forge_net = forge_revenue - forge_cost
-
-uplift_pct = ((forge_net - baseline_net) / baseline_net) * 100
-
-print("\nBASELINE NET REVENUE:", baseline_net)
-print("DECISIONFORGE NET REVENUE:", forge_net)
-print("UPLIFT (%):", round(uplift_pct, 2))
\ No newline at end of file
+        users = pd.DataFrame(synthetic_users(args.users, seed=args.seed))
+
+    churn_prob = churn_model.predict_proba_batch(users[["tenure", "monthly_charges"]])
+    anomaly_score = anomaly_model.score_batch(users[["request_count_today", "login_attempts"]])
+
+    simulator = ROISimulator(config, budget=args.budget)
+    report = simulator.run(
+        churn_prob,
+        anomaly_score,
+        users["request_count_today"].to_numpy(),
+        n_resamples=args.resamples,
+        confidence=args.confidence,
+        workers=args.workers,
+        seed=args.seed,
+    )
+
+    print("\n" + "=" * 60)
+    print("POPULATION SIMULATION")
+    print("=" * 60)
+    for key, value in report.items():
+        print(f"{key:28s}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baseline vs DecisionForge revenue simulation")
+    parser.add_argument("--users", type=int, default=0, help="synthetic users to simulate (0 = demo only)")
+    parser.add_argument("--data", help="CSV of users to replay instead of synthetic users")
+    parser.add_argument("--resamples", type=int, default=1000, help="bootstrap resamples for the uplift CI")
+    parser.add_argument("--confidence", type=float, default=0.95, help="CI confidence level")
+    parser.add_argument("--workers", type=int, default=None, help="processes for resampling (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--budget", type=float, default=None, help="campaign incentive budget (default: unlimited)")
+    parser.add_argument("--config", default="configs/ecommerce.yaml")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    churn_model, anomaly_model = train_models()
+
+    run_demo(config, churn_model, anomaly_model)
+    if args.users or args.data:
+        run_simulation(config, churn_model, anomaly_model, args)
+
+
+if __name__ == "__main__":
+    main()
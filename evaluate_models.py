@@ -8,12 +8,21 @@ evaluation summary for the anomaly model.
 
 Run:
     python evaluate_models.py
+    python evaluate_models.py --tune      # stratified k-fold hyperparameter search first
 """
 
+import argparse
+
 import pandas as pd
 from app.ml.churn_model import ChurnModel
 from app.ml.anomaly_model import AnomalyModel
 
+parser = argparse.ArgumentParser(description="Offline churn / anomaly model evaluation")
+parser.add_argument("--tune", action="store_true", help="cross-validated hyperparameter search before the final fit")
+parser.add_argument("--folds", type=int, default=2, help="CV folds for --tune (the demo data has 2 labelled anomalies)")
+parser.add_argument("--workers", type=int, default=1, help="processes for --tune (0 = all cores)")
+args = parser.parse_args()
+
 # ---------------------------------------------------------------------------
 # Training data
 # ---------------------------------------------------------------------------
@@ -42,7 +51,10 @@ print("CHURN MODEL EVALUATION")
 print("=" * 60)
 
 churn_model = ChurnModel()
-churn_metrics = churn_model.train(churn_data, target="churn")
+if args.tune:
+    churn_metrics = churn_model.tune(churn_data, target="churn", n_splits=args.folds, workers=args.workers or None)
+else:
+    churn_metrics = churn_model.train(churn_data, target="churn")
 
 print(f"\nPrecision : {churn_metrics['precision']}")
 print(f"Recall    : {churn_metrics['recall']}")
@@ -60,10 +72,34 @@ print("ANOMALY MODEL EVALUATION")
 print("=" * 60)
 
 anomaly_model = AnomalyModel()
-anomaly_metrics = anomaly_model.train(anomaly_data, labels=anomaly_labels)
+if args.tune:
+    anomaly_metrics = anomaly_model.tune(anomaly_data, anomaly_labels, n_splits=args.folds, workers=args.workers or None)
+else:
+    anomaly_metrics = anomaly_model.train(anomaly_data, labels=anomaly_labels)
 
 for key, value in anomaly_metrics.items():
-    print(f"{key:25s}: {value}")
+    if key != "cross_validation":
+        print(f"{key:25s}: {value}")
+
+
+def print_search(cv: dict) -> None:
+    """Best candidate and its per-fold metrics from a tune() report."""
+    print(f"\nCross-validation ({cv['n_splits']} folds, {cv['scoring']}): "
+          f"{cv['fits']} fits, {cv['candidates_pruned']}/{cv['candidates_total']} candidates pruned, "
+          f"{cv['elapsed_s']}s on {cv['workers']} worker(s)")
+    print(f"Best params : {cv['best_params']}  (mean {cv['scoring']} {cv['best_score']})")
+    for i, fold in enumerate(cv["best_fold_metrics"]):
+        print(f"  fold {i}: " + ", ".join(f"{k}={v}" for k, v in fold.items()))
+
+
+if args.tune:
+    print("\n" + "=" * 60)
+    print("CROSS-VALIDATED TUNING")
+    print("=" * 60)
+    print("\nChurn model:")
+    print_search(churn_metrics["cross_validation"])
+    print("\nAnomaly model:")
+    print_search(anomaly_metrics["cross_validation"])
 
 # ---------------------------------------------------------------------------
 # Inference sanity check
@@ -0,0 +1,109 @@
+"""
+optimize_policy.py
+------------------
+Threshold sweep over revenue_per_user, incentive_cost, anomaly_threshold
+and request_limit, reporting expected value, intervention rate, flag rate
+and the Pareto frontier.
+
+Run:
+    python optimize_policy.py --users 1000000
+    python optimize_policy.py --data scored.csv \
+        --revenue 80:121:5 --cost 10:31:2 --anomaly 0.5:0.96:0.05 --limit 5,10,15,20
+
+`--data` is a scored CSV with churn_probability, anomaly_score and
+request_count_today (expected_lift defaults to churn_probability * 0.3).
+Grid values are either a comma list or start:stop:step.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from app.config_loader import load_config
+from app.core.policy_optimizer import sweep
+from app.core.simulation import synthetic_users
+
+
+def parse_grid(spec: str) -> np.ndarray:
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        return np.round(np.arange(start, stop, step), 6)
+    return np.array([float(x) for x in spec.split(",")])
+
+
+def load_scored(args) -> pd.DataFrame:
+    if args.data:
+        scored = pd.read_csv(args.data)
+    else:
+        # Score synthetic users with the demo models
+        from app.ml.demo import train_models
+
+        churn_model, anomaly_model = train_models()
+        users = pd.DataFrame(synthetic_users(args.users, seed=args.seed))
+        scored = pd.DataFrame({
+            "churn_probability": churn_model.predict_proba_batch(users),
+            "anomaly_score": anomaly_model.score_batch(users),
+            "request_count_today": users["request_count_today"],
+        })
+    if "expected_lift" not in scored.columns:
+        scored["expected_lift"] = scored["churn_probability"] * 0.3
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep decision thresholds over a scored dataset")
+    parser.add_argument("--data", help="scored CSV (churn_probability, anomaly_score, request_count_today)")
+    parser.add_argument("--users", type=int, default=100_000, help="synthetic users when --data is not given")
+    parser.add_argument("--revenue", default=None, help="revenue_per_user grid")
+    parser.add_argument("--cost", default=None, help="incentive_cost grid")
+    parser.add_argument("--anomaly", default="0.5:0.96:0.05", help="anomaly_threshold grid")
+    parser.add_argument("--limit", default="5,8,10,15,20", help="request_limit grid")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--top", type=int, default=10, help="rows to print")
+    parser.add_argument("--out", help="write every grid point to this CSV")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--config", default="configs/ecommerce.yaml")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    revenue = parse_grid(args.revenue) if args.revenue else np.linspace(
+        0.5 * config["revenue_per_user"], 1.5 * config["revenue_per_user"], 11
+    )
+    cost = parse_grid(args.cost) if args.cost else np.linspace(
+        0.5 * config["incentive_cost"], 1.5 * config["incentive_cost"], 11
+    )
+
+    scored = load_scored(args)
+    report = sweep(
+        scored["churn_probability"].to_numpy(),
+        scored["expected_lift"].to_numpy(),
+        scored["anomaly_score"].to_numpy(),
+        scored["request_count_today"].to_numpy(),
+        revenue,
+        cost,
+        parse_grid(args.anomaly),
+        parse_grid(args.limit),
+        workers=args.workers,
+    )
+
+    pareto, best = report.pop("pareto"), report.pop("best")
+    grid = pd.DataFrame(report)
+
+    print("=" * 60)
+    print(f"POLICY SWEEP: {len(grid)} grid points over {len(scored)} users")
+    print("=" * 60)
+    print("\nBest expected value:")
+    print(grid.iloc[[best]].to_string())
+    print(f"\nTop {args.top} by expected value:")
+    print(grid.nlargest(args.top, "expected_value").to_string())
+    print(f"\nPareto frontier ({len(pareto)} points; max EV, min intervention rate, min flag rate):")
+    print(grid.iloc[pareto].sort_values("expected_value", ascending=False).head(args.top).to_string())
+
+    if args.out:
+        grid.assign(pareto=grid.index.isin(pareto)).to_csv(args.out, index=False)
+        print(f"\nWrote {len(grid)} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+replay.py
+---------
+Replay a decision log through a candidate config (and optionally freshly
+scored models) and report how many decisions flip and the change in
+expected value.
+
+Run:
+    python replay.py logs/decisions.dflog --config configs/candidate.yaml
+    python replay.py logs/decisions.dflog --config configs/candidate.yaml --rescore
+    python replay.py logs/decisions.dflog --model-version v0003 --registry models
+
+Without --rescore the logged model scores are reused, so only the config
+changes. With --rescore, raw logged features are re-scored by freshly
+trained models. With --model-version they are re-scored by that registered
+version instead.
+"""
+
+import argparse
+import json
+import time
+
+from app.config_loader import load_config
+from app.core.decision_engine import DecisionEngine
+from app.core.decision_log import iter_decision_log
+from app.core.replay import replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a decision log through a candidate engine")
+    parser.add_argument("log", help="decision log file (.dflog)")
+    parser.add_argument("--config", default="configs/ecommerce.yaml", help="candidate config")
+    parser.add_argument("--rescore", action="store_true", help="re-score raw features with candidate models")
+    parser.add_argument("--model-version", help="re-score with this registered model version (implies --rescore)")
+    parser.add_argument("--registry", default="models", help="model registry directory for --model-version")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    engine = DecisionEngine(load_config(args.config))
+    churn_model = anomaly_model = None
+    if args.model_version:
+        from app.ml.registry import ModelRegistry
+
+        registry = ModelRegistry(args.registry)
+        churn_model, anomaly_model, _ = registry.load(registry.resolve(args.model_version))
+    elif args.rescore:
+        from app.ml.demo import train_models
+
+        churn_model, anomaly_model = train_models()
+
+    start = time.perf_counter()
+    report = replay(
+        iter_decision_log(args.log, chunk_size=args.chunk_size),
+        engine,
+        churn_model=churn_model,
+        anomaly_model=anomaly_model,
+    )
+    if args.model_version:
+        report["model_version"] = registry.resolve(args.model_version)
+    report["elapsed_s"] = round(time.perf_counter() - start, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
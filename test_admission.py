@@ -0,0 +1,117 @@
+"""
+Test: admission control sheds load instead of queueing it (app.ai.admission).
+
+Drives AdmissionController directly on an event loop: requests beyond the
+concurrency limit queue FIFO up to max_queue, the rest are shed as
+queue_full; hopeless deadlines are shed before queueing and expired
+waiters never get a slot; deep queues mark admitted requests degraded.
+
+Run:
+    python test_admission.py
+    python -m pytest test_admission.py -q
+"""
+import asyncio
+import time
+
+from app.ai.admission import AdmissionController
+from app.core.metrics import MetricsRegistry
+
+
+def _controller(**kwargs) -> AdmissionController:
+    return AdmissionController().configure(metrics=MetricsRegistry(), **kwargs)
+
+
+def test_queue_full_is_shed_and_waiters_run_fifo():
+    async def scenario():
+        controller = _controller(max_concurrency=2, max_queue=2)
+        assert await controller.acquire(None) is None
+        assert await controller.acquire(None) is None
+        order = []
+
+        async def waiter(name):
+            reason = await controller.acquire(None)
+            order.append(name)
+            return reason
+
+        queued = [asyncio.create_task(waiter(i)) for i in range(2)]
+        await asyncio.sleep(0)
+        assert await controller.acquire(None) == "queue_full"
+
+        controller.release(0.01)
+        controller.release(0.01)
+        assert await asyncio.gather(*queued) == [None, None]
+        assert order == [0, 1]
+        assert controller.in_flight == 2
+        return controller.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["shed"] == {"queue_full": 1, "deadline": 0}
+    assert stats["queued"] == 0
+
+
+def test_hopeless_deadline_is_shed_before_queueing():
+    async def scenario():
+        controller = _controller(max_concurrency=1, max_queue=10)
+        controller.service_s = 0.5  # learned average service time
+        assert await controller.acquire(None) is None
+        # Wait (0.5s) plus service (0.5s) cannot finish within 0.2s
+        return await controller.acquire(time.monotonic() + 0.2), controller
+
+    reason, controller = asyncio.run(scenario())
+    assert reason == "deadline"
+    assert controller.get_stats()["queued"] == 0
+
+
+def test_waiter_whose_deadline_passes_is_shed_and_frees_its_place():
+    async def scenario():
+        controller = _controller(max_concurrency=1, max_queue=10)
+        assert await controller.acquire(None) is None
+        reason = await controller.acquire(time.monotonic() + 0.05)
+        controller.release(0.01)  # nobody waiting: the slot is simply freed
+        return reason, controller
+
+    reason, controller = asyncio.run(scenario())
+    assert reason == "deadline"
+    assert controller.in_flight == 0
+    assert controller.get_stats()["queued"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = _controller(max_concurrency=1, max_queue=10)
+        assert await controller.acquire(None) is None
+        task = asyncio.create_task(controller.acquire(None))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        controller.release(0.01)
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.in_flight == 0
+    assert controller.get_stats()["queued"] == 0
+
+
+def test_deep_queue_and_short_deadline_degrade():
+    async def scenario():
+        controller = _controller(max_concurrency=1, max_queue=10, degrade_queue_depth=2)
+        assert await controller.acquire(None) is None
+        assert not controller.should_degrade(None)
+        waiters = [asyncio.create_task(controller.acquire(None)) for _ in range(2)]
+        await asyncio.sleep(0)
+        deep = controller.should_degrade(None)
+        for _ in range(3):
+            controller.release(0.01)
+        await asyncio.gather(*waiters)
+        controller.service_s = 0.5
+        return deep, controller.should_degrade(time.monotonic() + 0.1), controller.should_degrade(None)
+
+    deep, short_deadline, no_deadline = asyncio.run(scenario())
+    assert deep and short_deadline and not no_deadline
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  ✓ {name}")
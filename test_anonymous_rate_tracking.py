@@ -0,0 +1,59 @@
+"""
+Test: requests without a user_id are not mass-flagged by rate tracking (app.ai.api).
+
+Drives the API through FastAPI's TestClient. Anonymous traffic from one
+address is untracked by default; with `anonymous: client` it is counted
+per address, but those counts never reach the daily request_limit gate
+(one gateway or NAT address fronts many users). Named users still are.
+
+Run:
+    python test_anonymous_rate_tracking.py
+    python -m pytest test_anonymous_rate_tracking.py -q
+"""
+from fastapi.testclient import TestClient
+
+from app.ai import api
+
+QUIET = {"tenure": 6, "monthly_charges": 150, "request_count_today": 1, "login_attempts": 1}
+
+
+def _batch(client: TestClient, users: list) -> list:
+    response = client.post("/api/v1/decide/batch", json={"users": users})
+    assert response.status_code == 200
+    return [d["decision"] for d in response.json()["decisions"]]
+
+
+def test_anonymous_batch_is_not_flagged_by_default():
+    with TestClient(api.app) as client:
+        assert not api._track_anonymous
+        decisions = _batch(client, [{"features": QUIET}] * 20)
+        decisions += _batch(client, [{"features": QUIET}] * 20)
+    assert "FLAG" not in decisions
+
+
+def test_client_counts_stay_out_of_the_daily_limit():
+    with TestClient(api.app) as client:
+        api._track_anonymous = True
+        try:
+            decisions = _batch(client, [{"features": QUIET}] * 20)
+            # Still counted per address, for the burst limits
+            stats = client.get("/api/v1/metrics").json()["rate_tracking"]
+        finally:
+            api._track_anonymous = False
+    assert "FLAG" not in decisions
+    assert stats["users"] == 1
+
+
+def test_named_user_is_flagged_past_the_daily_limit():
+    with TestClient(api.app) as client:
+        decisions = _batch(client, [{"user_id": "u1", "features": QUIET}] * 12)
+    # request_limit is 10 in configs/ecommerce.yaml
+    assert "FLAG" not in decisions[:10]
+    assert decisions[10:] == ["FLAG", "FLAG"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  ✓ {name}")
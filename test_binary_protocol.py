@@ -0,0 +1,96 @@
+"""
+Test: binary protocol round trips (app.ai.binary_protocol).
+
+Requests, responses (with and without a budget), attribute columns and
+error bodies must decode to exactly what was encoded, and malformed bodies
+must be rejected with ValueError (the API turns that into a 400).
+
+Run:
+    python test_binary_protocol.py
+    python -m pytest test_binary_protocol.py -q
+"""
+import numpy as np
+
+from app.ai.binary_protocol import (
+    REQUEST_DTYPE,
+    RESPONSE_DTYPE,
+    decode_error,
+    decode_requests,
+    decode_responses,
+    encode_error,
+    encode_requests,
+    encode_responses,
+    request_dtype,
+)
+
+
+def _requests(n: int, dtype=REQUEST_DTYPE) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    records = np.zeros(n, dtype=dtype)
+    records["user_id"] = [f"user_{i}".encode() for i in range(n)]
+    records["tenure"] = rng.uniform(0, 72, n)
+    records["monthly_charges"] = rng.uniform(10, 300, n)
+    records["request_count_today"] = rng.integers(0, 50, n)
+    records["login_attempts"] = rng.integers(0, 5, n)
+    return records
+
+
+def test_request_round_trip_with_and_without_budget():
+    records = _requests(100)
+    decoded, budget = decode_requests(encode_requests(records))
+    assert budget is None
+    assert decoded.tobytes() == records.tobytes()
+
+    decoded, budget = decode_requests(encode_requests(records, budget=1234.5))
+    assert budget == 1234.5
+    assert (decoded["user_id"] == records["user_id"]).all()
+
+
+def test_response_round_trip():
+    out = np.zeros(3, dtype=RESPONSE_DTYPE)
+    out["decision"] = [0, 1, 2]
+    out["expected_value"] = [12.5, -1.0, 0.0]
+    decoded, remaining = decode_responses(encode_responses(out, remaining_budget=40.0))
+    assert remaining == 40.0
+    assert decoded.tobytes() == out.tobytes()
+
+
+def test_attribute_columns_round_trip():
+    dtype = request_dtype({"segment": "S16", "days_since_last_incentive": "f4"})
+    records = _requests(4, dtype)
+    records["segment"] = [b"vip", b"smb", b"", b"enterprise"]
+    records["days_since_last_incentive"] = [3, np.nan, 10, 0]
+    decoded, _ = decode_requests(encode_requests(records, dtype=dtype), dtype)
+    assert decoded["segment"].tolist() == [b"vip", b"smb", b"", b"enterprise"]
+    assert np.isnan(decoded["days_since_last_incentive"][1])
+    # A server without the attribute columns configured rejects the body
+    try:
+        decode_requests(encode_requests(records, dtype=dtype))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("body with unexpected columns was accepted")
+
+
+def test_empty_batch_and_error_body():
+    decoded, _ = decode_requests(encode_requests(np.zeros(0, dtype=REQUEST_DTYPE)))
+    assert len(decoded) == 0
+    assert decode_error(encode_error("Decision failed: boom")) == "Decision failed: boom"
+    assert decode_error(encode_responses(np.zeros(1, dtype=RESPONSE_DTYPE))) is None
+
+
+def test_malformed_bodies_are_rejected():
+    body = encode_requests(_requests(2))
+    for bad in (body[:10], body[:-1], b"XXXXX" + body[5:], encode_responses(np.zeros(2, dtype=RESPONSE_DTYPE))):
+        try:
+            decode_requests(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted malformed body {bad[:16]!r}")
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  ✓ {name}")
@@ -0,0 +1,166 @@
+"""
+Test: decision logs round-trip through write → read → replay (app.core.decision_log).
+
+Rows written by both append paths read back unchanged, with -1 in the rate
+columns of rows that were not tracked. Replaying them through the engine
+that made the decisions flips nothing, and through one without
+`rate_limits:` flips exactly the rate-flagged rows. A version 1 log still
+reads and replays, and opening a writer on it moves it aside. The API's
+vectorized path logs untracked rows as -1.
+
+Run:
+    python test_decision_log.py
+    python -m pytest test_decision_log.py -q
+"""
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from app.config_loader import load_config
+from app.core.decision_engine import DecisionEngine
+from app.core.decision_log import (
+    FORMAT_VERSION,
+    MAGIC,
+    RECORD_DTYPE,
+    RECORD_DTYPE_V1,
+    DecisionLogWriter,
+    iter_decision_log,
+    read_decision_log,
+)
+from app.core.records import DecisionCode
+from app.core.replay import replay
+
+
+def _engine(rate_limits: bool = True) -> DecisionEngine:
+    config = load_config("configs/ecommerce.yaml")
+    if rate_limits:
+        config["rate_limits"] = {"per_minute": 5}
+    return DecisionEngine(config)
+
+
+def _write_log(path: str, engine: DecisionEngine) -> dict:
+    """Decide 6 users (two untracked, one over per_minute) and log them both ways."""
+    features = {
+        "tenure": np.array([1, 2, 10, 3, 1, 8], dtype=np.float64),
+        "monthly_charges": np.array([200, 180, 90, 210, 220, 120], dtype=np.float64),
+        "request_count_today": np.array([1, 2, 1, 3, 1, 2], dtype=np.float64),
+        "login_attempts": np.ones(6),
+        "requests_last_minute": np.array([1, np.nan, 2, 9, np.nan, 3]),
+        "requests_last_hour": np.array([4, np.nan, 2, 20, np.nan, 3]),
+    }
+    churn = np.array([0.8, 0.7, 0.1, 0.9, 0.6, 0.2])
+    anomaly = np.zeros(6)
+    decided = engine.decide_batch(
+        churn, churn * 0.3, anomaly, features["request_count_today"],
+        requests_last_minute=features["requests_last_minute"],
+        requests_last_hour=features["requests_last_hour"],
+    )
+
+    log = DecisionLogWriter(path, config_version="test")
+    first = {name: column[0] for name, column in features.items()}
+    log.append(
+        first, churn_probability=churn[0], expected_lift=churn[0] * 0.3, anomaly_score=0.0,
+        decision=int(decided["decision_code"][0]), expected_value=float(decided["expected_value"][0]),
+        user_id="u0",
+    )
+    log.append_batch(
+        {name: column[1:] for name, column in features.items()},
+        churn_probability=churn[1:], expected_lift=churn[1:] * 0.3, anomaly_score=anomaly[1:],
+        decision=decided["decision_code"][1:], expected_value=decided["expected_value"][1:],
+        user_id=np.array([b"u1", b"", b"u3", b"", b"u5"]),
+    )
+    log.close()
+    return decided
+
+
+def _write_v1_log(path: str, rows: np.ndarray) -> None:
+    header = json.dumps({"format_version": 1, "dtype": [list(f) for f in RECORD_DTYPE_V1.descr]}).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<BI", 1, len(header)) + header + rows.tobytes())
+
+
+def test_write_read_replay_round_trip():
+    engine = _engine()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "decisions.dflog")
+        decided = _write_log(path, engine)
+        records = np.array(read_decision_log(path))
+
+        assert records.dtype == RECORD_DTYPE
+        assert records["user_id"].tolist() == [b"u0", b"u1", b"", b"u3", b"", b"u5"]
+        assert records["requests_last_minute"].tolist() == [1, -1, 2, 9, -1, 3]
+        assert records["requests_last_hour"].tolist() == [4, -1, 2, 20, -1, 3]
+        assert (records["decision"] == decided["decision_code"]).all()
+        assert records["decision"][3] == DecisionCode.FLAG  # 9 requests in a minute
+
+        same = replay(iter_decision_log(path, chunk_size=4), engine)
+        assert same["records"] == 6 and same["flipped"] == 0
+        assert same["expected_value_delta"] == 0.0
+
+        # Without rate_limits only the burst row changes
+        relaxed = replay(iter_decision_log(path), _engine(rate_limits=False))
+        assert relaxed["flipped"] == 1
+        assert relaxed["transitions"] == {"FLAG->INTERVENE": 1}
+
+
+def test_v1_log_reads_and_is_moved_aside():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "decisions.dflog")
+        _write_log(path, _engine(rate_limits=False))
+        rows = np.zeros(6, dtype=RECORD_DTYPE_V1)
+        v2 = np.array(read_decision_log(path))
+        for name in RECORD_DTYPE_V1.names:
+            rows[name] = v2[name]
+        _write_v1_log(path, rows)
+
+        v1 = read_decision_log(path)
+        assert v1.dtype == RECORD_DTYPE_V1 and len(v1) == 6
+        assert replay(iter_decision_log(path), _engine(rate_limits=False))["flipped"] == 0
+
+        # A writer never appends v2 rows to a v1 file
+        DecisionLogWriter(path).close()
+        assert len(read_decision_log(path)) == 0
+        with open(path, "rb") as f:
+            assert f.read(len(MAGIC) + 1)[-1] == FORMAT_VERSION
+        moved = read_decision_log(f"{path}.v1")
+        assert moved.dtype == RECORD_DTYPE_V1
+        assert (moved["decision"] == rows["decision"]).all()
+
+
+def test_api_logs_untracked_rows_as_minus_one():
+    from fastapi.testclient import TestClient
+
+    from app.ai import api
+    from app.ai.binary_protocol import MEDIA_TYPE, REQUEST_DTYPE, encode_requests
+
+    records = np.zeros(3, dtype=REQUEST_DTYPE)
+    records["user_id"] = [b"named", b"", b"named"]
+    records["tenure"], records["monthly_charges"] = 6, 150
+    records["request_count_today"] = records["login_attempts"] = 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "decisions.dflog")
+        with TestClient(api.app) as client:
+            api._decision_log = DecisionLogWriter(path)
+            try:
+                response = client.post(
+                    "/api/v1/decide/binary", content=encode_requests(records),
+                    headers={"Content-Type": MEDIA_TYPE},
+                )
+            finally:
+                api._decision_log.close()
+                api._decision_log = None
+        assert response.status_code == 200
+        logged = read_decision_log(path)
+        assert logged["requests_last_minute"].tolist() == [1, -1, 2]
+        assert logged["requests_last_hour"].tolist() == [1, -1, 2]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  ✓ {name}")
@@ -0,0 +1,66 @@
+"""
+Test: the decision history ring buffer keeps exact summaries (app.core.history).
+
+Inserting more rows than `capacity` evicts the oldest ones. The O(1)
+summary, built from running sums that are re-derived whenever the ring
+wraps, must match the retained columns both at a wrap and mid-cycle.
+
+Run:
+    python test_history.py
+    python -m pytest test_history.py -q
+"""
+import numpy as np
+
+from app.core.history import DecisionHistory
+from app.core.records import DecisionCode
+
+
+def _check(history: DecisionHistory) -> None:
+    summary = history.summary()
+    cols = history.columns()
+    n = len(cols["timestamp"])
+    assert summary["total_decisions"] == n == min(history.total_recorded, history.capacity)
+    codes = np.bincount(cols["decision_code"], minlength=len(DecisionCode))
+    assert summary["decision_breakdown"] == {code.name: int(codes[code]) for code in DecisionCode if codes[code]}
+    ev = cols["expected_value"].sum()
+    assert summary["total_expected_value"] == round(ev, 2)
+    assert summary["average_value"] == round(ev / n, 2)
+    assert summary["average_churn_probability"] == round(cols["churn_probability"].sum(dtype=np.float64) / n, 4)
+    assert summary["average_anomaly_score"] == round(cols["anomaly_score"].sum(dtype=np.float64) / n, 4)
+
+
+def test_eviction_and_wrap_keep_summary_exact():
+    rng = np.random.default_rng(0)
+    history = DecisionHistory(capacity=100)
+    names = [code.name for code in DecisionCode]
+    for i in range(1037):
+        history.append(
+            names[rng.integers(len(names))],
+            # Mixed magnitudes, so add-then-subtract would leave rounding error behind
+            expected_value=float(rng.normal(0, 1e6 if i % 2 else 1)),
+            churn_probability=float(rng.random()),
+            anomaly_score=float(rng.random()),
+            timestamp=float(i),
+        )
+        if i + 1 in (50, 100, 101, 1000, 1037):
+            _check(history)
+    # Oldest first, and only the last `capacity` rows are kept
+    assert history.columns()["timestamp"].tolist() == [float(t) for t in range(937, 1037)]
+    assert history.total_recorded == 1037
+
+
+def test_clear_resets_aggregates():
+    history = DecisionHistory(capacity=10)
+    for _ in range(25):
+        history.append("INTERVENE", expected_value=12.5, churn_probability=0.4)
+    history.clear()
+    history.append("FLAG", anomaly_score=0.99)
+    _check(history)
+    assert history.summary()["decision_breakdown"] == {"FLAG": 1}
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  ✓ {name}")
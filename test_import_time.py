@@ -0,0 +1,69 @@
+"""
+Test: import time of the decision path.
+
+The core engine, the inference-only model modules and the AI helpers must
+import without pandas, scikit-learn, scipy or ollama; those load lazily on
+first use (training, DataFrame batch scoring, LLM calls).
+
+Each import is measured in a fresh interpreter so earlier imports in this
+process do not hide the cost.
+
+Run:
+    python test_import_time.py
+    python -m pytest test_import_time.py -q
+"""
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pandas", "sklearn", "scipy", "ollama")
+
+LIGHT_IMPORTS = [
+    "app.core.decision_engine",
+    "app.ml.churn_model",
+    "app.ml.anomaly_model",
+    "app.ai.ai_explainer",
+    "app.ai.ai_enhanced_engine",
+    "app.ai.api",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, heavy=HEAVY_MODULES) -> dict:
+    """Import `module` in a fresh interpreter; return seconds taken and heavy modules loaded."""
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=tuple(heavy))],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_light_imports_do_not_load_heavy_modules():
+    for module in LIGHT_IMPORTS:
+        result = measure_import(module)
+        assert result["loaded"] == [], f"{module} imported {result['loaded']}"
+
+
+def test_decision_path_imports_faster_than_pandas_and_sklearn():
+    light = measure_import("app.core.decision_engine, app.ml.churn_model, app.ml.anomaly_model")
+    heavy = measure_import("pandas, sklearn.linear_model, sklearn.ensemble")
+    assert light["seconds"] < heavy["seconds"], (light, heavy)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Import time (fresh interpreter per module)")
+    print("=" * 60)
+    for module in LIGHT_IMPORTS + ["pandas, sklearn.linear_model, sklearn.ensemble"]:
+        result = measure_import(module)
+        loaded = ", ".join(result["loaded"]) or "-"
+        print(f"  {module:<50} {result['seconds'] * 1000:8.1f} ms   heavy: {loaded}")
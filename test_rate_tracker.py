@@ -0,0 +1,76 @@
+"""
+Test: sliding-window math of the request rate tracker (app.core.rate_tracker).
+
+Each window estimates the last W seconds as
+    previous * (1 - elapsed_in_current / W) + current
+These tests drive the tracker with explicit timestamps and check the
+estimate, window rollover, gaps longer than a window, and eviction.
+
+Run:
+    python test_rate_tracker.py
+    python -m pytest test_rate_tracker.py -q
+"""
+from app.core.rate_tracker import DAY, HOUR, MINUTE, RequestRateTracker
+
+T0 = 1_700_000_000.0 - 1_700_000_000.0 % DAY  # start of a UTC day
+
+
+def test_counts_within_one_window():
+    tracker = RequestRateTracker()
+    for i in range(5):
+        counts = tracker.record("u", now=T0 + i)
+    assert counts == (5, 5, 5)
+
+
+def test_previous_window_is_weighted_by_overlap():
+    tracker = RequestRateTracker()
+    for _ in range(10):
+        tracker.record("u", now=T0 + 30)
+    # 30s into the next minute: 10 * (1 - 30/60) + 1 (this request) = 6
+    counts = tracker.record("u", now=T0 + MINUTE + 30)
+    assert counts.per_minute == 6
+    assert counts.per_hour == 11
+    assert counts.per_day == 11
+
+
+def test_gap_longer_than_a_window_forgets_it():
+    tracker = RequestRateTracker()
+    for _ in range(10):
+        tracker.record("u", now=T0)
+    counts = tracker.record("u", now=T0 + 2 * MINUTE + 1)
+    assert counts.per_minute == 1
+    assert counts.per_hour == 11
+    counts = tracker.record("u", now=T0 + 2 * HOUR + 1)
+    assert counts.per_hour == 1
+    assert counts.per_day == 12
+
+
+def test_peek_does_not_count_and_users_are_independent():
+    tracker = RequestRateTracker()
+    tracker.record("a", now=T0)
+    tracker.record("a", now=T0)
+    tracker.record("b", now=T0)
+    assert tracker.peek("a", now=T0) == (2, 2, 2)
+    assert tracker.peek("a", now=T0) == (2, 2, 2)
+    assert tracker.peek("b", now=T0).per_minute == 1
+    assert tracker.peek("c", now=T0) == (0, 0, 0)
+
+
+def test_idle_and_capacity_eviction():
+    tracker = RequestRateTracker(shards=1, max_users=3, idle_seconds=HOUR)
+    tracker.record("old", now=T0)
+    tracker.record("u1", now=T0 + 2 * HOUR)  # "old" is idle by now
+    assert tracker.peek("old", now=T0 + 2 * HOUR) == (0, 0, 0)
+    for i in range(2, 6):
+        tracker.record(f"u{i}", now=T0 + 2 * HOUR + i)
+    assert len(tracker) == 3
+    stats = tracker.get_stats()
+    assert stats["evicted_idle"] == 1
+    assert stats["evicted_capacity"] == 2
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  ✓ {name}")
@@ -0,0 +1,97 @@
+"""
+Test: shadow decisions see the same inputs as the served decision (app.ai.experiments).
+
+A shadow variant running the primary's own models must agree with every
+served decision. With `rate_limits:` and attribute `rules:` configured that
+only holds if the shadow decision gets the served rate counts and rule
+columns too. Covers the JSON (single and batch) and binary decide paths.
+
+Run:
+    python test_shadow_experiments.py
+    python -m pytest test_shadow_experiments.py -q
+"""
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.ai import api
+from app.ai.binary_protocol import MEDIA_TYPE, encode_requests, request_dtype
+from app.ai.experiments import ExperimentRouter, ModelVariant
+from app.config_loader import load_config
+from app.core.decision_engine import DecisionEngine
+from app.core.metrics import MetricsRegistry
+
+RULES = [
+    {"name": "vip_exempt", "when": {"segment": "vip"}, "action": "DO_NOTHING"},
+    {"builtin": "security_gate"},
+    {"builtin": "roi"},
+]
+# Likely churner with quiet traffic: INTERVENE unless a rule or rate limit says otherwise
+CHURNER = {"tenure": 1, "monthly_charges": 200, "request_count_today": 1, "login_attempts": 1}
+
+
+def _install_shadow_setup() -> ExperimentRouter:
+    """Swap in a rules + rate_limits engine and a shadow copy of the primary models."""
+    config = load_config("configs/ecommerce.yaml")
+    config["rules"] = RULES
+    config["rate_limits"] = {"per_minute": 2}
+    api._engine = DecisionEngine(config, metrics=MetricsRegistry())
+    api._request_dtype = request_dtype({"segment": "S16"})
+    api._router = ExperimentRouter(
+        ModelVariant("primary", api._churn_model, api._anomaly_model, version="startup"),
+        [ModelVariant("shadow", api._churn_model, api._anomaly_model, mode="shadow")],
+        engine=DecisionEngine(config, metrics=MetricsRegistry()),
+    )
+    return api._router
+
+
+def _shadow_stats(router: ExperimentRouter) -> dict:
+    deadline = time.monotonic() + 10
+    while router.get_stats()["pending_shadow_jobs"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return router.get_stats()["variants"]["shadow"]
+
+
+def test_shadow_agrees_on_rules_and_rate_limits():
+    with TestClient(api.app) as client:
+        router = _install_shadow_setup()
+        served = []
+        vip = {"user_id": "v1", "features": CHURNER, "attributes": {"segment": "vip"}}
+        served.append(client.post("/api/v1/decide", json=vip).json()["decision"])
+        # Third and fourth requests in a minute exceed per_minute: 2
+        batch = client.post("/api/v1/decide/batch", json={"users": [{"user_id": "b1", "features": CHURNER}] * 4})
+        served += [d["decision"] for d in batch.json()["decisions"]]
+        stats = _shadow_stats(router)
+
+    assert served == ["DO_NOTHING", "INTERVENE", "INTERVENE", "FLAG", "FLAG"]
+    assert stats["errors"] == 0
+    assert stats["decisions"] == {"INTERVENE": 2, "DO_NOTHING": 1, "FLAG": 2}
+    assert stats["agreement_with_served"] == 1.0
+
+
+def test_shadow_agrees_on_binary_requests():
+    records = np.zeros(4, dtype=request_dtype({"segment": "S16"}))
+    records["user_id"] = [b"", b"r1", b"r1", b"r1"]
+    records["segment"] = [b"vip", b"", b"", b""]
+    for name, value in CHURNER.items():
+        records[name] = value
+
+    with TestClient(api.app) as client:
+        router = _install_shadow_setup()
+        response = client.post(
+            "/api/v1/decide/binary", content=encode_requests(records, dtype=api._request_dtype),
+            headers={"Content-Type": MEDIA_TYPE},
+        )
+        stats = _shadow_stats(router)
+
+    assert response.status_code == 200
+    assert stats["decisions"] == {"INTERVENE": 2, "DO_NOTHING": 1, "FLAG": 1}
+    assert stats["agreement_with_served"] == 1.0
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  ✓ {name}")
@@ -60,4 +60,6 @@ if 'recommendations' in result:
 
 print("\n" + "=" * 70)
 print("✅ Test completed successfully!")
-print("=" * 70)
\ No newline at end of file
+print("=" * 70)
+
+engine.close()
\ No newline at end of file